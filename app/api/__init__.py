@@ -0,0 +1,19 @@
+"""
+API routers, registered by create_app() as (router, prefix, tag).
+"""
+
+from .index import router as index_router
+from .ingest import router as ingest_router
+from .search import router as search_router
+from .faiss import router as faiss_router
+from .qdrant import router as qdrant_router
+from .jobs import router as jobs_router
+
+ALL = (
+    (index_router, "/api/index", "index"),
+    (ingest_router, "/api/ingest", "ingest"),
+    (search_router, "/api/search", "search"),
+    (faiss_router, "/api/faiss", "faiss"),
+    (qdrant_router, "/api/qdrant", "qdrant"),
+    (jobs_router, "/api/jobs", "jobs"),
+)
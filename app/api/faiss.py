@@ -5,8 +5,12 @@ Separate endpoints for FAISS vector store operations.
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 from pydantic import BaseModel, Field
-from app.services.faiss_service import create_faiss_index, ingest_csv_to_faiss, search_faiss_index
-import pandas as pd
+from typing import Literal
+from app.services.faiss_service import IVFPQ_NLIST, create_faiss_index, ingest_csv_to_faiss, search_faiss_index
+from app.services import ingest_jobs
+from app.core.config import settings
+from app.utils.csv_utils import missing_columns
+from app.core import existence_cache
 import logging
 
 router = APIRouter()
@@ -16,6 +20,8 @@ logger = logging.getLogger(__name__)
 class CreateFaissIndexRequest(BaseModel):
     index_name: str = Field(..., description="FAISS index name")
     embedding_dim: int = Field(..., description="Embedding dimension")
+    index_type: Literal["flat", "hnsw", "ivfpq"] = Field(default="flat", description="FAISS index type")
+    nlist: int = Field(default=IVFPQ_NLIST, description="Number of IVF cells (ivfpq only)")
 
 
 class IngestFaissRequest(BaseModel):
@@ -25,6 +31,7 @@ class IngestFaissRequest(BaseModel):
     title_col: str = Field(default="title")
     category_col: str = Field(default="category")
     text_col: str = Field(default="text")
+    read_batch_size: int = Field(default=settings.BATCH_SIZE, gt=0, description="CSV rows read per ingestion batch")
 
 
 class SearchFaissRequest(BaseModel):
@@ -43,8 +50,11 @@ def create_index_endpoint(req: CreateFaissIndexRequest, request: Request):
         result = create_faiss_index(
             index_name=req.index_name,
             dimension=req.embedding_dim,
-            mongo_client=mongo_client
+            mongo_client=mongo_client,
+            index_type=req.index_type,
+            nlist=req.nlist
         )
+        existence_cache.invalidate("faiss", req.index_name)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -60,29 +70,29 @@ def ingest_endpoint(req: IngestFaissRequest, background_tasks: BackgroundTasks,
     
     # Validate CSV exists
     try:
-        _ = pd.read_csv(req.csv_path, nrows=1)
+        missing = missing_columns(req.csv_path, [req.doc_id_col, req.title_col, req.category_col, req.text_col])
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Cannot read CSV at {req.csv_path}: {e}")
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV at {req.csv_path} is missing columns: {', '.join(missing)}")
     
     # Validate index exists
-    faiss_indices = mongo_client.db["faiss_indices"]
-    index_doc = faiss_indices.find_one({"index_name": req.index_name})
-    if not index_doc:
+    if not existence_cache.faiss_index_exists(mongo_client, req.index_name):
         raise HTTPException(status_code=400, detail=f"FAISS index {req.index_name} does not exist")
     
-    # Schedule background ingestion
+    # Schedule background ingestion as a resumable job
+    params = req.model_dump()
+    job_id = ingest_jobs.create_job(mongo_client, "faiss", params)
     background_tasks.add_task(
+        ingest_jobs.run_job,
+        mongo_client,
+        job_id,
         ingest_csv_to_faiss,
-        csv_path=req.csv_path,
-        index_name=req.index_name,
         mongo_client=mongo_client,
-        doc_id_col=req.doc_id_col,
-        title_col=req.title_col,
-        category_col=req.category_col,
-        text_col=req.text_col
+        **params
     )
     
-    return {"ok": True, "message": "FAISS ingestion scheduled"}
+    return {"ok": True, "message": "FAISS ingestion scheduled", "job_id": job_id}
 
 
 @router.post("/search")
@@ -91,9 +101,7 @@ def search_endpoint(req: SearchFaissRequest, request: Request):
     mongo_client = request.app.state.mongo_client
     
     # Validate index exists
-    faiss_indices = mongo_client.db["faiss_indices"]
-    index_doc = faiss_indices.find_one({"index_name": req.index_name})
-    if not index_doc:
+    if not existence_cache.faiss_index_exists(mongo_client, req.index_name):
         raise HTTPException(status_code=400, detail=f"FAISS index {req.index_name} not found")
     
     try:
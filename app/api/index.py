@@ -1,30 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field
+from functools import lru_cache
+from opensearchpy.exceptions import RequestError
+from app.core import existence_cache
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-class CreateIndexRequest(BaseModel):
-    index_name: str
-    embedding_dim: int
-
-
-@router.post("/create")
-def create_index(req: CreateIndexRequest, request: Request):
-    client = request.app.state.opensearch_client  # <-- shared client
+# HNSW parameters tuned for ~256-d embeddings on the benchmark dataset
+HNSW_M = 24
+HNSW_EF_CONSTRUCTION = 128
+HNSW_EF_SEARCH = 100
 
-    index = req.index_name
-    dim = req.embedding_dim
-
-    if client.indices.exists(index=index):
-        raise HTTPException(status_code=400, detail=f"Index `{index}` already exists")
 
-    mapping = {
+@lru_cache(maxsize=32)
+def _index_mapping(dimension: int) -> dict:
+    """
+    Index settings and mappings for a k-NN index; only the embedding dimension varies.
+    The returned dict is cached and shared between calls, so it must not be mutated.
+    """
+    return {
         "settings": {
             "index": {
                 "knn": True,
-                "knn.algo_param.ef_search": 100
+                "knn.algo_param.ef_search": HNSW_EF_SEARCH
             }
         },
         "mappings": {
@@ -37,14 +37,18 @@ def create_index(req: CreateIndexRequest, request: Request):
                 "text_snippet": {"type": "text"},
                 "embedding": {
                     "type": "knn_vector",
-                    "dimension": dim,
+                    "dimension": dimension,
                     "method": {
                         "name": "hnsw",
                         "space_type": "cosinesimil",
                         "engine": "faiss",
                         "parameters": {
-                            "ef_construction": 128,
-                            "m": 24
+                            "ef_construction": HNSW_EF_CONSTRUCTION,
+                            "m": HNSW_M,
+                            "encoder": {
+                                "name": "sq",
+                                "parameters": {"type": "fp16"}
+                            }
                         }
                     }
                 },
@@ -53,9 +57,36 @@ def create_index(req: CreateIndexRequest, request: Request):
         }
     }
 
+
+class CreateIndexRequest(BaseModel):
+    index_name: str
+    embedding_dim: int
+
+
+@router.post("/create")
+def create_index(req: CreateIndexRequest, request: Request):
+    client = request.app.state.opensearch_client  # <-- shared client
+
+    index = req.index_name
+    dim = req.embedding_dim
+
+    # uncached: indexes are deleted outside this API, and a cached "exists" would then block
+    # re-creating them until it expired
+    if client.indices.exists(index=index):
+        raise HTTPException(status_code=400, detail=f"Index `{index}` already exists")
+
+    mapping = _index_mapping(dim)
+
     try:
         client.indices.create(index=index, body=mapping)
+        existence_cache.invalidate("opensearch", index)
         return {"ok": True, "index": index}
+    except RequestError as e:
+        if e.error == "resource_already_exists_exception":
+            # created by a concurrent request since the check above
+            raise HTTPException(status_code=400, detail=f"Index `{index}` already exists")
+        logger.exception("Failed to create index")
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         logger.exception("Failed to create index")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
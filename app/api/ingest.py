@@ -2,7 +2,10 @@
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 from pydantic import BaseModel, Field
 from app.services.ingest_service import ingest_csv_to_index
-import pandas as pd
+from app.services import ingest_jobs
+from app.core.config import settings
+from app.utils.csv_utils import missing_columns
+from app.core import existence_cache
 import logging
 
 router = APIRouter()
@@ -15,19 +18,24 @@ class IngestRequest(BaseModel):
     title_col: str = Field(default="title")
     category_col: str = Field(default="category")
     text_col: str = Field(default="text")
+    read_batch_size: int = Field(default=settings.BATCH_SIZE, gt=0, description="CSV rows read per ingestion batch")
 
 @router.post("/start")
 def start_ingest(req: IngestRequest, background_tasks: BackgroundTasks, request: Request):
     # validate index exists
     client = request.app.state.opensearch_client
-    if not client.indices.exists(index=req.index_name):
+    if not existence_cache.index_exists(client, req.index_name):
         raise HTTPException(status_code=400, detail=f"Index {req.index_name} does not exist.")
 
     # validate CSV
     try:
-        _ = pd.read_csv(req.csv_path, nrows=1)
+        missing = missing_columns(req.csv_path, [req.doc_id_col, req.title_col, req.category_col, req.text_col])
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Cannot read CSV at {req.csv_path}: {e}")
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV at {req.csv_path} is missing columns: {', '.join(missing)}")
 
-    background_tasks.add_task(ingest_csv_to_index, request, req.csv_path, req.index_name, req.doc_id_col, req.title_col, req.category_col, req.text_col)
-    return {"ok": True, "message": "Ingest scheduled"}
+    params = req.model_dump()
+    job_id = ingest_jobs.create_job(request.app.state.mongo_client, "opensearch", params)
+    background_tasks.add_task(ingest_jobs.run_job, request.app.state.mongo_client, job_id, ingest_csv_to_index, request, **params)
+    return {"ok": True, "message": "Ingest scheduled", "job_id": job_id}
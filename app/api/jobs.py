@@ -0,0 +1,59 @@
+"""
+Ingestion job API endpoints.
+Inspect and resume ingestion jobs started by the ingest endpoints.
+"""
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
+from app.services import ingest_jobs
+from app.services.ingest_service import ingest_csv_to_index
+from app.services.faiss_service import ingest_csv_to_faiss
+from app.services.qdrant_service import ingest_csv_to_qdrant
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/{job_id}")
+def get_job_endpoint(job_id: str, request: Request):
+    """Return the status and checkpoint of an ingestion job"""
+    job = ingest_jobs.get_job(request.app.state.mongo_client, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    return job
+
+
+@router.post("/{job_id}/resume")
+def resume_job_endpoint(job_id: str, background_tasks: BackgroundTasks, request: Request):
+    """Resume a failed, interrupted or stale (worker died) ingestion job from its last checkpoint"""
+    mongo_client = request.app.state.mongo_client
+    job = ingest_jobs.get_job(mongo_client, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Ingest job {job_id} not found")
+    if job["status"] == "completed":
+        raise HTTPException(status_code=400, detail=f"Ingest job {job_id} already completed")
+    if not ingest_jobs.is_resumable(job):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Ingest job {job_id} is {job['status']}, only failed, interrupted or stale jobs can be resumed"
+        )
+    # claim the job before scheduling it, so concurrent resume calls cannot start two runs
+    job = ingest_jobs.claim_job(mongo_client, job_id)
+    if not job:
+        raise HTTPException(status_code=409, detail=f"Ingest job {job_id} was resumed or changed by another request")
+
+    params = job["params"]
+    backend = job["backend"]
+    if backend == "opensearch":
+        background_tasks.add_task(ingest_jobs.run_job, mongo_client, job_id, ingest_csv_to_index, request, **params)
+    elif backend == "faiss":
+        background_tasks.add_task(ingest_jobs.run_job, mongo_client, job_id, ingest_csv_to_faiss, mongo_client=mongo_client, **params)
+    elif backend == "qdrant":
+        background_tasks.add_task(
+            ingest_jobs.run_job, mongo_client, job_id, ingest_csv_to_qdrant,
+            qdrant_client=request.app.state.qdrant_client, mongo_client=mongo_client, **params
+        )
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown ingest backend {backend}")
+
+    return {"ok": True, "message": "Ingest job resumed", "job_id": job_id, "rows_done": job.get("rows_done", 0)}
@@ -6,7 +6,10 @@ Separate endpoints for Qdrant vector store operations.
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 from pydantic import BaseModel, Field
 from app.services.qdrant_service import create_qdrant_collection, ingest_csv_to_qdrant, search_qdrant_collection
-import pandas as pd
+from app.services import ingest_jobs
+from app.core.config import settings
+from app.utils.csv_utils import missing_columns
+from app.core import existence_cache
 import logging
 
 router = APIRouter()
@@ -25,6 +28,7 @@ class IngestQdrantRequest(BaseModel):
     title_col: str = Field(default="title")
     category_col: str = Field(default="category")
     text_col: str = Field(default="text")
+    read_batch_size: int = Field(default=settings.BATCH_SIZE, gt=0, description="CSV rows read per ingestion batch")
 
 
 class SearchQdrantRequest(BaseModel):
@@ -47,6 +51,7 @@ def create_collection_endpoint(req: CreateQdrantCollectionRequest, request: Requ
             qdrant_client=qdrant_client,
             mongo_client=mongo_client
         )
+        existence_cache.invalidate("qdrant", req.collection_name)
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -63,30 +68,30 @@ def ingest_endpoint(req: IngestQdrantRequest, background_tasks: BackgroundTasks,
     
     # Validate CSV exists
     try:
-        _ = pd.read_csv(req.csv_path, nrows=1)
+        missing = missing_columns(req.csv_path, [req.doc_id_col, req.title_col, req.category_col, req.text_col])
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Cannot read CSV at {req.csv_path}: {e}")
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV at {req.csv_path} is missing columns: {', '.join(missing)}")
     
     # Validate collection exists
-    qdrant_collections = mongo_client.db["qdrant_collections"]
-    collection_doc = qdrant_collections.find_one({"collection_name": req.collection_name})
-    if not collection_doc:
+    if not existence_cache.qdrant_collection_exists(mongo_client, req.collection_name):
         raise HTTPException(status_code=400, detail=f"Qdrant collection {req.collection_name} does not exist")
     
-    # Schedule background ingestion
+    # Schedule background ingestion as a resumable job
+    params = req.model_dump()
+    job_id = ingest_jobs.create_job(mongo_client, "qdrant", params)
     background_tasks.add_task(
+        ingest_jobs.run_job,
+        mongo_client,
+        job_id,
         ingest_csv_to_qdrant,
-        csv_path=req.csv_path,
-        collection_name=req.collection_name,
         qdrant_client=qdrant_client,
         mongo_client=mongo_client,
-        doc_id_col=req.doc_id_col,
-        title_col=req.title_col,
-        category_col=req.category_col,
-        text_col=req.text_col
+        **params
     )
     
-    return {"ok": True, "message": "Qdrant ingestion scheduled"}
+    return {"ok": True, "message": "Qdrant ingestion scheduled", "job_id": job_id}
 
 
 @router.post("/search")
@@ -96,9 +101,7 @@ def search_endpoint(req: SearchQdrantRequest, request: Request):
     mongo_client = request.app.state.mongo_client
     
     # Validate collection exists
-    qdrant_collections = mongo_client.db["qdrant_collections"]
-    collection_doc = qdrant_collections.find_one({"collection_name": req.collection_name})
-    if not collection_doc:
+    if not existence_cache.qdrant_collection_exists(mongo_client, req.collection_name):
         raise HTTPException(status_code=400, detail=f"Qdrant collection {req.collection_name} not found")
     
     try:
@@ -2,6 +2,7 @@
 from fastapi import APIRouter, Request, HTTPException
 from pydantic import BaseModel, Field
 from app.services.rag_service import rag_answer
+from app.core import existence_cache
 import logging
 
 router = APIRouter()
@@ -17,7 +18,7 @@ class SearchRequest(BaseModel):
 def query_endpoint(req: SearchRequest, request: Request):
     # validate index exists
     client = request.app.state.opensearch_client
-    if not client.indices.exists(index=req.index_name):
+    if not existence_cache.index_exists(client, req.index_name):
         raise HTTPException(status_code=400, detail=f"Index {req.index_name} not found")
     res = rag_answer(request, req.query, req.index_name, top_k=req.top_k, filter_category=req.category)
     return res
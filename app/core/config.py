@@ -1,44 +1,98 @@
-from pydantic_settings import BaseSettings
-from dotenv import load_dotenv, find_dotenv
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from app.core.env_loader import ensure_env_loaded
 import os
+import tempfile
 
 # Load .env from project root
-load_dotenv(find_dotenv())
+ensure_env_loaded()
 
 
-class Settings(BaseSettings):
+def _as_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     # App runtime
-    APP_ENV: str = os.getenv("APP_ENV", "development")
-    DEBUG: bool = os.getenv("DEBUG", "True").lower() in ("1", "true", "yes")
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    HOST: str = os.getenv("HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PORT", 8000))
+    APP_ENV: str
+    DEBUG: bool
+    LOG_LEVEL: str
+    HOST: str
+    PORT: int
 
     # OpenSearch
-    OPENSEARCH_HOST: str = os.getenv("OPENSEARCH_HOST")
-    OPENSEARCH_INDEX: str = os.getenv("OPENSEARCH_INDEX")
+    OPENSEARCH_HOST: Optional[str]
+    OPENSEARCH_INDEX: Optional[str]
 
     # MongoDB
-    MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    MONGO_DB: str = os.getenv("MONGO_DB", "rag_playground")
+    MONGO_URI: str
+    MONGO_DB: str
 
     # Ingest
-    BATCH_SIZE: int = int(os.getenv("BATCH", 64))
-    CHUNK_MAX_WORDS: int = int(os.getenv("CHUNK_MAX_WORDS", 140))
-    CHUNK_OVERLAP: int = int(os.getenv("CHUNK_OVERLAP", 30))
+    BATCH_SIZE: int
+    CHUNK_MAX_WORDS: int
+    CHUNK_OVERLAP: int
+    BULK_THREADS: int
+    BULK_CHUNK_SIZE: int
 
     # Embeddings
-    OLLAMA_API_URL: str = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/embed")
-    OLLAMA_EMBEDDING_MODEL: str = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text:v1.5")
-    OLLAMA_EMBEDDING_DIMENSION: int = int(os.getenv("OLLAMA_EMBEDDING_DIMENSION", 256))
+    OLLAMA_API_URL: str
+    OLLAMA_EMBEDDING_MODEL: str
+    OLLAMA_EMBEDDING_DIMENSION: int
+    EMBEDDING_CACHE_SIZE: int
 
     # Retrieval and Search
-    OLLAMA_GENERATE_API: str = os.getenv("OLLAMA_GENERATE_API", "http://localhost:11434/api/generate")
-    OLLAMA_GENERATE_MODEL: str = os.getenv("OLLAMA_GENERATE_MODEL", "llama3.1:8b")
+    OLLAMA_GENERATE_API: str
+    OLLAMA_GENERATE_MODEL: str
+
+    # FAISS
+    FAISS_INDEX_DIR: str
+    FAISS_SNAPSHOT_EVERY: int
 
     # Qdrant
-    QDRANT_HOST: str = os.getenv("QDRANT_HOST", "localhost")
-    QDRANT_PORT: int = int(os.getenv("QDRANT_PORT", 6333))
+    QDRANT_HOST: str
+    QDRANT_PORT: int
+    QDRANT_GRPC_PORT: int
+
+    @classmethod
+    def _load(cls) -> "Settings":
+        """Read the environment once and coerce every value up front."""
+        env = dict(os.environ)
+        return cls(
+            APP_ENV=env.get("APP_ENV", "development"),
+            DEBUG=_as_bool(env.get("DEBUG", "True")),
+            LOG_LEVEL=env.get("LOG_LEVEL", "INFO"),
+            HOST=env.get("HOST", "0.0.0.0"),
+            PORT=int(env.get("PORT", 8000)),
+            OPENSEARCH_HOST=env.get("OPENSEARCH_HOST"),
+            OPENSEARCH_INDEX=env.get("OPENSEARCH_INDEX"),
+            MONGO_URI=env.get("MONGO_URI", "mongodb://localhost:27017"),
+            MONGO_DB=env.get("MONGO_DB", "rag_playground"),
+            BATCH_SIZE=int(env.get("BATCH", 64)),
+            CHUNK_MAX_WORDS=int(env.get("CHUNK_MAX_WORDS", 140)),
+            CHUNK_OVERLAP=int(env.get("CHUNK_OVERLAP", 30)),
+            BULK_THREADS=int(env.get("BULK_THREADS", 4)),
+            BULK_CHUNK_SIZE=int(env.get("BULK_CHUNK_SIZE", 500)),
+            OLLAMA_API_URL=env.get("OLLAMA_API_URL", "http://localhost:11434/api/embed"),
+            OLLAMA_EMBEDDING_MODEL=env.get("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text:v1.5"),
+            OLLAMA_EMBEDDING_DIMENSION=int(env.get("OLLAMA_EMBEDDING_DIMENSION", 256)),
+            EMBEDDING_CACHE_SIZE=int(env.get("EMBEDDING_CACHE_SIZE", 10000)),
+            OLLAMA_GENERATE_API=env.get("OLLAMA_GENERATE_API", "http://localhost:11434/api/generate"),
+            OLLAMA_GENERATE_MODEL=env.get("OLLAMA_GENERATE_MODEL", "llama3.1:8b"),
+            FAISS_INDEX_DIR=env.get("FAISS_INDEX_DIR", os.path.join(tempfile.gettempdir(), "rag_faiss")),
+            FAISS_SNAPSHOT_EVERY=int(env.get("FAISS_SNAPSHOT_EVERY", 10)),
+            QDRANT_HOST=env.get("QDRANT_HOST", "localhost"),
+            QDRANT_PORT=int(env.get("QDRANT_PORT", 6333)),
+            QDRANT_GRPC_PORT=int(env.get("QDRANT_GRPC_PORT", 6334)),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings snapshot. Tests can reset it with get_settings.cache_clear()."""
+    return Settings._load()
 
 
-settings = Settings()
+settings = get_settings()
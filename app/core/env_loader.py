@@ -0,0 +1,11 @@
+from dotenv import load_dotenv, find_dotenv
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def ensure_env_loaded() -> None:
+    """
+    Load .env from the project root exactly once per process.
+    Values already present in the environment take precedence.
+    """
+    load_dotenv(find_dotenv(usecwd=True), override=False)
@@ -0,0 +1,76 @@
+"""
+Short-lived cache for index / collection existence checks.
+Only positive results are cached, so a newly created index is never reported missing.
+"""
+
+from typing import Dict, Tuple
+import threading
+import time
+
+_TTL_SECONDS = 30
+_MAX_ENTRIES = 1024
+
+_cache: Dict[Tuple[str, str], float] = {}
+_lock = threading.Lock()
+
+
+def _get(key: Tuple[str, str]) -> bool:
+    with _lock:
+        expires_at = _cache.get(key)
+        if expires_at is None:
+            return False
+        if expires_at < time.monotonic():
+            del _cache[key]
+            return False
+        return True
+
+
+def _put(key: Tuple[str, str]):
+    with _lock:
+        if len(_cache) >= _MAX_ENTRIES:
+            _cache.clear()
+        _cache[key] = time.monotonic() + _TTL_SECONDS
+
+
+def _cached_exists(key: Tuple[str, str], lookup) -> bool:
+    if _get(key):
+        return True
+    exists = bool(lookup())
+    if exists:
+        _put(key)
+    return exists
+
+
+def index_exists(client, index_name: str) -> bool:
+    """OpenSearch index existence (client.indices.exists)"""
+    return _cached_exists(
+        ("opensearch", index_name),
+        lambda: client.indices.exists(index=index_name)
+    )
+
+
+def faiss_index_exists(mongo_client, index_name: str) -> bool:
+    """FAISS index metadata existence in MongoDB (skips loading the index binary)"""
+    return _cached_exists(
+        ("faiss", index_name),
+        lambda: mongo_client.db["faiss_indices"].find_one({"index_name": index_name}, {"_id": 1})
+    )
+
+
+def qdrant_collection_exists(mongo_client, collection_name: str) -> bool:
+    """Qdrant collection metadata existence in MongoDB"""
+    return _cached_exists(
+        ("qdrant", collection_name),
+        lambda: mongo_client.db["qdrant_collections"].find_one({"collection_name": collection_name}, {"_id": 1})
+    )
+
+
+def invalidate(backend: str, name: str):
+    """Drop a cached entry, e.g. after an index has been created or deleted"""
+    with _lock:
+        _cache.pop((backend, name), None)
+
+
+def clear():
+    with _lock:
+        _cache.clear()
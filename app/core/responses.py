@@ -0,0 +1,10 @@
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; numpy arrays and scalars serialize natively."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,114 @@
+"""
+Persistent embedding caches: MongoDB for the app, a local SQLite file for scripts.
+Vectors are stored under the embedding cache key (SHA-256 of model, dimension
+and text), so re-ingesting unchanged rows and repeating queries does not call
+Ollama again, even across restarts.
+"""
+
+from pymongo import UpdateOne
+from typing import Dict, List
+from datetime import datetime
+import logging
+import sqlite3
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MongoEmbeddingStore:
+    def __init__(self, mongo_client, collection_name: str = "embedding_cache"):
+        self.collection = mongo_client.db[collection_name]
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors (float32) for the keys that are present"""
+        if not keys:
+            return {}
+        found = {}
+        try:
+            for doc in self.collection.find({"_id": {"$in": keys}}, {"vec": 1}):
+                found[doc["_id"]] = np.frombuffer(doc["vec"], dtype=np.float16).astype(np.float32)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray], model: str, dimension: int):
+        """Insert vectors that are not stored yet"""
+        if not vectors:
+            return
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {
+                    "vec": np.asarray(vec, dtype=np.float16).tobytes(),
+                    "model": model,
+                    "dim": dimension,
+                    "created_at": now
+                }},
+                upsert=True
+            )
+            for key, vec in vectors.items()
+        ]
+        try:
+            self.collection.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning("Embedding cache write failed: %s", e)
+
+
+class SqliteEmbeddingStore:
+    """
+    Same interface as MongoEmbeddingStore, backed by a local SQLite file.
+    Vectors are kept as float32 bytes; meant for scripts that rerun the same
+    queries (e.g. benchmark evaluation) without a MongoDB instance.
+    """
+
+    def __init__(self, path: str = ".embed_cache.db"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache "
+                "(key TEXT PRIMARY KEY, vec BLOB NOT NULL, model TEXT, dim INTEGER, created_at TEXT)"
+            )
+            self._conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Return the stored vectors (float32) for the keys that are present"""
+        if not keys:
+            return {}
+        found = {}
+        try:
+            with self._lock:
+                # stay under SQLite's host parameter limit
+                for i in range(0, len(keys), 500):
+                    part = keys[i:i + 500]
+                    rows = self._conn.execute(
+                        f"SELECT key, vec FROM embedding_cache WHERE key IN ({','.join('?' * len(part))})", part
+                    ).fetchall()
+                    for key, vec in rows:
+                        found[key] = np.frombuffer(vec, dtype=np.float32).copy()
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray], model: str, dimension: int):
+        """Insert vectors that are not stored yet"""
+        if not vectors:
+            return
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (key, np.asarray(vec, dtype=np.float32).tobytes(), model, dimension, now)
+            for key, vec in vectors.items()
+        ]
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embedding_cache (key, vec, model, dim, created_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Embedding cache write failed: %s", e)
@@ -1,11 +1,39 @@
 from pymongo import MongoClient
 from app.core.config import settings
 from typing import Optional
+import atexit
+import os
+
+_client: Optional[MongoClient] = None
+
+
+def _get_client() -> MongoClient:
+    """Return the process-wide MongoClient, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = MongoClient(settings.MONGO_URI, maxPoolSize=50, appname="rag")
+    return _client
+
+
+def _close_client():
+    if _client is not None:
+        _client.close()
+
+
+def _reset_after_fork():
+    # MongoClient is not fork-safe: a worker forked from a preloaded master must open its own
+    global _client
+    _client = None
+
+
+atexit.register(_close_client)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 
 class MongoClientWrapper:
     def __init__(self):
-        self.client = MongoClient(settings.MONGO_URI)
+        self.client = _get_client()
         self.db = self.client[settings.MONGO_DB]
         self.chunks = self.db["chunks"]
         self.documents = self.db["documents"]
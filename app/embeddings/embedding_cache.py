@@ -0,0 +1,60 @@
+"""
+In-process LRU cache of embedding vectors keyed by SHA-256 of (model, dimension, text).
+Shared by every OllamaAPIEmbedder instance in the process. The same key is used
+as the document id of the persistent MongoDB tier (app.db.embedding_store).
+"""
+
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Dict, List, Optional
+import threading
+import numpy as np
+
+
+def embedding_key(model: str, dimension: int, text: str) -> str:
+    h = sha256(f"{model}\0{dimension}\0".encode("utf-8"))
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is not None:
+                self._data.move_to_end(key)
+            return vec
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                vec = self._data.get(key)
+                if vec is not None:
+                    self._data.move_to_end(key)
+                    found[key] = vec
+        return found
+
+    def put(self, key: str, vec: np.ndarray):
+        if self.maxsize <= 0:
+            return
+        # stored read-only so a cached vector cannot be modified through a caller's reference
+        vec = np.array(vec, dtype="float32")
+        vec.setflags(write=False)
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,29 @@
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def create_http_session(pool_maxsize: int = 32) -> requests.Session:
+    """
+    Create a keep-alive session for Ollama calls.
+    Endpoints run in FastAPI's threadpool, so the pool is sized for concurrent requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def post_json(session: requests.Session, url: str, payload: dict, timeout: float):
+    """
+    POST payload as JSON and return the decoded JSON response, raising for HTTP errors.
+    orjson encodes and decodes instead of the stdlib json used by requests' json= and .json();
+    most of the cost is the float lists of embedding responses.
+    """
+    r = session.post(url, data=orjson.dumps(payload), headers=JSON_HEADERS, timeout=timeout)
+    r.raise_for_status()
+    return orjson.loads(r.content)
@@ -1,44 +1,125 @@
-import requests
 import numpy as np
 from app.core.config import settings
-from typing import List
+from app.embeddings.http_session import JSON_HEADERS, create_http_session
+from app.embeddings.embedding_cache import EmbeddingCache, embedding_key
+from functools import lru_cache
+from typing import Dict, List
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# shared across embedder instances; repeated texts and queries skip the HTTP round trip
+embedding_cache = EmbeddingCache(maxsize=settings.EMBEDDING_CACHE_SIZE)
+
+# raw little-endian float32 rows are accepted from servers (or proxies) that can send them; Ollama itself answers with JSON
+BINARY_CONTENT_TYPE = "application/octet-stream"
+EMBED_HEADERS = {**JSON_HEADERS, "Accept": f"{BINARY_CONTENT_TYPE}, application/json;q=0.9"}
+
+
+@lru_cache(maxsize=None)
+def _empty_embeddings(dimension: int) -> np.ndarray:
+    """Shared read-only (0, dimension) result for empty batches"""
+    empty = np.empty((0, dimension), dtype=np.float32)
+    empty.setflags(write=False)
+    return empty
+
+
 class OllamaAPIEmbedder:
-    def __init__(self):
+    def __init__(self, store=None):
+        """
+        Args:
+            store: Optional persistent cache tier with get_many(keys) and
+                put_many(vectors, model, dimension), e.g. MongoEmbeddingStore
+        """
+        self.store = store
         self.api_url = settings.OLLAMA_API_URL
         self.model = settings.OLLAMA_EMBEDDING_MODEL
         self.dimension = settings.OLLAMA_EMBEDDING_DIMENSION
+        self.batch_size = settings.BATCH_SIZE
+        self._session = create_http_session()
 
     def _extract_vector(self, resp_json):
-        # handle common response shapes (inspect once and adjust)
+        return self._extract_vectors(resp_json)[0]
+
+    def _extract_vectors(self, resp_json):
+        # handle common response shapes: {"embeddings": [[...], ...]} (Ollama API),
+        # {"data": [{"embedding": [...]}, ...]}, [{"embedding": [...]}, ...] and {"embedding": [...]}
         if isinstance(resp_json, dict):
-            # Ollama API returns {"embeddings": [[...]]}
             if "embeddings" in resp_json and isinstance(resp_json["embeddings"], list):
-                return resp_json["embeddings"][0]
+                return resp_json["embeddings"]
             if "embedding" in resp_json:
-                return resp_json["embedding"]
-            if "data" in resp_json and isinstance(resp_json["data"], list) and "embedding" in resp_json["data"][0]:
-                return resp_json["data"][0]["embedding"]
-        if isinstance(resp_json, list) and len(resp_json) > 0 and isinstance(resp_json[0], dict) and "embedding" in resp_json[0]:
-            return resp_json[0]["embedding"]
+                return [resp_json["embedding"]]
+            if "data" in resp_json and isinstance(resp_json["data"], list):
+                resp_json = resp_json["data"]
+        if isinstance(resp_json, list) and resp_json and all(isinstance(d, dict) and "embedding" in d for d in resp_json):
+            return [d["embedding"] for d in resp_json]
         # fallback: raise to spot issues
         raise ValueError(f"Unexpected Ollama response: {resp_json}")
 
-    def embed(self, text: str) -> np.ndarray:
-        payload = {"model": self.model, "input": text, "dimensions": self.dimension}
-        r = requests.post(self.api_url, json=payload, timeout=60)
+    def _request_vectors(self, payload: dict) -> np.ndarray:
+        """
+        POST an embed request and return its vectors as one (n, dim) float32 array; the cached
+        vectors are rows of it. A binary response is read with a single frombuffer, JSON
+        responses are decoded and converted once.
+        """
+        r = self._session.post(self.api_url, data=orjson.dumps(payload), headers=EMBED_HEADERS, timeout=60)
         r.raise_for_status()
-        vec = self._extract_vector(r.json())
-        return np.array(vec, dtype="float32")
+        if r.headers.get("Content-Type", "").split(";")[0].strip() == BINARY_CONTENT_TYPE:
+            if len(r.content) % (4 * self.dimension):
+                raise ValueError(f"Binary embedding response of {len(r.content)} bytes is not a whole number of {self.dimension}-d rows")
+            return np.frombuffer(r.content, dtype="<f4").reshape(-1, self.dimension)
+        return np.asarray(self._extract_vectors(orjson.loads(r.content)), dtype=np.float32)
+
+    def _key(self, text: str) -> str:
+        return embedding_key(self.model, self.dimension, text)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors for keys, from memory first and then the persistent store"""
+        found = embedding_cache.get_many(keys)
+        if self.store is not None:
+            remaining = [k for k in dict.fromkeys(keys) if k not in found]
+            if remaining:
+                stored = self.store.get_many(remaining)
+                for key, vec in stored.items():
+                    embedding_cache.put(key, vec)
+                found.update(stored)
+        return found
+
+    def _remember(self, vectors: Dict[str, np.ndarray]):
+        for key, vec in vectors.items():
+            embedding_cache.put(key, vec)
+        if self.store is not None:
+            self.store.put_many(vectors, self.model, self.dimension)
+
+    def embed(self, text: str) -> np.ndarray:
+        # same cached, batched path as embed_batch, for a batch of one
+        return self.embed_batch([text])[0]
 
     def embed_batch(self, texts: List[str]) -> np.ndarray:
-        # naive batch (one request per item). Change to batched API if your Ollama supports it.
+        # one request per sub-batch of BATCH_SIZE texts; Ollama's /api/embed accepts a list as input
         if not texts:
-            return np.array([], dtype="float32").reshape(0, self.dimension)
-        vecs = []
-        for t in texts:
-            vecs.append(self.embed(t))
-        return np.vstack(vecs)
\ No newline at end of file
+            return _empty_embeddings(self.dimension)
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(keys)
+
+        # embed only the distinct texts that are not cached yet
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        missing_keys = list(missing)
+        missing_texts = list(missing.values())
+        for i in range(0, len(missing_texts), self.batch_size):
+            payload = {"model": self.model, "input": missing_texts[i:i + self.batch_size], "dimensions": self.dimension}
+            batch_keys = missing_keys[i:i + self.batch_size]
+            batch_vecs = self._request_vectors(payload)
+            if len(batch_vecs) != len(batch_keys):
+                raise ValueError(f"Ollama returned {len(batch_vecs)} embeddings for {len(batch_keys)} inputs")
+            fresh = dict(zip(batch_keys, batch_vecs))
+            self._remember(fresh)
+            found.update(fresh)
+
+        # one contiguous (n, dim) float32 buffer, so callers can normalize it in place without a copy
+        # (and without touching the cached rows)
+        return np.stack([found[key] for key in keys]).astype(np.float32, copy=False)
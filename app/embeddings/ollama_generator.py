@@ -1,40 +1,93 @@
-import requests
 from app.core.config import settings
+from app.embeddings.http_session import JSON_HEADERS, create_http_session, post_json
+from typing import Iterator
+import orjson
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
-class OllamaGenerator:
-    def __init__(self, model=None, api_url=None):
-        self.model = model or settings.OLLAMA_GENERATE_MODEL  # e.g., llama3, mistral
-        self.api_url = api_url or settings.OLLAMA_GENERATE_API  # e.g., http://localhost:11434/api/generate
-
-    def generate(self, query: str, contexts: list) -> str:
-        context_text = "\n\n".join([c["text_snippet"] for c in contexts])
+# seconds after a warm-up during which the model is assumed still loaded (Ollama keeps it 5 minutes by default)
+WARM_UP_INTERVAL = 60.0
 
-        prompt = f"""
+PROMPT_TEMPLATE = """
 You are an AI assistant. Answer the user question using ONLY the context below.
 
 Question:
 {query}
 
 Context:
-{context_text}
+{context}
 
 Give a concise, factual answer.
 """
 
-        payload = {
+class OllamaGenerator:
+    def __init__(self, model=None, api_url=None):
+        self.model = model or settings.OLLAMA_GENERATE_MODEL  # e.g., llama3, mistral
+        self.api_url = api_url or settings.OLLAMA_GENERATE_API  # e.g., http://localhost:11434/api/generate
+        self._session = create_http_session()
+        self._warm_lock = threading.Lock()
+        self._warmed_at = None
+
+    def warm_up(self) -> bool:
+        """
+        Ask Ollama to load the model (a request without a prompt only loads it), so a
+        following generate() does not pay the load. Sent at most once per WARM_UP_INTERVAL;
+        returns whether a request was made. Failures are logged, generate() reports its own.
+        """
+        now = time.monotonic()
+        with self._warm_lock:
+            if self._warmed_at is not None and now - self._warmed_at < WARM_UP_INTERVAL:
+                return False
+            self._warmed_at = now
+        try:
+            post_json(self._session, self.api_url, {"model": self.model, "stream": False}, timeout=300)
+        except Exception as e:
+            logger.warning("Ollama warm-up failed: %s", e)
+            with self._warm_lock:
+                self._warmed_at = None
+        return True
+
+    def _payload(self, query: str, contexts: list, stream: bool) -> dict:
+        return {
             "model": self.model,
-            "prompt": prompt,
-            "stream": False
+            "prompt": PROMPT_TEMPLATE.format(query=query, context="\n\n".join(c["text_snippet"] for c in contexts)),
+            "stream": stream
         }
 
+    def generate(self, query: str, contexts: list) -> str:
+        payload = self._payload(query, contexts, stream=False)
+
         try:
-            r = requests.post(self.api_url, json=payload, timeout=300)
-            r.raise_for_status()
-            data = r.json()
+            data = post_json(self._session, self.api_url, payload, timeout=300)
             return data.get("response", "")
         except Exception as e:
             logger.exception("Ollama generation failed")
-            return f"Generation error: {str(e)}"
\ No newline at end of file
+            return f"Generation error: {str(e)}"
+
+    def generate_stream(self, query: str, contexts: list) -> Iterator[str]:
+        """
+        Yield the answer piece by piece as Ollama produces it (one JSON object per line),
+        instead of waiting for the whole response. Errors end the stream with the same
+        "Generation error" text that generate() returns.
+        """
+        payload = self._payload(query, contexts, stream=True)
+
+        try:
+            with self._session.post(
+                self.api_url, data=orjson.dumps(payload), headers=JSON_HEADERS, timeout=300, stream=True
+            ) as r:
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    chunk = orjson.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            logger.exception("Ollama streaming generation failed")
+            yield f"Generation error: {str(e)}"
@@ -0,0 +1,20 @@
+"""
+Embedder and generator instances shared by the ingest, search and RAG services.
+"""
+
+from functools import lru_cache
+from app.embeddings.ollama_api_embedder import OllamaAPIEmbedder
+from app.db.embedding_store import MongoEmbeddingStore
+from app.embeddings.ollama_generator import OllamaGenerator
+
+
+@lru_cache(maxsize=1)
+def embedder(mongo_client) -> OllamaAPIEmbedder:
+    """Embedder shared across calls (keeps its HTTP session), rebuilt only for a different mongo_client"""
+    return OllamaAPIEmbedder(store=MongoEmbeddingStore(mongo_client))
+
+
+@lru_cache(maxsize=1)
+def generator() -> OllamaGenerator:
+    """Generator shared across calls so its HTTP session is reused"""
+    return OllamaGenerator()
@@ -1,48 +1,389 @@
 """
 FAISS service for vector search operations.
-Uses MongoDB for all storage (metadata, vectors, and FAISS index binary).
+Uses MongoDB for all storage: metadata in collections, the FAISS index binary in GridFS.
+Search memory-maps a local copy of the index and keeps it loaded per process.
 """
 
+import contextlib
 import faiss
+import gridfs
 import numpy as np
-import hashlib
-import io
-from typing import List, Dict, Optional
-from datetime import datetime
-import logging
-import pandas as pd
+import os
+import orjson
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
+from datetime import datetime, timedelta
+import logging
+from pymongo import ASCENDING, ReplaceOne, ReturnDocument
 
-from app.embeddings.ollama_api_embedder import OllamaAPIEmbedder
-from app.embeddings.ollama_generator import OllamaGenerator
-from app.utils.text_splitter import simple_sentence_split
+from app.utils.csv_utils import iter_csv_batches
+from app.services.ingest_pipeline import PIPELINE_WORKERS, ChunkColumns, PersistQueue, ensure_chunk_key_index, prefetch_embeddings, records_from_frame
+from app.services import deps
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-
-def _id_to_int(sid: str) -> int:
-    """Convert string ID to int64 for FAISS"""
-    h = hashlib.sha256(sid.encode("utf-8")).hexdigest()
-    return int(h[:16], 16) % (2**63 - 1)
+# Supported index types: exhaustive fp16 scan, HNSW graph, or IVF with product-quantized codes
+FAISS_INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+IVFPQ_NLIST = 256
+IVFPQ_NBITS = 8
+IVFPQ_NPROBE = 16
+# ivfpq indexes at or above this dimension PCA-project vectors to half the dimension first
+IVFPQ_PCA_MIN_DIMENSION = 512
+
+# Read-only, memory-mapped indexes used by search, keyed by index_name -> (index_file_id, index)
+_INDEX_CACHE: Dict[str, tuple] = {}
+_INDEX_CACHE_LOCK = threading.Lock()
+
+# Mutable indexes kept between ingests, keyed by index_name -> (index_file_id, index, payloads),
+# least recently ingested first; only the HOT_INDEX_LIMIT most recent ones stay in memory
+_HOT_INDEXES: Dict[str, tuple] = {}
+HOT_INDEX_LIMIT = 2
+# One ingest at a time per index in this process; across processes the ingest also holds a lease
+# on the index document, renewed every embedded batch and expiring INGEST_LEASE_SECONDS after that
+_INGEST_LOCKS: Dict[str, threading.Lock] = {}
+INGEST_LEASE_SECONDS = 300
+
+# Hit payloads for search keyed by index_name -> (payload_file_id, {faiss_int_id: payload})
+_PAYLOAD_CACHE: Dict[str, tuple] = {}
+_PAYLOAD_FIELDS = ("chunk_id", "doc_id", "title", "category", "text_snippet", "content_hash")
+
+# Search-side index metadata keyed by index_name -> (read_at, meta). Entries are re-read after
+# INDEX_META_TTL seconds, so ingests by other worker processes are picked up, and dropped on ingest here
+_INDEX_META: Dict[str, tuple] = {}
+INDEX_META_TTL = 5.0
+# GridFS files replaced by a snapshot are kept this many seconds before they are deleted, well past
+# INDEX_META_TTL, so searches still on the previous version can finish loading it
+RETIRED_FILE_TTL = 300.0
+_INDEX_META_FIELDS = {
+    "index_name": 1, "dimension": 1, "index_type": 1, "num_vectors": 1, "index_file_id": 1, "payload_file_id": 1
+}
+
+
+def _normalize_inplace(x: np.ndarray) -> np.ndarray:
+    """L2-normalize the rows of a float32 matrix in place; zero rows are left as they are"""
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    np.divide(x, norms, out=x, where=norms > 0)
+    return x
+
+
+def _reserve_int_ids(faiss_indices, index_name: str, count: int) -> np.ndarray:
+    """Reserve the next count sequential int64 FAISS ids from the per-index counter"""
+    doc = faiss_indices.find_one_and_update(
+        {"index_name": index_name},
+        {"$inc": {"next_id": count}},
+        projection={"next_id": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    start = doc.get("next_id", 0)
+    return np.arange(start, start + count, dtype="int64")
 
 
 def _serialize_faiss_index(index) -> bytes:
     """Serialize FAISS index to bytes for MongoDB storage"""
-    # Write index to in-memory buffer
-    buffer = io.BytesIO()
-    faiss.write_index(index, faiss.BufferedIOWriter(faiss.PyCallbackIOWriter(buffer.write)))
-    return buffer.getvalue()
+    return faiss.serialize_index(index).tobytes()
 
 
 def _deserialize_faiss_index(index_bytes: bytes):
     """Deserialize FAISS index from bytes stored in MongoDB"""
-    buffer = io.BytesIO(index_bytes)
-    reader = faiss.BufferedIOReader(faiss.PyCallbackIOReader(buffer.read))
-    return faiss.read_index(reader)
+    return faiss.deserialize_index(np.frombuffer(index_bytes, dtype=np.uint8))
+
+
+def _ensure_chunk_indexes(faiss_chunks):
+    """Indexes backing the metadata upserts and the faiss_int_id lookups at search time"""
+    faiss_chunks.create_index([("chunk_id", ASCENDING)], unique=True)
+    faiss_chunks.create_index([("index_name", ASCENDING), ("faiss_int_id", ASCENDING)])
+    ensure_chunk_key_index(faiss_chunks, "index_name")
+
+
+def _index_files(mongo_client) -> gridfs.GridFS:
+    return gridfs.GridFS(mongo_client.db, collection="faiss_files")
+
+
+def _save_faiss_index(mongo_client, index_name: str, index):
+    """
+    Write the index binary to GridFS and return the new file id.
+    The index is written to a local file and streamed from there (no in-memory copy of
+    the binary); the file is kept as the local copy search memory-maps.
+    """
+    os.makedirs(settings.FAISS_INDEX_DIR, exist_ok=True)
+    tmp_path = os.path.join(settings.FAISS_INDEX_DIR, f"{uuid.uuid4().hex}.tmp")
+    try:
+        faiss.write_index(index, tmp_path)
+        with open(tmp_path, "rb") as f:
+            file_id = _index_files(mongo_client).put(f, filename=index_name)
+        os.replace(tmp_path, os.path.join(settings.FAISS_INDEX_DIR, f"{file_id}.faiss"))
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+    return file_id
+
+
+def _load_faiss_index(mongo_client, index_doc):
+    """Load a mutable copy of the stored index (used by ingestion)"""
+    if "index_file_id" in index_doc:
+        return _deserialize_faiss_index(_index_files(mongo_client).get(index_doc["index_file_id"]).read())
+    # indexes created before GridFS storage keep the binary inline
+    return _deserialize_faiss_index(index_doc["index_data"])
+
+
+def _save_payloads(mongo_client, index_name: str, payloads: Dict[int, Dict]):
+    """Write the hit payloads to GridFS as JSON and return the new file id"""
+    return _index_files(mongo_client).put(
+        orjson.dumps(payloads, option=orjson.OPT_NON_STR_KEYS), filename=f"{index_name}.payloads"
+    )
+
+
+def _load_payloads(mongo_client, index_doc) -> Dict[int, Dict]:
+    """
+    Load the stored hit payloads of an index.
+    Indexes created before payloads were stored, or whose payload file is not JSON (older
+    pickled files, which are never unpickled), are rebuilt from faiss_chunks.
+    """
+    if "payload_file_id" in index_doc:
+        data = _index_files(mongo_client).get(index_doc["payload_file_id"]).read()
+        try:
+            return {int(int_id): payload for int_id, payload in orjson.loads(data).items()}
+        except orjson.JSONDecodeError:
+            logger.warning(f"Payload file of FAISS index {index_doc['index_name']} is not JSON, rebuilding it from faiss_chunks")
+    return {
+        d["faiss_int_id"]: {f: d.get(f) for f in _PAYLOAD_FIELDS}
+        for d in mongo_client.db["faiss_chunks"].find(
+            {"index_name": index_doc["index_name"]},
+            projection={**{f: 1 for f in _PAYLOAD_FIELDS}, "faiss_int_id": 1}
+        )
+    }
+
 
+def _local_index_path(mongo_client, file_id) -> str:
+    """Local copy of a GridFS index file, downloaded once so it can be memory-mapped"""
+    path = os.path.join(settings.FAISS_INDEX_DIR, f"{file_id}.faiss")
+    if not os.path.exists(path):
+        os.makedirs(settings.FAISS_INDEX_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_index_files(mongo_client).get(file_id).read())
+        os.replace(tmp_path, path)
+    return path
 
-def create_faiss_index(index_name: str, dimension: int, mongo_client) -> Dict:
+
+def _get_search_index(mongo_client, index_doc):
+    """
+    Read-only index for search, loaded once per stored version.
+    A new index_file_id (written by an ingest in any process) replaces the cached entry.
+    """
+    index_name = index_doc["index_name"]
+    file_id = index_doc.get("index_file_id")
+    cached = _INDEX_CACHE.get(index_name)
+    if cached is not None and file_id is not None and cached[0] == file_id:
+        return cached[1]
+
+    with _INDEX_CACHE_LOCK:
+        cached = _INDEX_CACHE.get(index_name)
+        if cached is not None and file_id is not None and cached[0] == file_id:
+            return cached[1]
+        if file_id is None:
+            faiss_index = _deserialize_faiss_index(index_doc["index_data"])
+        else:
+            path = _local_index_path(mongo_client, file_id)
+            faiss_index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        _set_search_params(faiss_index, index_doc.get("index_type", "flat"))
+        if file_id is not None:
+            _INDEX_CACHE[index_name] = (file_id, faiss_index)
+            if cached is not None:
+                # the replaced version stays readable by this mapping until it is released
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(settings.FAISS_INDEX_DIR, f"{cached[0]}.faiss"))
+        logger.info(f"Loaded FAISS index for search: {index_name}")
+        return faiss_index
+
+
+def _get_search_payloads(mongo_client, index_doc) -> Optional[Dict[int, Dict]]:
+    """
+    Hit payloads for search, loaded once per stored version.
+    Returns None for indexes without stored payloads; search then reads faiss_chunks.
+    """
+    index_name = index_doc["index_name"]
+    file_id = index_doc.get("payload_file_id")
+    if file_id is None:
+        return None
+    cached = _PAYLOAD_CACHE.get(index_name)
+    if cached is not None and cached[0] == file_id:
+        return cached[1]
+
+    with _INDEX_CACHE_LOCK:
+        cached = _PAYLOAD_CACHE.get(index_name)
+        if cached is not None and cached[0] == file_id:
+            return cached[1]
+        payloads = _load_payloads(mongo_client, index_doc)
+        _PAYLOAD_CACHE[index_name] = (file_id, payloads)
+        return payloads
+
+
+def _get_index_meta(faiss_indices, index_name: str) -> Dict:
+    """
+    Metadata needed to search index_name, so most queries skip the MongoDB round trip.
+    Cached entries are re-read after INDEX_META_TTL seconds, which bounds how long a
+    worker keeps searching a version replaced by an ingest in another process.
+    Legacy docs with an inline binary are returned in full and not cached.
+    """
+    now = time.monotonic()
+    cached = _INDEX_META.get(index_name)
+    if cached is not None and now - cached[0] < INDEX_META_TTL:
+        return cached[1]
+    meta = faiss_indices.find_one({"index_name": index_name}, _INDEX_META_FIELDS)
+    if not meta:
+        _INDEX_META.pop(index_name, None)
+        raise ValueError(f"FAISS index '{index_name}' not found")
+    if "index_file_id" not in meta:
+        return faiss_indices.find_one({"index_name": index_name})
+    _INDEX_META[index_name] = (now, meta)
+    return meta
+
+
+def _ingest_lock(index_name: str) -> threading.Lock:
+    with _INDEX_CACHE_LOCK:
+        return _INGEST_LOCKS.setdefault(index_name, threading.Lock())
+
+
+@contextlib.contextmanager
+def _ingest_lease(faiss_indices, index_name: str):
+    """
+    Hold the ingest lease of index_name for the block, failing fast if an ingest in another
+    process holds it. Yields a callable that extends the lease and raises once it was lost.
+    """
+    owner = uuid.uuid4().hex
+    now = datetime.utcnow()
+    acquired = faiss_indices.find_one_and_update(
+        {"index_name": index_name, "$or": [{"ingest_lease": None}, {"ingest_lease.expires_at": {"$lt": now}}]},
+        {"$set": {"ingest_lease": {"owner": owner, "expires_at": now + timedelta(seconds=INGEST_LEASE_SECONDS)}}},
+        projection={"_id": 1}
+    )
+    if acquired is None:
+        if faiss_indices.count_documents({"index_name": index_name}, limit=1) == 0:
+            raise ValueError(f"FAISS index '{index_name}' not found")
+        raise ValueError(f"FAISS index '{index_name}' is being ingested by another worker")
+
+    def renew():
+        expires_at = datetime.utcnow() + timedelta(seconds=INGEST_LEASE_SECONDS)
+        renewed = faiss_indices.update_one(
+            {"index_name": index_name, "ingest_lease.owner": owner},
+            {"$set": {"ingest_lease.expires_at": expires_at}}
+        )
+        if renewed.matched_count == 0:
+            raise ValueError(f"Ingest into FAISS index '{index_name}' lost its lease to another worker")
+
+    try:
+        yield renew
+    finally:
+        faiss_indices.update_one(
+            {"index_name": index_name, "ingest_lease.owner": owner}, {"$unset": {"ingest_lease": ""}}
+        )
+
+
+def _snapshot(mongo_client, index_name: str, faiss_index, payloads: Dict[int, Dict], stored: Dict) -> Dict:
+    """
+    Save the index and payloads to GridFS and point the metadata at them. stored holds the
+    current index_file_id / payload_file_id; they are retired rather than deleted, since
+    searches in other workers may still be loading them, and files retired more than
+    RETIRED_FILE_TTL seconds ago are deleted. The new file ids are returned.
+    """
+    files = {
+        "index_file_id": _save_faiss_index(mongo_client, index_name, faiss_index),
+        "payload_file_id": _save_payloads(mongo_client, index_name, payloads)
+    }
+    now = datetime.utcnow()
+    retired = [{"file_id": file_id, "retired_at": now} for file_id in stored.values() if file_id is not None]
+    faiss_indices = mongo_client.db["faiss_indices"]
+    index_doc = faiss_indices.find_one_and_update(
+        {"index_name": index_name},
+        {
+            "$set": {**files, "num_vectors": faiss_index.ntotal, "updated_at": now},
+            "$unset": {"index_data": ""},
+            "$push": {"retired_files": {"$each": retired}}
+        },
+        projection={"retired_files": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    cutoff = now - timedelta(seconds=RETIRED_FILE_TTL)
+    expired = [r["file_id"] for r in (index_doc or {}).get("retired_files", []) if r["retired_at"] <= cutoff]
+    for file_id in expired:
+        _index_files(mongo_client).delete(file_id)
+        # open mappings of a replaced version stay readable until they are released
+        with contextlib.suppress(OSError):
+            os.remove(os.path.join(settings.FAISS_INDEX_DIR, f"{file_id}.faiss"))
+    if expired:
+        faiss_indices.update_one(
+            {"index_name": index_name}, {"$pull": {"retired_files": {"file_id": {"$in": expired}}}}
+        )
+    invalidate_search_index(index_name)
+    return files
+
+
+def invalidate_search_index(index_name: str):
+    """Drop the cached search index, payloads and metadata for index_name"""
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE.pop(index_name, None)
+        _PAYLOAD_CACHE.pop(index_name, None)
+        _INDEX_META.pop(index_name, None)
+
+
+def _build_faiss_index(dimension: int, index_type: str, nlist: int):
+    """Build an empty inner-product FAISS index of the given type, wrapped in an IndexIDMap"""
+    if index_type == "flat":
+        # exhaustive scan; vectors are stored as fp16 (half the bytes scanned per search)
+        base = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif index_type == "hnsw":
+        base = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        base.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        base.hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type == "ivfpq":
+        # codes of d // 4 sub-vectors; needs training before vectors can be added
+        d = dimension // 2 if dimension >= IVFPQ_PCA_MIN_DIMENSION else dimension
+        if d % 4:
+            raise ValueError(f"ivfpq needs a dimension divisible by {4 if d == dimension else 8}, got {dimension}")
+        quantizer = faiss.IndexFlatIP(d)
+        base = faiss.IndexIVFPQ(quantizer, d, nlist, d // 4, IVFPQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+        if d != dimension:
+            # PCA with a random rotation, trained with the IVF-PQ and stored in the same index bytes;
+            # queries are projected too, halving the IVF-PQ work per query
+            base = faiss.IndexPreTransform(faiss.PCAMatrix(dimension, d, 0, True), base)
+    else:
+        raise ValueError(f"Unknown FAISS index type '{index_type}', expected one of {', '.join(FAISS_INDEX_TYPES)}")
+    return faiss.IndexIDMap(base)
+
+
+def _training_size(faiss_index) -> int:
+    """Number of vectors to buffer before an untrained (IVF-PQ) index can be trained"""
+    ivf = faiss.extract_index_ivf(faiss_index)
+    size = max(ivf.nlist, 2 ** IVFPQ_NBITS)
+    if isinstance(faiss.downcast_index(faiss_index.index), faiss.IndexPreTransform):
+        # the PCA needs at least as many vectors as input dimensions
+        size = max(size, faiss_index.d)
+    return size
+
+
+def _set_search_params(faiss_index, index_type: str):
+    """Apply query-time parameters, which not every index type persists"""
+    if index_type == "hnsw":
+        faiss.downcast_index(faiss_index.index).hnsw.efSearch = HNSW_EF_SEARCH
+    elif index_type == "ivfpq":
+        faiss.extract_index_ivf(faiss_index).nprobe = IVFPQ_NPROBE
+
+
+def create_faiss_index(
+    index_name: str,
+    dimension: int,
+    mongo_client,
+    index_type: str = "flat",
+    nlist: int = IVFPQ_NLIST
+) -> Dict:
     """
     Create a new FAISS index and store it in MongoDB.
 
@@ -50,6 +391,8 @@ def create_faiss_index(index_name: str, dimension: int, mongo_client) -> Dict:
         index_name: Name of the index
         dimension: Embedding dimension
         mongo_client: MongoDB client wrapper
+        index_type: One of "flat", "hnsw" or "ivfpq"
+        nlist: Number of IVF cells (ivfpq only)
 
     Returns:
         Dictionary with creation status
@@ -62,24 +405,77 @@ def create_faiss_index(index_name: str, dimension: int, mongo_client) -> Dict:
         raise ValueError(f"FAISS index '{index_name}' already exists")
 
     # Create empty FAISS index
-    index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+    index = _build_faiss_index(dimension, index_type, nlist)
 
-    # Serialize index to bytes
-    index_bytes = _serialize_faiss_index(index)
-
-    # Store in MongoDB
+    # Store the binary in GridFS and metadata in MongoDB
     index_doc = {
         "index_name": index_name,
         "dimension": dimension,
+        "index_type": index_type,
+        "next_id": 0,  # next sequential FAISS int id
         "num_vectors": 0,
-        "index_data": index_bytes,  # Store binary FAISS index
+        "index_file_id": _save_faiss_index(mongo_client, index_name, index),
+        "payload_file_id": _save_payloads(mongo_client, index_name, {}),
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
     faiss_indices.insert_one(index_doc)
+    _ensure_chunk_indexes(mongo_client.db["faiss_chunks"])
 
     logger.info(f"Created FAISS index in MongoDB: {index_name} with dimension {dimension}")
-    return {"ok": True, "index": index_name, "dimension": dimension}
+    return {"ok": True, "index": index_name, "dimension": dimension, "index_type": index_type}
+
+
+def _chunk_ops(batch: ChunkColumns, int_ids: np.ndarray, index_name: str) -> List[ReplaceOne]:
+    """
+    Upserts for the metadata of one batch of chunks, keyed by doc id and content hash so
+    a chunk left behind by an ingest that never saved its index is overwritten.
+    """
+    created_at = datetime.utcnow()
+    return [
+        ReplaceOne(
+            {"index_name": index_name, "doc_id": doc_id, "content_hash": h},
+            {
+                "chunk_id": chunk_id,
+                "faiss_int_id": int(int_id),
+                "index_name": index_name,
+                "doc_id": doc_id,
+                "title": title,
+                "category": category,
+                "text_snippet": text[:400],
+                "content_hash": h,
+                "created_at": created_at
+            },
+            upsert=True
+        )
+        for chunk_id, int_id, doc_id, title, category, text, h in zip(
+            batch.chunk_ids, int_ids, batch.doc_ids, batch.titles, batch.categories, batch.texts, batch.content_hashes
+        )
+    ]
+
+
+def _chunk_payloads(batch: ChunkColumns, int_ids: np.ndarray) -> Dict[int, Dict]:
+    """Search hit payloads of one batch of chunks, keyed by faiss_int_id"""
+    return {
+        int(int_id): {
+            "chunk_id": chunk_id,
+            "doc_id": doc_id,
+            "title": title,
+            "category": category,
+            "text_snippet": text[:400],
+            "content_hash": h
+        }
+        for chunk_id, int_id, doc_id, title, category, text, h in zip(
+            batch.chunk_ids, int_ids, batch.doc_ids, batch.titles, batch.categories, batch.texts, batch.content_hashes
+        )
+    }
+
+
+def _train_and_add(faiss_index, vecs: List[np.ndarray], ids: List[np.ndarray]):
+    """Train faiss_index on the buffered vectors, then add them"""
+    embeddings = np.concatenate(vecs)
+    faiss_index.train(embeddings)
+    faiss_index.add_with_ids(embeddings, np.concatenate(ids))
 
 
 def ingest_csv_to_faiss(
@@ -89,11 +485,22 @@ def ingest_csv_to_faiss(
     doc_id_col: str = "id",
     title_col: str = "title",
     category_col: str = "category",
-    text_col: str = "text"
+    text_col: str = "text",
+    read_batch_size: int = settings.BATCH_SIZE,
+    start_row: int = 0,
+    on_batch: Optional[Callable[[int], None]] = None
 ):
     """
     Ingest CSV data into FAISS index.
     Stores vectors in FAISS file and metadata in MongoDB.
+    The CSV is streamed in batches of read_batch_size rows.
+    Vectors only become durable when the index is saved back to MongoDB, which
+    happens every FAISS_SNAPSHOT_EVERY CSV batches and at the end; on_batch is
+    called after each save. The mutable index stays in memory for the next ingest
+    (for the HOT_INDEX_LIMIT most recently ingested indexes). Concurrent ingests into
+    the same index from another worker process are rejected while this one holds the lease.
+    An untrained ivfpq index buffers vectors until it has enough to train on.
+    Chunks the index already holds for the same document and text are skipped.
     
     Args:
         csv_path: Path to CSV file
@@ -103,105 +510,117 @@ def ingest_csv_to_faiss(
         title_col: Column name for title
         category_col: Column name for category
         text_col: Column name for text content
+        read_batch_size: Number of CSV rows read per batch
+        start_row: Number of leading CSV rows to skip (resume point)
+        on_batch: Called with the number of CSV rows done once they are durable
     """
     faiss_indices = mongo_client.db["faiss_indices"]
     faiss_chunks = mongo_client.db["faiss_chunks"]
 
-    # Get index from MongoDB
-    index_doc = faiss_indices.find_one({"index_name": index_name})
-    if not index_doc:
-        raise ValueError(f"FAISS index '{index_name}' not found")
-
-    # Deserialize FAISS index from MongoDB
-    index_bytes = index_doc["index_data"]
-    faiss_index = _deserialize_faiss_index(index_bytes)
-    logger.info(f"Loaded FAISS index from MongoDB: {index_name}")
-
-    # Initialize embedder
-    embedder = OllamaAPIEmbedder()
-    
-    # Read CSV and prepare chunks
-    df = pd.read_csv(csv_path)
-    records = []
-    
-    for _, row in df.iterrows():
-        doc_id = str(row.get(doc_id_col) or uuid.uuid4())
-        title = row.get(title_col, "")
-        category = row.get(category_col, "")
-        text_value = row.get(text_col, "")
-        
-        # Handle pandas NA/NaN values
-        if pd.isna(text_value):
-            continue
-        text = str(text_value or "")
-        if not text or len(text.strip()) == 0 or text.lower() == 'nan':
-            continue
-        
-        # Split into chunks
-        chunks = simple_sentence_split(text, max_words=settings.CHUNK_MAX_WORDS, overlap=settings.CHUNK_OVERLAP)
-        for chunk_text in chunks:
-            chunk_id = str(uuid.uuid4())
-            records.append({
-                "chunk_id": chunk_id,
-                "doc_id": doc_id,
-                "title": title,
-                "category": category,
-                "text": chunk_text,
-                "text_snippet": chunk_text[:400]
-            })
-    
-    logger.info(f"Prepared {len(records)} chunks for FAISS indexing into {index_name}")
-    
-    # Batch process embeddings and add to FAISS
-    batch_size = settings.BATCH_SIZE
-    total_added = 0
-    
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i+batch_size]
-        texts = [r["text"] for r in batch]
-        
-        # Get embeddings
-        embeddings = embedder.embed_batch(texts)  # returns (n, dim) numpy array
-        
-        # Normalize for cosine similarity
-        faiss.normalize_L2(embeddings)
-        
-        # Convert chunk_ids to int64 for FAISS
-        chunk_ids = [r["chunk_id"] for r in batch]
-        int_ids = np.array([_id_to_int(cid) for cid in chunk_ids], dtype='int64')
-        
-        # Add to FAISS index
-        faiss_index.add_with_ids(embeddings, int_ids)
-        
-        # Store metadata in MongoDB
-        for j, record in enumerate(batch):
-            chunk_doc = {
-                "chunk_id": record["chunk_id"],
-                "faiss_int_id": int(int_ids[j]),
-                "index_name": index_name,
-                "doc_id": record["doc_id"],
-                "title": record["title"],
-                "category": record["category"],
-                "text_snippet": record["text_snippet"],
-                "created_at": datetime.utcnow()
-            }
-            faiss_chunks.replace_one({"chunk_id": record["chunk_id"]}, chunk_doc, upsert=True)
-        
-        total_added += len(batch)
-        logger.info(f"Indexed batch {i//batch_size + 1}/{(len(records)-1)//batch_size + 1}")
-
-    # Serialize and save updated FAISS index to MongoDB
-    index_bytes = _serialize_faiss_index(faiss_index)
-
-    # Update index in MongoDB
-    faiss_indices.update_one(
-        {"index_name": index_name},
-        {"$set": {
-            "index_data": index_bytes,
-            "num_vectors": faiss_index.ntotal,
-            "updated_at": datetime.utcnow()
-        }}
-    )
+    with _ingest_lock(index_name), _ingest_lease(faiss_indices, index_name) as renew_lease:
+        # Get index from MongoDB
+        index_doc = faiss_indices.find_one({"index_name": index_name}, {"index_data": 0})
+        if not index_doc:
+            raise ValueError(f"FAISS index '{index_name}' not found")
+        stored = {key: index_doc.get(key) for key in ("index_file_id", "payload_file_id")}
+
+        # Reuse the index kept by the previous ingest if it is still the stored version,
+        # otherwise load a mutable copy. It is taken out of the cache until this ingest
+        # succeeds, so a failed run never leaves unsaved vectors behind for the next one.
+        with _INDEX_CACHE_LOCK:
+            hot = _HOT_INDEXES.pop(index_name, None)
+        if hot is not None and stored["index_file_id"] is not None and hot[0] == stored["index_file_id"]:
+            faiss_index, payloads = hot[1], hot[2]
+        else:
+            if stored["index_file_id"] is None:
+                index_doc = faiss_indices.find_one({"index_name": index_name})
+            faiss_index = _load_faiss_index(mongo_client, index_doc)
+            payloads = _load_payloads(mongo_client, index_doc)
+            logger.info(f"Loaded FAISS index from MongoDB: {index_name}")
+        # chunks (doc id and text) already in the saved index are skipped instead of being added again
+        indexed_keys = {(p["doc_id"], p["content_hash"]) for p in payloads.values() if p.get("content_hash")}
+        _ensure_chunk_indexes(faiss_chunks)
+
+        # Initialize embedder
+        embedder = deps.embedder(mongo_client)
+
+        # Batch process embeddings and add to FAISS
+        batch_size = settings.BATCH_SIZE
+        total_added = 0
+        unsaved = 0
+        rows_done = start_row
+        pending_vecs, pending_ids = [], []
+
+        # Read CSV in batches and prepare chunks; the next batch is embedded and the
+        # previous one persisted while the current one is added to the index
+        with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as executor:
+            writes = PersistQueue(executor)
+            csv_batches = iter_csv_batches(csv_path, read_batch_size, start_row, doc_id_col, columns=(doc_id_col, title_col, category_col, text_col))
+            for n_read, df in enumerate(csv_batches, 1):
+                renew_lease()
+                rows_done += len(df)
+                records = records_from_frame(df, doc_id_col, title_col, category_col, text_col)
+                prepared = len(records)
+                records = records.drop_known(indexed_keys)
+                logger.info(
+                    f"Prepared {len(records)} chunks for FAISS indexing into {index_name} "
+                    f"({prepared - len(records)} already indexed)"
+                )
+
+                for batch, embeddings in prefetch_embeddings(executor, embedder.embed_batch, records.batches(batch_size)):
+                    renew_lease()
+                    # Normalize for cosine similarity
+                    _normalize_inplace(embeddings)
+
+                    # Sequential int64 ids for FAISS; search maps them back via faiss_int_id
+                    int_ids = _reserve_int_ids(faiss_indices, index_name, len(batch))
+
+                    # Add to FAISS index (this thread only), training it first on the buffered vectors if needed
+                    if faiss_index.is_trained:
+                        faiss_index.add_with_ids(embeddings, int_ids)
+                    else:
+                        pending_vecs.append(embeddings)
+                        pending_ids.append(int_ids)
+                        if sum(len(v) for v in pending_vecs) >= _training_size(faiss_index):
+                            _train_and_add(faiss_index, pending_vecs, pending_ids)
+                            pending_vecs, pending_ids = [], []
+
+                    # Keep hit payloads with the index; store metadata in MongoDB (one round trip per batch)
+                    payloads.update(_chunk_payloads(batch, int_ids))
+                    writes.submit(faiss_chunks.bulk_write, _chunk_ops(batch, int_ids, index_name), ordered=False)
+
+                    total_added += len(batch)
+                    unsaved += len(batch)
+                    logger.info(f"Indexed {total_added} chunks into {index_name}")
+
+                # Periodic snapshot, so a long ingest can resume from here; skipped while
+                # vectors are still buffered for training
+                if settings.FAISS_SNAPSHOT_EVERY and n_read % settings.FAISS_SNAPSHOT_EVERY == 0 and not pending_vecs:
+                    writes.drain()
+                    if unsaved:
+                        stored = _snapshot(mongo_client, index_name, faiss_index, payloads, stored)
+                        unsaved = 0
+                    if on_batch:
+                        on_batch(rows_done)
+
+            writes.drain()
+
+        if pending_vecs:
+            raise ValueError(
+                f"FAISS index '{index_name}' needs at least {_training_size(faiss_index)} chunks to train, "
+                f"got {sum(len(v) for v in pending_vecs)}"
+            )
+
+        # Save updated FAISS index and payloads to GridFS and point the metadata at them;
+        # indexes still stored inline are moved to GridFS even when nothing was added
+        if unsaved or stored["index_file_id"] is None:
+            stored = _snapshot(mongo_client, index_name, faiss_index, payloads, stored)
+        with _INDEX_CACHE_LOCK:
+            _HOT_INDEXES[index_name] = (stored["index_file_id"], faiss_index, payloads)
+            while len(_HOT_INDEXES) > HOT_INDEX_LIMIT:
+                _HOT_INDEXES.pop(next(iter(_HOT_INDEXES)))
+        if on_batch:
+            on_batch(rows_done)
 
     logger.info(f"Successfully ingested {total_added} chunks into FAISS index {index_name}")
 
@@ -226,42 +645,47 @@ def search_faiss_index(
     Returns:
         Dictionary with answer and contexts
     """
-    faiss_indices = mongo_client.db["faiss_indices"]
-    faiss_chunks = mongo_client.db["faiss_chunks"]
-
-    # Get index from MongoDB
-    index_doc = faiss_indices.find_one({"index_name": index_name})
-    if not index_doc:
-        raise ValueError(f"FAISS index '{index_name}' not found")
-
-    # Deserialize FAISS index from MongoDB
-    index_bytes = index_doc["index_data"]
-    faiss_index = _deserialize_faiss_index(index_bytes)
-    logger.info(f"Loaded FAISS index from MongoDB: {index_name}")
+    # Index metadata, index and payloads are cached per process and refreshed after each ingest
+    index_doc = _get_index_meta(mongo_client.db["faiss_indices"], index_name)
+    faiss_index = _get_search_index(mongo_client, index_doc)
+    payloads = _get_search_payloads(mongo_client, index_doc)
 
     # Get query embedding
-    embedder = OllamaAPIEmbedder()
+    embedder = deps.embedder(mongo_client)
     q_vec = embedder.embed(query)
 
     # Normalize and search
-    q = np.array(q_vec, dtype='float32').reshape(1, -1)
-    faiss.normalize_L2(q)
+    q = np.ascontiguousarray(q_vec, dtype=np.float32).reshape(1, -1)
+    if q.shape[1] != faiss_index.d:
+        raise ValueError(
+            f"Query embedding has dimension {q.shape[1]}, FAISS index '{index_name}' expects {faiss_index.d}"
+        )
+    _normalize_inplace(q)
 
     # Search more than top_k if filtering by category
     search_k = top_k * 10 if filter_category else top_k
     D, I = faiss_index.search(q, min(search_k, faiss_index.ntotal))
 
-    # Build results
+    # Hit metadata comes from the in-memory payloads; older indexes fetch it in one query
+    if payloads is not None:
+        docs = payloads
+    else:
+        ids = [int(i) for i in I[0] if i != -1]
+        docs = {
+            d["faiss_int_id"]: d
+            for d in mongo_client.db["faiss_chunks"].find(
+                {"index_name": index_name, "faiss_int_id": {"$in": ids}},
+                projection={**{f: 1 for f in _PAYLOAD_FIELDS}, "faiss_int_id": 1}
+            )
+        } if ids else {}
+
+    # Build results in score order
     hits = []
     for score, faiss_int_id in zip(D[0], I[0]):
         if faiss_int_id == -1:
             continue
 
-        # Find chunk metadata by faiss_int_id
-        chunk_doc = faiss_chunks.find_one({
-            "index_name": index_name,
-            "faiss_int_id": int(faiss_int_id)
-        })
+        chunk_doc = docs.get(int(faiss_int_id))
 
         if not chunk_doc:
             continue
@@ -293,7 +717,7 @@ def search_faiss_index(
         }
 
     # Generate answer using OllamaGenerator
-    generator = OllamaGenerator()
+    generator = deps.generator()
     answer = generator.generate(query, hits)
 
     return {
@@ -0,0 +1,126 @@
+"""
+Durable ingestion jobs.
+Job state and row checkpoints live in the MongoDB `runs` collection so an
+interrupted ingestion can be inspected and resumed from its last flushed batch.
+"""
+
+from typing import Callable, Dict, Optional
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Only jobs that are no longer running may be resumed
+RESUMABLE_STATUSES = ("failed", "interrupted")
+# A running job refreshes updated_at this often; a queued or running job not updated for
+# JOB_STALE_SECONDS is taken to belong to a worker that died, and may be resumed as well
+JOB_HEARTBEAT_SECONDS = 30
+JOB_STALE_SECONDS = 300
+
+
+def create_job(mongo_client, backend: str, params: Dict) -> str:
+    """
+    Record a new ingestion job.
+
+    Args:
+        mongo_client: MongoDB client wrapper
+        backend: One of "opensearch", "faiss", "qdrant"
+        params: Keyword arguments for the backend ingest function
+
+    Returns:
+        The job id
+    """
+    job_id = str(uuid.uuid4())
+    mongo_client.runs.insert_one({
+        "job_id": job_id,
+        "type": "ingest",
+        "backend": backend,
+        "params": params,
+        "status": "queued",
+        "rows_done": 0,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow()
+    })
+    return job_id
+
+
+def get_job(mongo_client, job_id: str) -> Optional[Dict]:
+    return mongo_client.runs.find_one({"job_id": job_id, "type": "ingest"}, {"_id": 0})
+
+
+def _stale_before() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+
+
+def is_resumable(job: Dict) -> bool:
+    """Whether job failed, was interrupted, or was left queued or running by a worker that died"""
+    if job["status"] in RESUMABLE_STATUSES:
+        return True
+    return job["status"] in ("queued", "running") and job.get("updated_at") is not None and job["updated_at"] < _stale_before()
+
+
+def claim_job(mongo_client, job_id: str) -> Optional[Dict]:
+    """
+    Atomically move a resumable job (see is_resumable) back to queued, so only one caller resumes it.
+    Returns the claimed job, or None if the job is not in a resumable state.
+    """
+    return mongo_client.runs.find_one_and_update(
+        {
+            "job_id": job_id,
+            "type": "ingest",
+            "$or": [
+                {"status": {"$in": list(RESUMABLE_STATUSES)}},
+                {"status": {"$in": ["queued", "running"]}, "updated_at": {"$lt": _stale_before()}},
+            ]
+        },
+        {"$set": {"status": "queued", "updated_at": datetime.utcnow()}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def _update_job(mongo_client, job_id: str, fields: Dict):
+    fields["updated_at"] = datetime.utcnow()
+    mongo_client.runs.update_one({"job_id": job_id}, {"$set": fields})
+
+
+def run_job(mongo_client, job_id: str, ingest_fn: Callable, *args, **kwargs):
+    """
+    Run an ingest function as a job, resuming after the last checkpointed row.
+    The ingest function must accept `start_row` and an `on_batch(rows_done)` callback.
+    """
+    job = get_job(mongo_client, job_id)
+    if not job:
+        raise ValueError(f"Ingest job '{job_id}' not found")
+
+    start_row = job.get("rows_done", 0)
+    _update_job(mongo_client, job_id, {"status": "running", "error": None})
+
+    def checkpoint(rows_done: int):
+        _update_job(mongo_client, job_id, {"rows_done": rows_done})
+
+    # heartbeat between checkpoints, which can be far apart, so a live job never looks stale
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            mongo_client.runs.update_one(
+                {"job_id": job_id, "status": "running"}, {"$set": {"updated_at": datetime.utcnow()}}
+            )
+
+    threading.Thread(target=heartbeat, name=f"ingest-job-{job_id}", daemon=True).start()
+    try:
+        ingest_fn(*args, start_row=start_row, on_batch=checkpoint, **kwargs)
+    except Exception as e:
+        logger.exception(f"Ingest job {job_id} failed")
+        _update_job(mongo_client, job_id, {"status": "failed", "error": str(e)})
+        return
+    finally:
+        stop.set()
+
+    _update_job(mongo_client, job_id, {"status": "completed"})
+    logger.info(f"Ingest job {job_id} completed")
@@ -0,0 +1,189 @@
+"""
+Helpers for pipelining ingestion stages.
+Embedding the next batch and persisting the previous one run on a thread pool
+while the caller works on the current batch.
+"""
+
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from collections import deque
+import hashlib
+import numpy as np
+import pandas as pd
+from pymongo import ASCENDING
+import uuid
+from app.utils.text_splitter import simple_sentence_split
+from app.utils.csv_utils import iter_text_rows
+from app.core.config import settings
+
+# embed / persist workers per ingestion run
+PIPELINE_WORKERS = 4
+# batches embedded ahead of the one being indexed; with PersistQueue's 2 pending writes this fills PIPELINE_WORKERS
+EMBED_PREFETCH_DEPTH = 2
+
+
+def content_hash(text: str) -> str:
+    """First 128 bits of the SHA-256 of a chunk's text, hex encoded"""
+    return hashlib.sha256(text.encode("utf-8")).digest()[:16].hex()
+
+
+@dataclass(slots=True)
+class ChunkColumns:
+    """Chunk fields stored column-wise, one list per field, instead of one dict per chunk"""
+    chunk_ids: List[str] = field(default_factory=list)
+    doc_ids: List[str] = field(default_factory=list)
+    titles: List[Optional[str]] = field(default_factory=list)
+    categories: List[Optional[str]] = field(default_factory=list)
+    texts: List[str] = field(default_factory=list)
+    content_hashes: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "ChunkColumns":
+        """Build columns from record dicts; missing chunk ids get a fresh uuid4"""
+        columns = cls()
+        for r in records:
+            columns.append(r["doc_id"], r.get("title"), r.get("category"), r["text"], r.get("chunk_id"))
+        return columns
+
+    def append(self, doc_id: str, title: Optional[str], category: Optional[str], text: str, chunk_id: Optional[str] = None):
+        self.chunk_ids.append(chunk_id or str(uuid.uuid4()))
+        self.doc_ids.append(doc_id)
+        self.titles.append(title)
+        self.categories.append(category)
+        self.texts.append(text)
+        self.content_hashes.append(content_hash(text))
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def batches(self, size: int) -> Iterator["ChunkColumns"]:
+        """Consecutive column slices of at most size chunks"""
+        for i in range(0, len(self), size):
+            yield ChunkColumns(
+                self.chunk_ids[i:i+size],
+                self.doc_ids[i:i+size],
+                self.titles[i:i+size],
+                self.categories[i:i+size],
+                self.texts[i:i+size],
+                self.content_hashes[i:i+size],
+            )
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """(doc_id, content_hash) of each chunk; the same text in two documents is two chunks"""
+        return list(zip(self.doc_ids, self.content_hashes))
+
+    def drop_known(self, known: Set[Tuple[str, str]]) -> "ChunkColumns":
+        """
+        Chunks whose (doc_id, content_hash) is not in known, keeping the first of repeated
+        texts within a document. Kept keys are added to known, so later batches of the
+        same run skip them too. Equal texts of different documents are all kept (their
+        embedding is still computed once, through the embedding cache).
+        """
+        kept = ChunkColumns()
+        columns = (self.chunk_ids, self.doc_ids, self.titles, self.categories, self.texts, self.content_hashes)
+        for chunk_id, doc_id, title, category, text, h in zip(*columns):
+            key = (doc_id, h)
+            if key in known:
+                continue
+            known.add(key)
+            kept.chunk_ids.append(chunk_id)
+            kept.doc_ids.append(doc_id)
+            kept.titles.append(title)
+            kept.categories.append(category)
+            kept.texts.append(text)
+            kept.content_hashes.append(h)
+        return kept
+
+
+def records_from_frame(
+    df: pd.DataFrame,
+    doc_id_col: str,
+    title_col: str,
+    category_col: str,
+    text_col: str
+) -> ChunkColumns:
+    """Split the rows of one CSV batch into chunk columns"""
+    records = ChunkColumns()
+
+    for doc_id, title, category, text in iter_text_rows(df, doc_id_col, title_col, category_col, text_col):
+        # Split into chunks
+        chunks = simple_sentence_split(text, max_words=settings.CHUNK_MAX_WORDS, overlap=settings.CHUNK_OVERLAP)
+        for chunk_text in chunks:
+            records.append(doc_id, title, category, chunk_text)
+
+    return records
+
+
+def ensure_chunk_key_index(chunks_collection, scope_field: str):
+    """
+    Unique (scope_field, doc_id, content_hash) index backing the chunk metadata upserts.
+    Replaces the older index on (scope_field, content_hash) alone, which rejected the
+    same text stored for two documents.
+    """
+    legacy = f"{scope_field}_1_content_hash_1"
+    if legacy in chunks_collection.index_information():
+        chunks_collection.drop_index(legacy)
+    # chunks stored before content hashes existed have none
+    chunks_collection.create_index(
+        [(scope_field, ASCENDING), ("doc_id", ASCENDING), ("content_hash", ASCENDING)],
+        unique=True,
+        partialFilterExpression={"content_hash": {"$exists": True}}
+    )
+
+
+def stored_chunk_keys(chunks_collection, scope: Dict, keys: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    """The (doc_id, content_hash) keys that chunks_collection already holds for scope (e.g. {"index_name": ...}), in one query"""
+    if not keys:
+        return set()
+    wanted = set(keys)
+    query = {
+        **scope,
+        "doc_id": {"$in": list({doc_id for doc_id, _ in wanted})},
+        "content_hash": {"$in": list({h for _, h in wanted})},
+    }
+    found = (
+        (d.get("doc_id"), d["content_hash"])
+        for d in chunks_collection.find(query, {"doc_id": 1, "content_hash": 1, "_id": 0})
+    )
+    return {key for key in found if key in wanted}
+
+
+def prefetch_embeddings(
+    executor: Executor,
+    embed_fn: Callable[[List[str]], np.ndarray],
+    batches: Iterable[ChunkColumns],
+    depth: int = EMBED_PREFETCH_DEPTH
+) -> Iterator[Tuple[ChunkColumns, np.ndarray]]:
+    """
+    Yield (batch, embeddings) for each batch of chunks, in order, with up to depth
+    following batches already being embedded while the caller handles the current one.
+    """
+    pending: Deque[Tuple[ChunkColumns, Future]] = deque()
+    for batch in batches:
+        pending.append((batch, executor.submit(embed_fn, batch.texts)))
+        if len(pending) > depth:
+            done, future = pending.popleft()
+            yield done, future.result()
+    while pending:
+        done, future = pending.popleft()
+        yield done, future.result()
+
+
+class PersistQueue:
+    """Runs writes on an executor, keeping at most max_pending of them in flight"""
+
+    def __init__(self, executor: Executor, max_pending: int = 2):
+        self.executor = executor
+        self.max_pending = max_pending
+        self._futures: Deque[Future] = deque()
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        while len(self._futures) >= self.max_pending:
+            self._futures.popleft().result()
+        self._futures.append(self.executor.submit(fn, *args, **kwargs))
+
+    def drain(self):
+        """Wait for every submitted write, re-raising the first failure"""
+        while self._futures:
+            self._futures.popleft().result()
@@ -1,74 +1,156 @@
-from typing import List
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
 from app.embeddings.ollama_api_embedder import OllamaAPIEmbedder
-from app.utils.text_splitter import simple_sentence_split
+from app.utils.csv_utils import iter_csv_batches
+from app.services.ingest_pipeline import PIPELINE_WORKERS, ChunkColumns, prefetch_embeddings, records_from_frame
+from app.services import deps
 from app.core.config import settings
-from opensearchpy.helpers import bulk
-import pandas as pd
-import uuid
+from app.clients.opensearch_client import compact_vectors
+from opensearchpy.helpers import BulkIndexError, parallel_bulk
 import logging
+import threading
 from datetime import datetime
 from fastapi import Request
 
 logger = logging.getLogger(__name__)
 
-def _create_actions_from_records(index_name: str, records: List[dict], embedder: OllamaAPIEmbedder, batch_size: int = 64):
-    i = 0
-    while i < len(records):
-        batch = records[i:i+batch_size]
-        texts = [r["text"] for r in batch]
-        embs = embedder.embed_batch(texts)  # returns (n, dim)
-        for j, r in enumerate(batch):
-            emb = embs[j].tolist()
-            chunk_id = str(uuid.uuid4())
-            action = {
+# Index settings relaxed while a CSV is bulk loaded (fewer refreshes, translog fsync off the
+# request path) and restored afterwards
+BULK_LOAD_SETTINGS = {"index.refresh_interval": "30s", "index.translog.durability": "async"}
+# Per index being bulk loaded: [running loads, settings to restore after the last one]
+_BULK_LOADS: Dict[str, list] = {}
+_BULK_LOADS_LOCK = threading.Lock()
+
+
+def _create_actions_from_records(index_name: str, records: ChunkColumns, embedder: OllamaAPIEmbedder, batch_size: int = 64, executor: Optional[Executor] = None):
+    """
+    Yield bulk index actions for records, embedding them batch_size at a time.
+    With an executor, the next batch is embedded while bulk() consumes the current one.
+    Embeddings stay numpy rows; the client's serializer writes them out, rounded to the
+    precision the fp16 index keeps anyway, which shortens bulk bodies and stored _source.
+    """
+    batches = records.batches(batch_size)
+    if executor is not None:
+        embedded = prefetch_embeddings(executor, embedder.embed_batch, batches)
+    else:
+        embedded = ((batch, embedder.embed_batch(batch.texts)) for batch in batches)
+    for batch, embs in embedded:  # embs is (n, dim)
+        embs = compact_vectors(embs)
+        # one timestamp per embedded batch, as in the FAISS and Qdrant ingests, formatted once
+        # here (as the stock serializer would) rather than by the serializer for every document
+        created_at = datetime.utcnow().isoformat()
+        yield from (
+            {
                 "_op_type": "index",
                 "_index": index_name,
                 "_id": chunk_id,
                 "_source": {
-                    "doc_id": r["doc_id"],
+                    "doc_id": doc_id,
                     "chunk_id": chunk_id,
-                    "title": r.get("title"),
-                    "category": r.get("category"),
-                    "text": r["text"],
-                    "text_snippet": r["text"][:400],
+                    "title": title,
+                    "category": category,
+                    "text": text,
+                    "text_snippet": text[:400],
                     "embedding": emb,
-                    "created_at": datetime.utcnow()
+                    "created_at": created_at
                 }
             }
-            yield action
-        i += batch_size
+            for chunk_id, doc_id, title, category, text, emb in zip(
+                batch.chunk_ids, batch.doc_ids, batch.titles, batch.categories, batch.texts, embs
+            )
+        )
+
+@contextmanager
+def _bulk_load_settings(client, index_name: str):
+    """
+    Apply BULK_LOAD_SETTINGS to index_name for the duration of the block, then put back the previous values.
+    Concurrent loads into one index share the relaxed settings: the first one saves the previous values
+    and the last one to finish restores them. Values that already match BULK_LOAD_SETTINGS (left by a
+    load in another process) are not saved; those settings are reset to the index defaults instead.
+    """
+    with _BULK_LOADS_LOCK:
+        load = _BULK_LOADS.get(index_name)
+        if load is not None:
+            load[0] += 1
+        else:
+            previous = None
+            try:
+                current = client.indices.get_settings(index=index_name, flat_settings=True)
+                stored = current.get(index_name, {}).get("settings", {})
+                # None resets a setting that was not set explicitly to its default
+                previous = {
+                    key: stored.get(key) if stored.get(key) != value else None
+                    for key, value in BULK_LOAD_SETTINGS.items()
+                }
+                client.indices.put_settings(index=index_name, body=BULK_LOAD_SETTINGS)
+            except Exception as e:
+                logger.warning("Could not relax settings of index %s for bulk load: %s", index_name, e)
+                previous = None
+            _BULK_LOADS[index_name] = [1, previous]
+    try:
+        yield
+    finally:
+        with _BULK_LOADS_LOCK:
+            load = _BULK_LOADS[index_name]
+            load[0] -= 1
+            if not load[0]:
+                del _BULK_LOADS[index_name]
+                previous = load[1]
+                if previous is not None:
+                    try:
+                        client.indices.put_settings(index=index_name, body=previous)
+                    except Exception as e:
+                        logger.warning("Could not restore settings of index %s after bulk load: %s", index_name, e)
 
-def ingest_csv_to_index(request: Request, csv_path: str, index_name: str, doc_id_col: str = "id", title_col: str = "title", category_col: str = "category", text_col: str = "text"):
+def ingest_csv_to_index(request: Request, csv_path: str, index_name: str, doc_id_col: str = "id", title_col: str = "title", category_col: str = "category", text_col: str = "text", read_batch_size: int = settings.BATCH_SIZE, start_row: int = 0, on_batch: Optional[Callable[[int], None]] = None):
     """
     Synchronous ingestion function (can be called in background task).
     Uses the OpenSearch client from request.app.state.opensearch_client.
+    The CSV is streamed read_batch_size rows at a time and bulk indexed per batch.
+    Rows before start_row are skipped; on_batch(rows_done) is called after each batch is flushed.
     """
     client = request.app.state.opensearch_client
-    embedder = OllamaAPIEmbedder()
-    df = pd.read_csv(csv_path)
-    records = []
-    for _, row in df.iterrows():
-        doc_id = str(row.get(doc_id_col) or uuid.uuid4())
-        title = row.get(title_col, "")
-        category = row.get(category_col, "")
-        text_value = row.get(text_col, "")
-        # Handle pandas NA/NaN values
-        if pd.isna(text_value):
-            continue
-        text = str(text_value or "")
-        if not text or len(text.strip()) == 0 or text.lower() == 'nan':
-            continue
-        chunks = simple_sentence_split(text, max_words=settings.CHUNK_MAX_WORDS, overlap=settings.CHUNK_OVERLAP)
-        for c in chunks:
-            records.append({"doc_id": doc_id, "title": title, "category": category, "text": c})
-    logger.info("Prepared %d chunk records for indexing into %s", len(records), index_name)
+    embedder = deps.embedder(request.app.state.mongo_client)
+    total_success = 0
+    rows_done = start_row
+    with _bulk_load_settings(client, index_name), ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as executor:
+        for df in iter_csv_batches(csv_path, read_batch_size, start_row, doc_id_col, columns=(doc_id_col, title_col, category_col, text_col)):
+            rows_done += len(df)
+            records = records_from_frame(df, doc_id_col, title_col, category_col, text_col)
+            if not records:
+                if on_batch:
+                    on_batch(rows_done)
+                continue
+            logger.info("Prepared %d chunk records for indexing into %s", len(records), index_name)
 
-    # bulk index
-    try:
-        success, errors = bulk(client, _create_actions_from_records(index_name, records, embedder, batch_size=settings.BATCH_SIZE))
-        logger.info("Bulk indexed %d items into index=%s", success, index_name)
-        if errors:
-            logger.warning("Some bulk errors occurred: %s", errors[:5])
-    except Exception as e:
-        logger.exception("Bulk indexing failed: %s", e)
-        raise
\ No newline at end of file
+            # bulk index, BULK_THREADS requests of up to BULK_CHUNK_SIZE documents in flight;
+            # failed documents are collected rather than raised mid-stream, and fail the batch
+            # once it is done, before its rows are checkpointed
+            try:
+                actions = _create_actions_from_records(index_name, records, embedder, batch_size=settings.BATCH_SIZE, executor=executor)
+                failed = 0
+                errors = []
+                for ok, item in parallel_bulk(
+                    client,
+                    actions,
+                    thread_count=settings.BULK_THREADS,
+                    chunk_size=settings.BULK_CHUNK_SIZE,
+                    queue_size=settings.BULK_THREADS,
+                    raise_on_error=False,
+                ):
+                    if ok:
+                        total_success += 1
+                    else:
+                        failed += 1
+                        if len(errors) < 5:
+                            errors.append(item)
+            except Exception as e:
+                logger.exception("Bulk indexing failed: %s", e)
+                raise
+            if failed:
+                logger.error("%d documents failed to index into %s, e.g. %s", failed, index_name, errors)
+                raise BulkIndexError(f"{failed} document(s) failed to index into {index_name}", errors)
+            if on_batch:
+                on_batch(rows_done)
+    logger.info("Bulk indexed %d items into index=%s", total_success, index_name)
@@ -4,21 +4,31 @@ Uses Qdrant for vector storage and MongoDB for metadata.
 """
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import VectorParams, Distance, PointStruct
-from typing import List, Dict, Optional
+from qdrant_client.http.models import (
+    VectorParams, Distance, Datatype,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType
+)
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 import logging
-import pandas as pd
-import uuid
+import numpy as np
+from pymongo import ASCENDING, ReplaceOne
 
-from app.embeddings.ollama_api_embedder import OllamaAPIEmbedder
-from app.embeddings.ollama_generator import OllamaGenerator
-from app.utils.text_splitter import simple_sentence_split
+from app.utils.csv_utils import iter_csv_batches
+from app.services.ingest_pipeline import PIPELINE_WORKERS, PersistQueue, ensure_chunk_key_index, prefetch_embeddings, records_from_frame, stored_chunk_keys
+from app.services import deps
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
+def _ensure_chunk_indexes(qdrant_chunks):
+    """Unique indexes backing the metadata upserts and the chunk key lookups"""
+    qdrant_chunks.create_index([("chunk_id", ASCENDING)], unique=True)
+    ensure_chunk_key_index(qdrant_chunks, "collection_name")
+
+
 def create_qdrant_collection(
     collection_name: str,
     dimension: int,
@@ -44,11 +54,18 @@ def create_qdrant_collection(
     if existing:
         raise ValueError(f"Qdrant collection '{collection_name}' already exists")
 
-    # Create collection in Qdrant
+    # Create collection in Qdrant (vectors stored as float16, searched through an in-RAM int8 copy)
     try:
         qdrant_client.recreate_collection(
             collection_name=collection_name,
-            vectors_config=VectorParams(size=dimension, distance=Distance.COSINE)
+            vectors_config=VectorParams(
+                size=dimension,
+                distance=Distance.COSINE,
+                datatype=Datatype.FLOAT16,
+                quantization_config=ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+                )
+            )
         )
     except Exception as e:
         logger.exception(f"Failed to create Qdrant collection: {e}")
@@ -63,11 +80,37 @@ def create_qdrant_collection(
         "updated_at": datetime.utcnow()
     }
     qdrant_collections.insert_one(collection_doc)
+    _ensure_chunk_indexes(mongo_client.db["qdrant_chunks"])
 
     logger.info(f"Created Qdrant collection: {collection_name} with dimension {dimension}")
     return {"ok": True, "collection": collection_name, "dimension": dimension}
 
 
+def _persist_batch(
+    qdrant_chunks,
+    ops: List[ReplaceOne],
+    qdrant_client: QdrantClient,
+    collection_name: str,
+    vectors: np.ndarray,
+    payloads: List[Dict],
+    ids: List[str]
+):
+    """
+    Upload one batch of points to Qdrant, then write its chunk metadata to MongoDB.
+    The metadata marks the chunks as stored, so it is only written once the points are.
+    """
+    # wait=True so the points are stored before the batch is checkpointed
+    qdrant_client.upload_collection(
+        collection_name=collection_name,
+        vectors=vectors,
+        payload=payloads,
+        ids=ids,
+        batch_size=len(ids),
+        wait=True
+    )
+    qdrant_chunks.bulk_write(ops, ordered=False)
+
+
 def ingest_csv_to_qdrant(
     csv_path: str,
     collection_name: str,
@@ -76,11 +119,16 @@ def ingest_csv_to_qdrant(
     doc_id_col: str = "id",
     title_col: str = "title",
     category_col: str = "category",
-    text_col: str = "text"
+    text_col: str = "text",
+    read_batch_size: int = settings.BATCH_SIZE,
+    start_row: int = 0,
+    on_batch: Optional[Callable[[int], None]] = None
 ):
     """
     Ingest CSV data into Qdrant collection.
     Stores vectors in Qdrant and metadata in MongoDB.
+    The CSV is streamed in batches of read_batch_size rows.
+    Chunks the collection already holds for the same document and text are skipped.
 
     Args:
         csv_path: Path to CSV file
@@ -91,6 +139,9 @@ def ingest_csv_to_qdrant(
         title_col: Column name for title
         category_col: Column name for category
         text_col: Column name for text content
+        read_batch_size: Number of CSV rows read per batch
+        start_row: Number of leading CSV rows to skip (resume point)
+        on_batch: Called with the number of CSV rows done after each batch is flushed
     """
     qdrant_collections = mongo_client.db["qdrant_collections"]
     qdrant_chunks = mongo_client.db["qdrant_chunks"]
@@ -99,92 +150,67 @@ def ingest_csv_to_qdrant(
     collection_doc = qdrant_collections.find_one({"collection_name": collection_name})
     if not collection_doc:
         raise ValueError(f"Qdrant collection '{collection_name}' not found")
+    _ensure_chunk_indexes(qdrant_chunks)
 
     # Initialize embedder
-    embedder = OllamaAPIEmbedder()
-
-    # Read CSV and prepare chunks
-    df = pd.read_csv(csv_path)
-    records = []
-
-    for _, row in df.iterrows():
-        doc_id = str(row.get(doc_id_col) or uuid.uuid4())
-        title = row.get(title_col, "")
-        category = row.get(category_col, "")
-        text_value = row.get(text_col, "")
-
-        # Handle pandas NA/NaN values
-        if pd.isna(text_value):
-            continue
-        text = str(text_value or "")
-        if not text or len(text.strip()) == 0 or text.lower() == 'nan':
-            continue
-
-        # Split into chunks
-        chunks = simple_sentence_split(text, max_words=settings.CHUNK_MAX_WORDS, overlap=settings.CHUNK_OVERLAP)
-        for chunk_text in chunks:
-            chunk_id = str(uuid.uuid4())
-            records.append({
-                "chunk_id": chunk_id,
-                "doc_id": doc_id,
-                "title": title,
-                "category": category,
-                "text": chunk_text,
-                "text_snippet": chunk_text[:400]
-            })
-
-    logger.info(f"Prepared {len(records)} chunks for Qdrant indexing into {collection_name}")
+    embedder = deps.embedder(mongo_client)
 
     # Batch process embeddings and add to Qdrant
     batch_size = settings.BATCH_SIZE
     total_added = 0
-
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i+batch_size]
-        texts = [r["text"] for r in batch]
-
-        # Get embeddings
-        embeddings = embedder.embed_batch(texts)  # returns (n, dim) numpy array
-
-        # Prepare points for Qdrant
-        points = []
-        for j, record in enumerate(batch):
-            chunk_id = record["chunk_id"]
-            payload = {
-                "doc_id": record["doc_id"],
-                "title": record["title"],
-                "category": record["category"],
-                "text_snippet": record["text_snippet"]
-            }
-
-            # Create point with chunk_id as ID and embedding as vector
-            point = PointStruct(
-                id=chunk_id,
-                vector=embeddings[j].tolist(),
-                payload=payload
+    rows_done = start_row
+    seen_keys = set()
+
+    # Read CSV in batches and prepare chunks; the next batch is embedded while the
+    # previous one is written to MongoDB and Qdrant
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as executor:
+        writes = PersistQueue(executor)
+        for df in iter_csv_batches(csv_path, read_batch_size, start_row, doc_id_col, columns=(doc_id_col, title_col, category_col, text_col)):
+            rows_done += len(df)
+            records = records_from_frame(df, doc_id_col, title_col, category_col, text_col)
+            prepared = len(records)
+            seen_keys |= stored_chunk_keys(
+                qdrant_chunks,
+                {"collection_name": collection_name},
+                [key for key in dict.fromkeys(records.keys()) if key not in seen_keys]
+            )
+            records = records.drop_known(seen_keys)
+            logger.info(
+                f"Prepared {len(records)} chunks for Qdrant indexing into {collection_name} "
+                f"({prepared - len(records)} already indexed)"
             )
-            points.append(point)
-
-            # Store metadata in MongoDB
-            chunk_doc = {
-                "chunk_id": chunk_id,
-                "collection_name": collection_name,
-                "doc_id": record["doc_id"],
-                "title": record["title"],
-                "category": record["category"],
-                "text_snippet": record["text_snippet"],
-                "created_at": datetime.utcnow()
-            }
-            qdrant_chunks.replace_one({"chunk_id": chunk_id}, chunk_doc, upsert=True)
-
-        # Upsert points to Qdrant
-        qdrant_client.upsert(
-            collection_name=collection_name,
-            points=points
-        )
 
-        total_added += len(batch)
-        logger.info(f"Indexed batch {i//batch_size + 1}/{(len(records)-1)//batch_size + 1}")
+            for batch, embeddings in prefetch_embeddings(executor, embedder.embed_batch, records.batches(batch_size)):
+                # Payloads for Qdrant and metadata upserts for MongoDB; vectors are uploaded as the numpy batch
+                created_at = datetime.utcnow()
+                payloads = []
+                ops = []
+                for chunk_id, doc_id, title, category, text, h in zip(
+                    batch.chunk_ids, batch.doc_ids, batch.titles, batch.categories, batch.texts, batch.content_hashes
+                ):
+                    snippet = text[:400]
+                    payloads.append({"doc_id": doc_id, "title": title, "category": category, "text_snippet": snippet})
+                    ops.append(ReplaceOne({"collection_name": collection_name, "doc_id": doc_id, "content_hash": h}, {
+                        "chunk_id": chunk_id,
+                        "collection_name": collection_name,
+                        "doc_id": doc_id,
+                        "title": title,
+                        "category": category,
+                        "text_snippet": snippet,
+                        "content_hash": h,
+                        "created_at": created_at
+                    }, upsert=True))
+
+                # Store metadata in MongoDB (one round trip per batch) and upload points to Qdrant
+                writes.submit(_persist_batch, qdrant_chunks, ops, qdrant_client, collection_name, embeddings, payloads, batch.chunk_ids)
+
+                total_added += len(batch)
+                logger.info(f"Indexed {total_added} chunks into {collection_name}")
+
+            # the batch only counts as done once its writes have landed
+            writes.drain()
+            if on_batch:
+                on_batch(rows_done)
 
     # Update collection metadata
     collection_info = qdrant_client.get_collection(collection_name=collection_name)
@@ -230,7 +256,7 @@ def search_qdrant_collection(
         raise ValueError(f"Qdrant collection '{collection_name}' not found")
 
     # Get query embedding
-    embedder = OllamaAPIEmbedder()
+    embedder = deps.embedder(mongo_client)
     q_vec = embedder.embed(query)
 
     # Search Qdrant
@@ -274,7 +300,7 @@ def search_qdrant_collection(
         }
 
     # Generate answer using OllamaGenerator
-    generator = OllamaGenerator()
+    generator = deps.generator()
     answer = generator.generate(query, hits)
 
     return {
@@ -1,15 +1,16 @@
-from app.embeddings.ollama_api_embedder import OllamaAPIEmbedder
-from app.embeddings.ollama_generator import OllamaGenerator
+from app.services import deps
+from app.clients.opensearch_client import HIT_SOURCE, compact_query_vector
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 import logging
 
 logger = logging.getLogger(__name__)
 
-def search_opensearch(request, query: str, index_name: str, top_k: int = 5, filter_category: str = None):
-    client = request.app.state.opensearch_client
-    embedder = OllamaAPIEmbedder()
-    q_vec = embedder.embed(query).tolist()
+# answers generated at once by rag_answer_batch
+ANSWER_WORKERS = 4
+
 
+def _knn_body(q_vec, top_k: int, filter_category: str = None) -> Dict:
     # Use native k-NN query for better performance
     knn_query = {
         "knn": {
@@ -22,7 +23,7 @@ def search_opensearch(request, query: str, index_name: str, top_k: int = 5, filt
 
     if filter_category:
         # Add filter to k-NN query
-        body = {
+        return {
             "size": top_k,
             "query": {
                 "bool": {
@@ -30,26 +31,83 @@ def search_opensearch(request, query: str, index_name: str, top_k: int = 5, filt
                     "filter": [{"term": {"category": filter_category}}]
                 }
             },
-            "_source": ["doc_id", "chunk_id", "title", "category", "text_snippet"]
-        }
-    else:
-        body = {
-            "size": top_k,
-            "query": knn_query,
-            "_source": ["doc_id", "chunk_id", "title", "category", "text_snippet"]
+            "_source": HIT_SOURCE,
+            "track_total_hits": False
         }
+    return {
+        "size": top_k,
+        "query": knn_query,
+        "_source": HIT_SOURCE,
+        "track_total_hits": False
+    }
+
+
+def _hits(res) -> List[Dict]:
+    # fields may be absent from _source (e.g. a document without a category), hence .get
+    return [
+        {"id": h["_id"], "score": float(h["_score"]), "doc_id": (src := h["_source"]).get("doc_id"),
+         "title": src.get("title"), "category": src.get("category"), "text_snippet": src.get("text_snippet")}
+        for h in res["hits"]["hits"]
+    ]
+
+
+def search_opensearch(request, query: str, index_name: str, top_k: int = 5, filter_category: str = None):
+    client = request.app.state.opensearch_client
+    embedder = deps.embedder(request.app.state.mongo_client)
+    q_vec = compact_query_vector(embedder.embed(query))
+
+    res = client.search(index=index_name, body=_knn_body(q_vec, top_k, filter_category))
+    return _hits(res)
+
+
+def search_opensearch_batch(request, queries: List[str], index_name: str, top_k: int = 5, filter_category: str = None) -> List[List[Dict]]:
+    """
+    Hits for each of queries, in order: the queries are embedded with one embed_batch call
+    and searched with a single msearch request instead of one search per query.
+    """
+    if not queries:
+        return []
+    client = request.app.state.opensearch_client
+    embedder = deps.embedder(request.app.state.mongo_client)
+    body = []
+    for vec in embedder.embed_batch(queries):
+        body.append({"index": index_name})
+        body.append(_knn_body(compact_query_vector(vec), top_k, filter_category))
+
+    res = client.msearch(body=body)
+    results = []
+    for r in res["responses"]:
+        if "error" in r:
+            raise RuntimeError(f"OpenSearch search failed: {r['error']}")
+        results.append(_hits(r))
+    return results
 
-    res = client.search(index=index_name, body=body)
-    hits = []
-    for h in res["hits"]["hits"]:
-        src = h["_source"]
-        hits.append(
-            {"id": h["_id"], "score": float(h["_score"]), "doc_id": src.get("doc_id"), "title": src.get("title"),
-             "category": src.get("category"), "text_snippet": src.get("text_snippet")})
-    return hits
 
 def rag_answer(request, query: str, index_name: str, top_k: int = 5, filter_category: str = None):
-    hits = search_opensearch(request, query, index_name, top_k=top_k, filter_category=filter_category)
-    generator = OllamaGenerator()
+    generator = deps.generator()
+    # load the generation model while the query is embedded and searched
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        executor.submit(generator.warm_up)
+        hits = executor.submit(
+            search_opensearch, request, query, index_name, top_k=top_k, filter_category=filter_category
+        ).result()
     answer = generator.generate(query, hits)
-    return {"query": query, "answer": answer, "contexts": hits}
\ No newline at end of file
+    return {"query": query, "answer": answer, "contexts": hits}
+
+
+def rag_answer_batch(request, queries: List[str], index_name: str, top_k: int = 5, filter_category: str = None) -> List[Dict]:
+    """rag_answer for several queries: one batched search, then the answers generated concurrently"""
+    if not queries:
+        return []
+    generator = deps.generator()
+    with ThreadPoolExecutor(max_workers=ANSWER_WORKERS) as executor:
+        # load the generation model while the queries are embedded and searched
+        executor.submit(generator.warm_up)
+        contexts = executor.submit(
+            search_opensearch_batch, request, queries, index_name, top_k=top_k, filter_category=filter_category
+        ).result()
+        answers = list(executor.map(generator.generate, queries, contexts))
+    return [
+        {"query": query, "answer": answer, "contexts": hits}
+        for query, answer, hits in zip(queries, answers, contexts)
+    ]
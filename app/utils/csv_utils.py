@@ -0,0 +1,127 @@
+import csv
+import uuid
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow is optional; without it CSVs are parsed by pandas' C reader
+    pacsv = None
+
+# bytes parsed per Arrow read block (blocks are parsed on Arrow's thread pool)
+ARROW_BLOCK_SIZE = 8 << 20
+# strings read as missing values, the same list pandas' read_csv uses by default
+CSV_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def peek_csv_header(path: str) -> List[str]:
+    """
+    Read only the header row of a CSV file.
+    Raises OSError if the file cannot be opened.
+    """
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        header = next(csv.reader(f), [])
+    return [col.strip() for col in header]
+
+
+def missing_columns(path: str, columns: List[str]) -> List[str]:
+    """Return the requested columns that are not present in the CSV header"""
+    header = set(peek_csv_header(path))
+    return [col for col in columns if col not in header]
+
+
+def iter_csv_batches(path: str, batch_size: int, start_row: int = 0, doc_id_col: str = "id", columns: Optional[Iterable[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV as DataFrames of at most batch_size rows, skipping the first start_row data rows.
+    Rows are skipped with a predicate rather than a list of row numbers, so resuming
+    deep into a large file does not build an O(start_row) skip set.
+    doc ids are read as strings, so numeric ids are not turned into floats ("1.0").
+    With columns, only those columns are parsed (any that are missing are just absent).
+    Raises ValueError if batch_size < 1.
+    Uses pyarrow's multi-threaded streaming reader when it is installed.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be > 0, got {batch_size}")
+    if pacsv is not None:
+        yield from _iter_arrow_batches(path, batch_size, start_row, columns)
+        return
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda col: col in wanted
+    yield from pd.read_csv(
+        path,
+        chunksize=batch_size,
+        skiprows=lambda i: 0 < i <= start_row,
+        usecols=usecols,
+        dtype={doc_id_col: str}
+    )
+
+
+def _iter_arrow_batches(path: str, batch_size: int, start_row: int, columns: Optional[Iterable[str]]) -> Iterator[pd.DataFrame]:
+    """iter_csv_batches on pyarrow.csv.open_csv; Arrow read blocks are regrouped into batch_size row frames"""
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        header = next(csv.reader(f), [])
+    if not header:
+        return
+    wanted = set(header if columns is None else columns)
+    included = [col for col in header if col in wanted]
+    # every column is read as text: types inferred from the first block would fail the whole
+    # read on a later block, and text columns must not be parsed as numbers anyway
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=ARROW_BLOCK_SIZE, skip_rows_after_names=start_row),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=included,
+            column_types={col: pa.string() for col in included},
+            null_values=CSV_NA_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    pending: List[Any] = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= batch_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, batch_size).to_pandas()
+            rest = table.slice(batch_size)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def iter_text_rows(df, doc_id_col: str, title_col: str, category_col: str, text_col: str) -> Iterator[Tuple[str, Any, Any, str]]:
+    """
+    Yield (doc_id, title, category, text) for the rows of a CSV batch that have text.
+    Rows with missing, blank or "nan" text are dropped with column masks, and the
+    remaining columns are read as arrays instead of building a Series per row.
+    Missing doc ids get a random UUID; missing title/category columns yield "".
+    """
+    if text_col not in df.columns:
+        return
+    df = df[df[text_col].notna()]
+    texts = df[text_col].astype(str)
+    keep = (texts.str.strip() != "") & (texts.str.lower() != "nan")
+    df = df[keep]
+    texts = texts[keep].tolist()
+    n = len(texts)
+    if n == 0:
+        return
+
+    def column(col):
+        return df[col].tolist() if col in df.columns else [""] * n
+
+    if doc_id_col in df.columns:
+        # v == v is False for NaN, so empty ids get a UUID instead of the string "nan"
+        doc_ids = [str(v) if v and v == v else str(uuid.uuid4()) for v in df[doc_id_col].tolist()]
+    else:
+        doc_ids = [str(uuid.uuid4()) for _ in range(n)]
+
+    yield from zip(doc_ids, column(title_col), column(category_col), texts)
@@ -1,33 +1,131 @@
 
 import re
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, List, Optional
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; without it every text takes the regex path
+    njit = None
+
+# texts handed to a worker process at a time by simple_sentence_split_batch
+SPLIT_BATCH_CHUNKSIZE = 64
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _ascii_sentence_spans(buf: np.ndarray) -> np.ndarray:
+    """
+    (start, end) offsets of the sentences in an ASCII byte buffer, splitting on
+    whitespace runs that follow . ! or ? -- the same boundaries as _SENTENCE_END_RE.
+    """
+    n = buf.shape[0]
+    spans = np.empty((n + 1, 2), dtype=np.int64)
+    count = 0
+    start = 0
+    i = 1
+    while i < n:
+        c = buf[i]
+        # whitespace as matched by \s for str patterns: \t-\r, \x1c-\x1f and space
+        if (c == 32 or 9 <= c <= 13 or 28 <= c <= 31) and (buf[i - 1] == 46 or buf[i - 1] == 33 or buf[i - 1] == 63):
+            spans[count, 0] = start
+            spans[count, 1] = i
+            count += 1
+            while i < n and (buf[i] == 32 or 9 <= buf[i] <= 13 or 28 <= buf[i] <= 31):
+                i += 1
+            start = i
+        else:
+            i += 1
+    spans[count, 0] = start
+    spans[count, 1] = n
+    return spans[:count + 1]
+
+
+if njit is not None:
+    _ascii_sentence_spans = njit(cache=True, nogil=True)(_ascii_sentence_spans)
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Sentences of a stripped text; ASCII input is scanned by the compiled kernel when numba is available"""
+    if njit is not None and text.isascii():
+        spans = _ascii_sentence_spans(np.frombuffer(text.encode("ascii"), dtype=np.uint8))
+        return [text[start:end] for start, end in spans.tolist()]
+    return _SENTENCE_END_RE.split(text)
+
+
+def _chunks_without_overlap(sentences: List[str], max_words: int) -> List[str]:
+    """Chunk assembly for overlap=0: only a running word count is kept, no word buffer"""
+    chunks = []
+    current = []
+    count = 0
+    for sent in sentences:
+        n = len(sent.split())
+        if count + n > max_words and current:
+            chunks.append(' '.join(current))
+            current.clear()
+            count = 0
+        current.append(sent)
+        count += n
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
 
 def simple_sentence_split(text: str, max_words: int = 140, overlap: int = 30) -> List[str]:
     """
     Split a text into chunks by sentences, each chunk aims to be <= max_words,
     re-using an overlap of words between consecutive chunks.
+    Raises ValueError if max_words < 1; overlap is capped at max_words - 1.
     """
+    if max_words < 1:
+        raise ValueError(f"max_words must be > 0, got {max_words}")
+    if overlap >= max_words:
+        # an overlap of a whole chunk would repeat every chunk in the next one
+        overlap = max_words - 1
     if not text or not isinstance(text, str):
         return []
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    text = text.strip()
+    sentences = _split_sentences(text)
+    # a text of n characters has at most (n + 1) // 2 words, so short texts are one chunk
+    if (len(text) + 1) // 2 <= max_words:
+        return [' '.join(sentences)]
+    if overlap <= 0:
+        return _chunks_without_overlap(sentences, max_words)
     chunks = []
     current = []
-    current_len = 0
+    # words of the current window, tokenized once per sentence so the overlap
+    # tail is a list slice instead of a re-join + re-split of the whole chunk
+    current_words = []
 
     for sent in sentences:
         words = sent.split()
-        if current_len + len(words) <= max_words or not current:
+        if len(current_words) + len(words) <= max_words or not current:
             current.append(sent)
-            current_len += len(words)
+            current_words.extend(words)
         else:
             chunks.append(' '.join(current))
-            if overlap > 0:
-                last_words = ' '.join(current).split()[-overlap:]
-                current = [' '.join(last_words), sent]
-                current_len = len(last_words) + len(words)
-            else:
-                current = [sent]
-                current_len = len(words)
+            # both buffers are trimmed in place for the next window rather than rebuilt
+            current.clear()
+            del current_words[:-overlap]
+            current.append(' '.join(current_words))
+            current.append(sent)
+            current_words.extend(words)
     if current:
         chunks.append(' '.join(current))
     return chunks
+
+
+def simple_sentence_split_batch(texts: Iterable[str], max_words: int = 140, overlap: int = 30, workers: Optional[int] = None) -> List[List[str]]:
+    """
+    simple_sentence_split for many texts, spread over worker processes (one per CPU by default)
+    so splitting is not serialized by the GIL. Results are in input order. Inputs of at most
+    one chunksize of texts are split in this process, where starting workers would cost more.
+    """
+    texts = list(texts)
+    split = partial(simple_sentence_split, max_words=max_words, overlap=overlap)
+    if len(texts) <= SPLIT_BATCH_CHUNKSIZE or workers == 1:
+        return [split(t) for t in texts]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(split, texts, chunksize=SPLIT_BATCH_CHUNKSIZE))
@@ -1,16 +1,24 @@
 """
-Ragas Evaluation Script - LLM as a Judge (Sequential Processing)
-Evaluates RAG pipeline one query at a time using Ragas metrics with Ollama as the judge.
+Ragas Evaluation Script - LLM as a Judge (Parallel Processing)
+Evaluates RAG pipeline a few queries at a time using Ragas metrics with Ollama as the judge.
 
 IMPORTANT: This script requires a model that can follow JSON schema instructions well.
 Recommended models: llama3.1, mistral, qwen2.5
 Avoid: llama3.2 (poor JSON formatting)
 """
 
+import hashlib
 import json
+import sqlite3
 import sys
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datasets import Dataset
+import faiss
+import httpx
 import pandas as pd
 import numpy as np
 
@@ -18,40 +26,193 @@ import numpy as np
 sys.path.append(os.getcwd())
 
 from app.core.config import settings
-from app.clients.opensearch_client import create_opensearch_client
+from app.clients.opensearch_client import HIT_SOURCE, compact_query_vector, create_opensearch_client
 from app.embeddings.ollama_api_embedder import OllamaAPIEmbedder
+from app.db.embedding_store import SqliteEmbeddingStore
 from app.embeddings.ollama_generator import OllamaGenerator
 
 # Ragas imports
 from ragas import evaluate
+from ragas.run_config import RunConfig
 from ragas.metrics import (
     faithfulness,
     answer_relevancy,
-    context_precision,
     context_recall
 )
 
 # Langchain Ollama imports for Ragas
-from langchain_ollama import ChatOllama, OllamaEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import ChatOllama
 
 # Constants from config
 INDEX_NAME = "bechmark_index"
 # Use a model better at JSON formatting for Ragas
 # llama3.1, mistral, or qwen2.5 work better than llama3.2
-RAGAS_MODEL = "llama3.1:8b"  # Change this if you have a different model
+# Pinned to 4-bit Q4_K_M weights: judge decoding is memory-bandwidth-bound, and llama.cpp has fast Q4 kernels
+RAGAS_MODEL = "llama3.1:8b-instruct-q4_K_M"  # Change this if you have a different model
 OLLAMA_BASE_URL = "http://localhost:11434"
+# Query embeddings persist here, so reruns skip the embed step
+EMBED_CACHE_PATH = ".embed_cache.db"
+# Judge scores persist here, keyed by the evaluated inputs, so reruns skip the Ragas LLM calls
+JUDGE_CACHE_PATH = ".ragas_judge_cache.db"
+# A new (question, answer) reuses the SEMANTIC_METRICS scores of a judged one whose embedding is at least this cosine-similar
+SEMANTIC_CACHE_THRESHOLD = 0.97
+# context_precision is not evaluated (its judge calls time out); to re-enable it, add it here,
+# to the ragas.metrics imports and to JUDGE_METRICS
+SCORE_METRICS = ["faithfulness", "answer_relevancy", "context_recall"]
+# Ragas metric object per score column
+JUDGE_METRICS = {"faithfulness": faithfulness, "answer_relevancy": answer_relevancy, "context_recall": context_recall}
+# Metrics that depend on the question and answer only, so a near-identical (question, answer) may reuse them;
+# faithfulness and context_recall also read the contexts and ground truth and are always judged
+SEMANTIC_METRICS = ["answer_relevancy"]
+# Judge prompt budgets in characters (~4 per token): the reference answer, and all contexts of a query together
+GROUND_TRUTH_MAX_CHARS = 2000
+CONTEXTS_MAX_CHARS = 4000
+# Queries generated at once, and parallel judge calls per Ragas batch (Ollama serves up to OLLAMA_NUM_PARALLEL requests)
+EVAL_WORKERS = 4
+# Generated answers judged per Ragas evaluate() call
+JUDGE_BATCH_SIZE = 4
+# One record per query: the scores plus the question and answer they belong to
+RESULT_DTYPE = np.dtype([(m, "f8") for m in SCORE_METRICS] + [("question", "O"), ("answer", "O")])
+# Scores appended here as batches finish (in completion order); the final CSV is in query order
+PARTIAL_RESULTS_PATH = "ragas_evaluation_results_partial.csv"
+# OpenSearch retrieval runs ahead on its own pool, overlapping the LLM calls of earlier queries
+SEARCH_WORKERS = 2
 
-def search_opensearch_direct(client, embedder, query: str, index_name: str, top_k: int = 5):
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """text cut to at most max_chars, at the last word boundary when there is one"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    return cut.rsplit(" ", 1)[0] if " " in cut else cut
+
+
+def budget_contexts(contexts, max_chars: int = CONTEXTS_MAX_CHARS):
+    """Contexts in rank order while they fit in max_chars; the one crossing the budget is truncated"""
+    kept = []
+    for ctx in contexts:
+        if max_chars <= 0:
+            break
+        kept.append(truncate_text(ctx, max_chars))
+        max_chars -= len(kept[-1])
+    return kept
+
+
+class EmbedderEmbeddings(Embeddings):
+    """LangChain Embeddings over an OllamaAPIEmbedder, so Ragas reuses its embedding model, session and cache"""
+
+    def __init__(self, embedder: OllamaAPIEmbedder):
+        self.embedder = embedder
+
+    def embed_documents(self, texts):
+        return self.embedder.embed_batch(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self.embedder.embed(text).tolist()
+
+
+def format_scores(scores: pd.DataFrame) -> pd.DataFrame:
+    """Metric columns as 4-decimal strings, with 'N/A' for failed (NaN) evaluations"""
+    return scores[SCORE_METRICS].map(lambda v: f"{v:.4f}" if pd.notna(v) else "N/A")
+
+
+class JudgeCache:
     """
-    Direct OpenSearch query without mocking.
-    Returns hits with text_snippet for contexts.
+    Ragas scores per (question, answer, contexts, ground truth, judge model) in a local SQLite file.
+    With an embed_fn, entries also carry the normalized embedding of their question and answer,
+    and get_similar serves near-identical inputs (cosine above SEMANTIC_CACHE_THRESHOLD) from a
+    FAISS inner-product index over them; callers only reuse SEMANTIC_METRICS from such matches.
     """
-    q_vec = embedder.embed(query).tolist()
 
+    def __init__(self, path: str = JUDGE_CACHE_PATH, embed_fn=None):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS judge_cache (key TEXT PRIMARY KEY, scores TEXT NOT NULL, vector BLOB, model TEXT)"
+        )
+        # cache files from before the semantic lookup have no vector columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(judge_cache)")}
+        for column, kind in (("vector", "BLOB"), ("model", "TEXT")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE judge_cache ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+        self._embed_fn = embed_fn
+        self._index = None
+        self._index_scores = []
+        if embed_fn is not None:
+            stored = self._conn.execute(
+                "SELECT scores, vector FROM judge_cache WHERE vector IS NOT NULL AND model = ?", (RAGAS_MODEL,)
+            )
+            for scores, blob in stored:
+                self._add_vector(np.frombuffer(blob, dtype=np.float32), json.loads(scores))
+
+    @staticmethod
+    def key(query_text, answer, contexts, ground_truth) -> str:
+        canonical = json.dumps(
+            {"q": query_text, "a": answer, "c": sorted(contexts), "gt": ground_truth, "model": RAGAS_MODEL},
+            sort_keys=True
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def similarity_text(query_text, answer) -> str:
+        return f"{query_text}\n{answer}"
+
+    def _embed(self, texts) -> np.ndarray:
+        vecs = np.ascontiguousarray(self._embed_fn(texts), dtype=np.float32)
+        faiss.normalize_L2(vecs)
+        return vecs
+
+    def _add_vector(self, vec: np.ndarray, scores: dict):
+        if self._index is None:
+            self._index = faiss.IndexFlatIP(len(vec))
+        elif self._index.d != len(vec):
+            return  # embedded with another embedding model
+        self._index.add(vec.reshape(1, -1))
+        self._index_scores.append(scores)
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT scores FROM judge_cache WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_similar(self, texts):
+        """Per similarity_text, the scores of the closest cached input when it is similar enough, else None"""
+        if self._index is None or not texts:
+            return [None] * len(texts)
+        vecs = self._embed(texts)
+        with self._lock:
+            sims, ids = self._index.search(vecs, 1)
+        return [
+            self._index_scores[i] if sim > SEMANTIC_CACHE_THRESHOLD else None
+            for sim, i in zip(sims[:, 0], ids[:, 0])
+        ]
+
+    def put(self, key: str, scores: dict, text: str = None):
+        """Store scores under key; with text (a similarity_text), they also become a semantic match"""
+        vec = self._embed([text])[0] if text is not None and self._embed_fn is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO judge_cache (key, scores, vector, model) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(scores), vec.tobytes() if vec is not None else None, RAGAS_MODEL)
+            )
+            self._conn.commit()
+            if vec is not None:
+                self._add_vector(vec, scores)
+
+def search_opensearch_direct(client, q_vec: np.ndarray, index_name: str, top_k: int = 5):
+    """
+    Direct OpenSearch query without mocking, for a precomputed query embedding.
+    Returns hits with text_snippet for contexts.
+    """
     knn_query = {
         "knn": {
             "embedding": {
-                "vector": q_vec,
+                "vector": compact_query_vector(q_vec),
                 "k": top_k
             }
         }
@@ -60,89 +221,129 @@ def search_opensearch_direct(client, embedder, query: str, index_name: str, top_
     body = {
         "size": top_k,
         "query": knn_query,
-        "_source": ["doc_id", "chunk_id", "title", "category", "text_snippet"]
+        "_source": HIT_SOURCE,
+        "track_total_hits": False
     }
 
     res = client.search(index=index_name, body=body)
-    hits = []
-    for h in res["hits"]["hits"]:
-        src = h["_source"]
-        hits.append({
-            "doc_id": src.get("doc_id"),
-            "title": src.get("title"),
-            "category": src.get("category"),
-            "text_snippet": src.get("text_snippet", ""),
-            "score": float(h["_score"])
-        })
+    # the generator and Ragas only read the snippets; scores are not needed here
+    hits = [
+        {
+            "doc_id": h["_source"].get("doc_id"),
+            "title": h["_source"].get("title"),
+            "category": h["_source"].get("category"),
+            "text_snippet": h["_source"].get("text_snippet", ""),
+        }
+        for h in res["hits"]["hits"]
+    ]
     return hits
 
-def evaluate_single_query(query_text, answer, contexts, ground_truth, llm, embeddings, max_retries=2):
+def _nan_scores():
+    return {m: np.nan for m in SCORE_METRICS}
+
+
+def _missing_metrics(row_scores):
+    return tuple(m for m in SCORE_METRICS if pd.isna(row_scores[m]))
+
+
+def _cached_scores(cached, metrics=SCORE_METRICS):
+    """Scores of the given metrics from a cache entry; metrics it lacks (or holds as NaN) are NaN"""
+    return {m: cached[m] if pd.notna(cached.get(m, np.nan)) else np.nan for m in metrics}
+
+
+def evaluate_batch(rows, llm, embeddings, max_retries=2, cache=None):
     """
-    Evaluate a single query using Ragas with retry logic.
-    Returns a dictionary with metric scores.
+    Evaluate a batch of generated answers with batched Ragas evaluate() calls.
+    rows are dicts with question, answer, contexts and ground_truth. Retries (after an
+    exponential backoff with jitter) only re-run the metrics that came back NaN, for the
+    rows they failed on; with a JudgeCache, rows judged before skip the LLM entirely, and near-identical
+    ones only judge the metrics outside SEMANTIC_METRICS.
+    Returns one score dict per row, in order.
     """
-    # Create a single-item dataset
-    data = {
-        "question": [query_text],
-        "answer": [answer],
-        "contexts": [contexts],
-        "ground_truth": [ground_truth]
-    }
-    
-    dataset = Dataset.from_dict(data)
-    
+    scores = [None] * len(rows)
+    keys = [
+        JudgeCache.key(r["question"], r["answer"], r["contexts"], r["ground_truth"]) if cache is not None else None
+        for r in rows
+    ]
+    pending = []
+    for pos, key in enumerate(keys):
+        cached = cache.get(key) if key is not None else None
+        scores[pos] = _cached_scores(cached) if cached is not None else _nan_scores()
+        # entries stored with some metrics missing only judge those again
+        if _missing_metrics(scores[pos]):
+            pending.append(pos)
+    if len(pending) < len(rows):
+        print(f"      ✓ {len(rows) - len(pending)} scores loaded from {JUDGE_CACHE_PATH}")
+    if cache is not None and pending:
+        similar = cache.get_similar([JudgeCache.similarity_text(rows[pos]["question"], rows[pos]["answer"]) for pos in pending])
+        near = [(pos, cached) for pos, cached in zip(pending, similar) if cached is not None]
+        for pos, cached in near:
+            # the other metrics still go to the judge, for this row's own contexts and ground truth
+            scores[pos].update({
+                m: v for m, v in _cached_scores(cached, SEMANTIC_METRICS).items()
+                if pd.notna(v) and pd.isna(scores[pos][m])
+            })
+        if near:
+            print(f"      ✓ {', '.join(SEMANTIC_METRICS)} reused for {len(near)} near-identical judged answers")
+    judged = list(pending)
+    pending = [pos for pos in pending if _missing_metrics(scores[pos])]
+
     for attempt in range(max_retries):
-        try:
-            result = evaluate(
-                dataset,
-                metrics=[
-                    faithfulness,
-                    answer_relevancy,
-                    context_recall
-                ],
-                llm=llm,
-                embeddings=embeddings
+        if not pending:
+            break
+        if attempt:
+            time.sleep(2 ** attempt + random.random() * 0.5)
+        # rows missing the same metrics share one evaluate() call
+        groups = {}
+        for pos in pending:
+            groups.setdefault(_missing_metrics(scores[pos]), []).append(pos)
+        for missing, positions in groups.items():
+            dataset = Dataset.from_dict({
+                field: [rows[pos][field] for pos in positions]
+                for field in ("question", "answer", "contexts", "ground_truth")
+            })
+            try:
+                result = evaluate(
+                    dataset,
+                    metrics=[JUDGE_METRICS[m] for m in missing],
+                    llm=llm,
+                    embeddings=embeddings,
+                    run_config=RunConfig(max_workers=EVAL_WORKERS)
+                )
+                df = result.to_pandas()
+            except Exception as e:
+                print(f"      ⚠ Attempt {attempt + 1} failed for {', '.join(missing)}: {str(e)[:100]}...")
+                continue
+            for pos, row_scores in zip(positions, df[list(missing)].to_dict("records")):
+                scores[pos].update(row_scores)
+
+        pending = [pos for pos in pending if _missing_metrics(scores[pos])]
+        if pending and attempt + 1 < max_retries:
+            print(f"      ⚠ Attempt {attempt + 1}: Got NaN values for {len(pending)} queries, retrying those metrics...")
+
+    exhausted = 0
+    for pos in judged:
+        missing = _missing_metrics(scores[pos])
+        if len(missing) == len(SCORE_METRICS):
+            exhausted += 1
+        elif keys[pos] is not None:
+            # only valid scores are stored, so the missing ones are judged again on the next run;
+            # the row is a semantic match only once its SEMANTIC_METRICS are known
+            semantic = not any(m in missing for m in SEMANTIC_METRICS)
+            cache.put(
+                keys[pos], {m: float(v) for m, v in scores[pos].items() if m not in missing},
+                text=JudgeCache.similarity_text(rows[pos]["question"], rows[pos]["answer"]) if semantic else None
             )
-            
-            # Extract scores
-            df = result.to_pandas()
-            
-            # Check for NaN values
-            scores = {
-                "question": query_text,
-                "answer": answer,
-                "faithfulness": df.iloc[0]["faithfulness"],
-                "answer_relevancy": df.iloc[0]["answer_relevancy"],
-                "context_precision": np.nan,  # Not evaluated to avoid timeouts
-                "context_recall": df.iloc[0]["context_recall"]
-            }
-            
-            # If we got valid scores (not all NaN), return
-            if not all(np.isnan(v) if isinstance(v, float) else False for k, v in scores.items() if k not in ["question", "answer"]):
-                return scores
-            else:
-                print(f"      ⚠ Attempt {attempt + 1}: Got NaN values, retrying...")
-                
-        except Exception as e:
-            print(f"      ⚠ Attempt {attempt + 1} failed: {str(e)[:100]}...")
-            if attempt < max_retries - 1:
-                print(f"      Retrying...")
-            else:
-                print(f"      ✗ All retries exhausted, returning NaN values")
-    
-    # If all retries failed, return NaN
-    return {
-        "question": query_text,
-        "answer": answer,
-        "faithfulness": np.nan,
-        "answer_relevancy": np.nan,
-        "context_precision": np.nan,
-        "context_recall": np.nan
-    }
+    if exhausted:
+        print(f"      ✗ All retries exhausted for {exhausted} queries, returning NaN values")
+    return [
+        {"question": row["question"], "answer": row["answer"], **row_scores}
+        for row, row_scores in zip(rows, scores)
+    ]
 
 def main():
     print("=" * 80)
-    print("RAGAS EVALUATION - LLM as a Judge (Sequential Processing)")
+    print("RAGAS EVALUATION - LLM as a Judge (Parallel Processing)")
     print("=" * 80)
     
     # Step 1: Initialize OpenSearch client
@@ -157,8 +358,8 @@ def main():
     # Step 2: Initialize embedder and generator
     print("\n[Step 2] Initializing embedder and generator...")
     try:
-        embedder = OllamaAPIEmbedder()
-        print(f"✓ Embedder initialized (model: {settings.OLLAMA_EMBEDDING_MODEL})")
+        embedder = OllamaAPIEmbedder(store=SqliteEmbeddingStore(EMBED_CACHE_PATH))
+        print(f"✓ Embedder initialized (model: {settings.OLLAMA_EMBEDDING_MODEL}, cache: {EMBED_CACHE_PATH})")
         
         generator = OllamaGenerator()
         print(f"✓ Generator initialized (model: {settings.OLLAMA_GENERATE_MODEL})")
@@ -171,19 +372,20 @@ def main():
     print(f"⚠ Using model: {RAGAS_MODEL}")
     print(f"⚠ Make sure you have this model: ollama pull {RAGAS_MODEL}")
     try:
+        # the chat client keeps one keep-alive pool, sized for EVAL_WORKERS judge calls in flight
+        judge_http = {"limits": httpx.Limits(max_connections=EVAL_WORKERS, max_keepalive_connections=EVAL_WORKERS)}
         llm = ChatOllama(
             model=RAGAS_MODEL,
             base_url=OLLAMA_BASE_URL,
             temperature=0,
             num_ctx=4096,  # Increase context window
             timeout=600,  # 10 minute timeout for LLM calls
-            request_timeout=600  # Request timeout
-        )
-        embeddings = OllamaEmbeddings(
-            model=RAGAS_MODEL,
-            base_url=OLLAMA_BASE_URL
+            request_timeout=600,  # Request timeout
+            client_kwargs=judge_http
         )
-        print(f"✓ Ollama initialized for Ragas with model: {RAGAS_MODEL}")
+        # answer_relevancy embeds with the pipeline's embedding model and its cache, not the judge model
+        embeddings = EmbedderEmbeddings(embedder)
+        print(f"✓ Ollama initialized for Ragas with model: {RAGAS_MODEL} (embeddings: {settings.OLLAMA_EMBEDDING_MODEL})")
         print(f"✓ Timeout set to 300 seconds (10 minutes) per LLM call")
     except Exception as e:
         print(f"✗ Failed to initialize Ollama for Ragas: {e}")
@@ -204,80 +406,108 @@ def main():
     except Exception as e:
         print(f"✗ Failed to load queries: {e}")
         return
+
+    # Embed every query up front, in one batched request instead of one per query
+    try:
+        query_vecs = embedder.embed_batch([item["query"] for item in queries])
+        print(f"✓ Embedded {len(query_vecs)} queries")
+    except Exception as e:
+        print(f"✗ Failed to embed queries: {e}")
+        return
     
-    # Step 5: Process queries ONE BY ONE
-    print("\n[Step 5] Processing queries sequentially...")
+    # Step 5: Process queries in parallel
+    print(f"\n[Step 5] Processing queries with {EVAL_WORKERS} workers...")
     print("=" * 80)
-    print("Note: Each query will be fully processed before moving to the next.")
-    print("This includes: Search → Generate → Evaluate with Ragas")
+    print("Note: Each query goes through Search → Generate → Evaluate with Ragas.")
+    print(f"Up to {EVAL_WORKERS} answers are generated at once and judged {JUDGE_BATCH_SIZE} per Ragas call;")
+    print(f"start Ollama with OLLAMA_NUM_PARALLEL={EVAL_WORKERS} to serve them.")
     print("Expected time: ~2-3 minutes per query")
     print("=" * 80)
-    
-    results = []
-    
-    for i, item in enumerate(queries):
+
+    # filled by query index; rows stay NaN until their query is judged
+    results = np.empty(len(queries), dtype=RESULT_DTYPE)
+    for metric in SCORE_METRICS:
+        results[metric] = np.nan
+    judged = np.zeros(len(queries), dtype=bool)
+    judge_cache = JudgeCache(embed_fn=embedder.embed_batch)
+    # partial results are appended batch by batch, so start from an empty file
+    if os.path.exists(PARTIAL_RESULTS_PATH):
+        os.remove(PARTIAL_RESULTS_PATH)
+
+    def process_query(i, item, hits_future):
+        """Generate the answer for one query once its retrieval is done; returns the row to judge"""
         query_text = item["query"]
-        print(f"\n{'='*80}")
-        print(f"QUERY {i+1}/{len(queries)}")
-        print(f"{'='*80}")
-        print(f"Question: {query_text}")
-        
-        try:
-            # Step A: Search OpenSearch
-            print(f"\n  [A] Searching OpenSearch for relevant contexts...")
-            hits = search_opensearch_direct(opensearch_client, embedder, query_text, INDEX_NAME, top_k=10)
-            print(f"      ✓ Retrieved {len(hits)} results")
-            
-            # Step B: Generate answer
-            print(f"\n  [B] Generating answer using {settings.OLLAMA_GENERATE_MODEL}...")
-            answer = generator.generate(query_text, hits)
-            print(f"      ✓ Answer generated ({len(answer)} characters)")
-            print(f"      Preview: {answer[:100]}...")
-            
-            # Step C: Prepare data for Ragas
-            contexts = [hit["text_snippet"] for hit in hits if hit.get("text_snippet")]
-            ground_truth = " ".join([doc["text"] for doc in item["expected_top_10"][:3]])
-            
-            # Step D: Evaluate with Ragas (this is the slow part)
-            print(f"\n  [C] Evaluating with Ragas using {RAGAS_MODEL}...")
-            print(f"      (This may take 1-2 minutes per query)")
-            result = evaluate_single_query(
-                query_text,
-                answer,
-                contexts,
-                ground_truth,
-                llm,
-                embeddings
+        tag = f"[Q{i+1}/{len(queries)}]"
+        print(f"\n{tag} Question: {query_text}")
+
+        # Step A: Search OpenSearch (started ahead on the search pool)
+        hits = hits_future.result()
+        print(f"{tag} ✓ Retrieved {len(hits)} results")
+
+        # Step B: Generate answer
+        answer = generator.generate(query_text, hits)
+        print(f"{tag} ✓ Answer generated with {settings.OLLAMA_GENERATE_MODEL} ({len(answer)} characters)")
+
+        # Step C: Prepare data for Ragas
+        return {
+            "question": query_text,
+            "answer": answer,
+            "contexts": budget_contexts([hit["text_snippet"] for hit in hits if hit.get("text_snippet")]),
+            "ground_truth": truncate_text(
+                " ".join([doc["text"] for doc in item["expected_top_10"][:3]]), GROUND_TRUTH_MAX_CHARS
             )
-            
-            results.append(result)
-            
-            # Display results for this query
-            print(f"\n  [D] Results for Query {i+1}:")
-            # Format each metric properly, handling NaN values
-            faith_val = f"{result['faithfulness']:.4f}" if not np.isnan(result['faithfulness']) else 'N/A'
-            ans_rel_val = f"{result['answer_relevancy']:.4f}" if not np.isnan(result['answer_relevancy']) else 'N/A'
-            ctx_prec_val = f"{result['context_precision']:.4f}" if not np.isnan(result['context_precision']) else 'N/A'
-            ctx_rec_val = f"{result['context_recall']:.4f}" if not np.isnan(result['context_recall']) else 'N/A'
-            
-            print(f"      Faithfulness:       {faith_val}")
-            print(f"      Answer Relevancy:   {ans_rel_val}")
-            print(f"      Context Precision:  {ctx_prec_val}")
-            print(f"      Context Recall:     {ctx_rec_val}")
-            print(f"\n      ✓ Query {i+1} completed!")
-            
-            # Save intermediate results after each query
-            df_temp = pd.DataFrame(results)
-            df_temp.to_csv("ragas_evaluation_results_partial.csv", index=False)
-            print(f"      ✓ Progress saved to ragas_evaluation_results_partial.csv")
-            
-        except Exception as e:
-            print(f"\n      ✗ Error processing query {i+1}: {e}")
-            print(f"      Continuing with next query...")
-            import traceback
-            traceback.print_exc()
-            continue
-    
+        }
+
+    def judge(batch):
+        """Step D: evaluate generated rows with Ragas (the slow part) and record their scores"""
+        print(f"\nEvaluating queries {', '.join(f'Q{i+1}' for i, _ in batch)} with Ragas using {RAGAS_MODEL}...")
+        scored = evaluate_batch([row for _, row in batch], llm, embeddings, cache=judge_cache)
+        for (i, _), result in zip(batch, scored):
+            # Display results for this query, handling NaN values
+            formatted = format_scores(pd.DataFrame([result])).iloc[0]
+            lines = [f"\n[Q{i+1}] Results:"]
+            for metric in SCORE_METRICS:
+                lines.append(f"      {metric.replace('_', ' ').title():<20}: {formatted[metric]}")
+            print("\n".join(lines))
+            results[i] = tuple(result[name] for name in RESULT_DTYPE.names)
+            judged[i] = True
+
+        # Append only this batch's rows; the full file is never rewritten
+        pd.DataFrame(scored).to_csv(
+            PARTIAL_RESULTS_PATH, mode="a", header=judged.sum() == len(batch), index=False
+        )
+        print(f"✓ Progress saved to {PARTIAL_RESULTS_PATH} ({judged.sum()}/{len(queries)})")
+
+    with ThreadPoolExecutor(max_workers=SEARCH_WORKERS) as search_executor, \
+            ThreadPoolExecutor(max_workers=EVAL_WORKERS) as executor:
+        # retrieval for every query is queued first, so it never waits behind generation
+        hits_futures = [
+            search_executor.submit(search_opensearch_direct, opensearch_client, query_vecs[i], INDEX_NAME, 10)
+            for i in range(len(queries))
+        ]
+        futures = {
+            executor.submit(process_query, i, item, hits_futures[i]): i for i, item in enumerate(queries)
+        }
+        # answers are judged JUDGE_BATCH_SIZE at a time while the remaining ones are generated
+        ready = []
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                ready.append((i, future.result()))
+            except Exception as e:
+                print(f"\n[Q{i+1}] ✗ Error processing query: {e}")
+                import traceback
+                traceback.print_exc()
+                continue
+            if len(ready) >= JUDGE_BATCH_SIZE:
+                judge(ready)
+                ready = []
+        if ready:
+            judge(ready)
+
+    # queries whose generation failed are left out, the rest stay in query order
+    results = results[judged]
+
     # Step 6: Final results
     print("\n" + "=" * 80)
     print("FINAL RAGAS EVALUATION RESULTS")
@@ -287,7 +517,7 @@ def main():
         print("✗ No queries were successfully evaluated.")
         return
     
-    df = pd.DataFrame(results)
+    df = pd.DataFrame(results, columns=["question", "answer", *SCORE_METRICS])
     
     # Display aggregate metrics (excluding NaN)
     print("\n📊 Aggregate Metrics (excluding failed evaluations):")
@@ -295,12 +525,10 @@ def main():
     print(f"{'Metric':<25} {'Average Score':<15} {'Valid/Total':<15}")
     print("-" * 80)
     
-    for metric in ["faithfulness", "answer_relevancy", "context_precision", "context_recall"]:
-        valid_count = df[metric].notna().sum()
-        total_count = len(df)
-        avg = df[metric].mean() if valid_count > 0 else np.nan
-        avg_str = f"{avg:.4f}" if not np.isnan(avg) else 'N/A'
-        print(f"{metric.replace('_', ' ').title():<25} {avg_str:<15} {valid_count}/{total_count}")
+    valid_counts = {metric: np.count_nonzero(~np.isnan(results[metric])) for metric in SCORE_METRICS}
+    averages = format_scores(pd.DataFrame([{metric: np.nanmean(results[metric]) for metric in SCORE_METRICS}])).iloc[0]
+    for metric in SCORE_METRICS:
+        print(f"{metric.replace('_', ' ').title():<25} {averages[metric]:<15} {valid_counts[metric]}/{len(df)}")
     
     # Save final results
     output_file = "ragas_evaluation_results.csv"
@@ -310,11 +538,10 @@ def main():
     # Display sample results
     print("\n📋 Individual Query Results:")
     print("-" * 80)
-    for i in range(min(5, len(df))):
-        print(f"\nQuery {i+1}: {df.iloc[i]['question'][:60]}...")
-        for metric in ["faithfulness", "answer_relevancy", "context_precision", "context_recall"]:
-            val = df.iloc[i][metric]
-            val_str = f"{val:.4f}" if not np.isnan(val) else 'N/A'
+    formatted = format_scores(df.head(5))
+    for i, (question, row) in enumerate(zip(df["question"], formatted.itertuples(index=False))):
+        print(f"\nQuery {i+1}: {question[:60]}...")
+        for metric, val_str in zip(SCORE_METRICS, row):
             print(f"  {metric.replace('_', ' ').title():<20}: {val_str}")
     
     print("\n" + "=" * 80)
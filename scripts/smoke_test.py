@@ -15,10 +15,55 @@ Usage:
 import sys
 import os
 import time
-import pandas as pd
+import orjson
 import requests
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def create_session():
+    """Keep-alive session shared by every API call, with a short retry on connection errors"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = create_session()
+
+
+def post_json(url, body, timeout):
+    """POST body to url as JSON, encoded with orjson rather than requests' stdlib json"""
+    return SESSION.post(url, data=orjson.dumps(body), headers=JSON_HEADERS, timeout=timeout)
+
+
+@lru_cache(maxsize=1)
+def get_opensearch_client():
+    """OpenSearch client for polling and cleanup, created on first use and reused (keeps its connection pool)"""
+    from opensearchpy import OpenSearch
+    return OpenSearch(
+        hosts=["http://localhost:9200"],
+        use_ssl=False,
+        verify_certs=False,
+        pool_maxsize=8
+    )
+
+# wait_for_ingestion polling: first interval, growth per poll, and cap
+POLL_BASE_INTERVAL = 0.1
+POLL_BACKOFF_RATE = 1.6
+POLL_MAX_INTERVAL = 2.0
+
+# Test queries sent to the API at once (pool_maxsize of SESSION allows more)
+QUERY_WORKERS = 4
 
 
 # ANSI color codes for pretty output
@@ -31,31 +76,44 @@ class Colors:
     END = '\033[0m'
 
 
+# Color codes are dropped when output is piped (e.g. to CI logs)
+if not sys.stdout.isatty():
+    for _name in ("GREEN", "RED", "YELLOW", "BLUE", "BOLD", "END"):
+        setattr(Colors, _name, "")
+
+# Line prefixes and ending, built once instead of per message
+_STEP_PREFIX = f"\n{Colors.BLUE}{Colors.BOLD}▶ "
+_SUCCESS_PREFIX = f"{Colors.GREEN}✓ "
+_ERROR_PREFIX = f"{Colors.RED}✗ "
+_WARNING_PREFIX = f"{Colors.YELLOW}⚠ "
+_LINE_END = f"{Colors.END}\n"
+
+
 def print_step(message):
     """Print a step message"""
-    print(f"\n{Colors.BLUE}{Colors.BOLD}▶ {message}{Colors.END}")
+    sys.stdout.write(_STEP_PREFIX + message + _LINE_END)
 
 
 def print_success(message):
     """Print a success message"""
-    print(f"{Colors.GREEN}✓ {message}{Colors.END}")
+    sys.stdout.write(_SUCCESS_PREFIX + message + _LINE_END)
 
 
 def print_error(message):
     """Print an error message"""
-    print(f"{Colors.RED}✗ {message}{Colors.END}")
+    sys.stdout.write(_ERROR_PREFIX + message + _LINE_END)
 
 
 def print_warning(message):
     """Print a warning message"""
-    print(f"{Colors.YELLOW}⚠ {message}{Colors.END}")
+    sys.stdout.write(_WARNING_PREFIX + message + _LINE_END)
 
 
 def check_api_health(base_url):
     """Check if the API is running"""
     print_step("Checking API health")
     try:
-        response = requests.get(f"{base_url}/health", timeout=5)
+        response = SESSION.get(f"{base_url}/health", timeout=5)
         if response.status_code == 200:
             data = response.json()
             print_success(f"API is running at {base_url} (env: {data.get('env', 'unknown')})")
@@ -72,14 +130,14 @@ def check_api_health(base_url):
         return False
 
 
-def create_test_index(base_url, index_name, dimension=256):
-    """Create a test index via API"""
+def create_test_index(base_url, index_name, dimension=256, recreate=True):
+    """Create a test index via API; an existing one is deleted and created again, once"""
     print_step(f"Creating test index: {index_name}")
 
     try:
-        response = requests.post(
+        response = post_json(
             f"{base_url}/api/index/create",
-            json={
+            {
                 "index_name": index_name,
                 "embedding_dim": dimension
             },
@@ -89,11 +147,11 @@ def create_test_index(base_url, index_name, dimension=256):
         if response.status_code == 200:
             print_success(f"Index {index_name} created successfully")
             return True
-        elif response.status_code == 400 and "already exists" in response.text:
+        elif response.status_code == 400 and "already exists" in response.text and recreate:
             print_warning(f"Index {index_name} already exists")
             # Try to delete and recreate
             delete_test_index(base_url, index_name)
-            return create_test_index(base_url, index_name, dimension)
+            return create_test_index(base_url, index_name, dimension, recreate=False)
         else:
             print_error(f"Failed to create index: {response.status_code} - {response.text}")
             return False
@@ -102,20 +160,56 @@ def create_test_index(base_url, index_name, dimension=256):
         return False
 
 
+def _iter_csv_records(f):
+    """
+    Yield the raw bytes of each record (header first) of an open CSV file.
+    A record ends at a newline outside quotes (an even number of quote characters so far),
+    so quoted fields spanning several lines stay whole.
+    """
+    lines = []
+    quotes = 0
+    for line in f:
+        lines.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield b"".join(lines)
+            lines = []
+            quotes = 0
+    if lines:
+        yield b"".join(lines)
+
+
 def prepare_test_csv(csv_path, num_rows=10):
-    """Create a small test CSV file"""
+    """
+    Create a small test CSV file from the first rows of csv_path, copied byte for byte.
+    Records are streamed to the output one at a time, so memory stays flat for any num_rows.
+    """
     print_step(f"Preparing test CSV with {num_rows} rows from {csv_path}")
 
-    # Read original CSV
-    df = pd.read_csv(csv_path, nrows=num_rows)
-    print_success(f"Loaded {len(df)} rows from source CSV")
-
     # Create test CSV in current directory
     test_csv_path = "smoke_test_data.csv"
-    df.to_csv(test_csv_path, index=False)
+    written = 0  # header included
+    record = b""
+    with open(csv_path, "rb") as src, open(test_csv_path, "wb") as out:
+        for record in islice(_iter_csv_records(src), num_rows + 1):
+            out.write(record)
+            written += 1
+        if record and not record.endswith(b"\n"):
+            out.write(b"\n")
+    num_rows_written = max(written - 1, 0)
+    print_success(f"Loaded {num_rows_written} rows from source CSV")
     print_success(f"Created test CSV: {test_csv_path}")
 
-    return test_csv_path, len(df)
+    return test_csv_path, num_rows_written
+
+
+def cleanup_test_csv(path: Path):
+    """Remove the test CSV in one unlink (no exists check); a failure is reported, not raised"""
+    try:
+        path.unlink(missing_ok=True)
+        print_success(f"Cleaned up test CSV: {path}")
+    except OSError as e:
+        print_warning(f"Could not remove test CSV {path}: {e}")
 
 
 def ingest_test_data(base_url, index_name, csv_path):
@@ -123,9 +217,9 @@ def ingest_test_data(base_url, index_name, csv_path):
     print_step(f"Starting ingestion from {csv_path}")
 
     try:
-        response = requests.post(
+        response = post_json(
             f"{base_url}/api/ingest/start",
-            json={
+            {
                 "csv_path": csv_path,
                 "index_name": index_name,
                 "doc_id_col": "id",
@@ -152,105 +246,114 @@ def wait_for_ingestion(base_url, index_name, expected_min_docs=1, max_wait=60):
     """Poll the index to check if documents have been ingested"""
     print_step(f"Waiting for ingestion to complete (max {max_wait}s)...")
 
-    from opensearchpy import OpenSearch
-    client = OpenSearch(
-        hosts=["http://localhost:9200"],
-        use_ssl=False,
-        verify_certs=False
-    )
+    client = get_opensearch_client()
 
-    start_time = time.time()
-    while time.time() - start_time < max_wait:
+    # poll quickly at first, backing off to POLL_MAX_INTERVAL; counts see new docs after the
+    # index's periodic refresh, so each poll is a single _cat/count call without forcing a refresh
+    interval = POLL_BASE_INTERVAL
+    deadline = time.time() + max_wait
+    while time.time() < deadline:
         try:
-            # Check document count in index
-            client.indices.refresh(index=index_name)
-            count_response = client.count(index=index_name)
-            doc_count = count_response['count']
+            doc_count = int(client.cat.count(index=index_name, params={"format": "json", "h": "count"})[0]["count"])
 
             if doc_count >= expected_min_docs:
                 print_success(f"Ingestion complete! {doc_count} documents indexed")
                 return doc_count
 
-            # Wait a bit before checking again
-            time.sleep(2)
             print(f"  {Colors.BLUE}⏳ Waiting... ({doc_count} docs so far){Colors.END}", end='\r')
+            time.sleep(max(0, min(interval, deadline - time.time())))
+            interval = min(interval * POLL_BACKOFF_RATE, POLL_MAX_INTERVAL)
 
         except Exception as e:
             print_warning(f"Error checking index: {str(e)}")
-            time.sleep(2)
+            time.sleep(max(0, min(POLL_MAX_INTERVAL, deadline - time.time())))
+            interval = POLL_BASE_INTERVAL
 
     print_error(f"Timeout waiting for ingestion after {max_wait}s")
     return 0
 
 
-def run_test_queries(base_url, index_name):
-    """Run test queries via API and verify results"""
-    print_step("Running test queries")
+def _run_one_query(base_url, index_name, i, query, category):
+    """
+    Run one test query and check its results and answer.
+    Returns (passed, output) where output is the (printer, message) lines to show for it.
+    """
+    output = [(print, f"\n  Query {i}: '{query}'" + (f" [category: {category}]" if category else ""))]
 
-    test_queries = [
-        ("What are unit testing strategies?", "programming"),
-        ("Tell me about AI privacy", "technology"),
-        ("How to earn passive income?", "finance"),
-        ("Explain batching strategies", None),  # No category filter
-    ]
+    try:
+        # Prepare request payload
+        payload = {
+            "index_name": index_name,
+            "query": query,
+            "top_k": 3
+        }
+        # if category:
+        #     payload["category"] = category
+
+        # Call search API
+        response = post_json(
+            f"{base_url}/api/search/query",
+            payload,
+            timeout=60  # Longer timeout for LLM generation
+        )
 
-    results = []
+        if response.status_code != 200:
+            output.append((print_error, f"    API returned status {response.status_code}: {response.text}"))
+            return False, output
 
-    for i, (query, category) in enumerate(test_queries, 1):
-        print(f"\n  Query {i}: '{query}'" + (f" [category: {category}]" if category else ""))
+        result = orjson.loads(response.content)
 
-        try:
-            # Prepare request payload
-            payload = {
-                "index_name": index_name,
-                "query": query,
-                "top_k": 3
-            }
-            # if category:
-            #     payload["category"] = category
-
-            # Call search API
-            response = requests.post(
-                f"{base_url}/api/search/query",
-                json=payload,
-                timeout=60  # Longer timeout for LLM generation
-            )
-
-            if response.status_code != 200:
-                print_error(f"    API returned status {response.status_code}: {response.text}")
-                results.append(False)
-                continue
+        # Verify search results (API returns 'contexts' not 'results')
+        search_results = result.get('contexts', [])
+        if not search_results:
+            output.append((print_error, f"    No search results returned"))
+            return False, output
 
-            result = response.json()
+        output.append((print_success, f"    Found {len(search_results)} results"))
+        top_result = search_results[0]
+        output.append((print, f"    Top result: '{top_result.get('title', 'N/A')}' (score: {top_result.get('score', 0):.3f})"))
 
-            # Verify search results (API returns 'contexts' not 'results')
-            search_results = result.get('contexts', [])
-            if not search_results:
-                print_error(f"    No search results returned")
-                results.append(False)
-                continue
+        # Verify RAG answer
+        answer = result.get('answer', '')
+        if not answer:
+            output.append((print_error, f"    No answer generated"))
+            return False, output
 
-            print_success(f"    Found {len(search_results)} results")
-            top_result = search_results[0]
-            print(f"    Top result: '{top_result.get('title', 'N/A')}' (score: {top_result.get('score', 0):.3f})")
+        output.append((print_success, f"    Generated answer ({len(answer)} chars)"))
+        return True, output
 
-            # Verify RAG answer
-            answer = result.get('answer', '')
-            if not answer:
-                print_error(f"    No answer generated")
-                results.append(False)
-                continue
+    except requests.exceptions.Timeout:
+        output.append((print_error, f"    Query timed out (LLM generation may be slow)"))
+    except Exception as e:
+        output.append((print_error, f"    Query failed: {str(e)}"))
+    return False, output
 
-            print_success(f"    Generated answer ({len(answer)} chars)")
 
-            results.append(True)
+def run_test_queries(base_url, index_name):
+    """Run test queries via API concurrently and verify results; results are in query order"""
+    print_step("Running test queries")
 
-        except requests.exceptions.Timeout:
-            print_error(f"    Query timed out (LLM generation may be slow)")
-            results.append(False)
-        except Exception as e:
-            print_error(f"    Query failed: {str(e)}")
-            results.append(False)
+    test_queries = [
+        ("What are unit testing strategies?", "programming"),
+        ("Tell me about AI privacy", "technology"),
+        ("How to earn passive income?", "finance"),
+        ("Explain batching strategies", None),  # No category filter
+    ]
+
+    results = [False] * len(test_queries)
+
+    # the queries are independent and wait on server-side generation, so they share the pooled session
+    with ThreadPoolExecutor(max_workers=QUERY_WORKERS) as executor:
+        futures = {
+            executor.submit(_run_one_query, base_url, index_name, i, query, category): i
+            for i, (query, category) in enumerate(test_queries, 1)
+        }
+        for future in as_completed(futures):
+            passed, output = future.result()
+            results[futures[future] - 1] = passed
+            # only this thread prints, so each query's lines stay together (in the order queries finish)
+            for printer, message in output:
+                printer(message)
 
     return results
 
@@ -262,15 +365,11 @@ def delete_test_index(base_url, index_name):
     try:
         # We need to use OpenSearch client directly for deletion
         # since there's no delete endpoint in the API
-        from opensearchpy import OpenSearch
-        client = OpenSearch(
-            hosts=["http://localhost:9200"],
-            use_ssl=False,
-            verify_certs=False
-        )
+        client = get_opensearch_client()
 
-        if client.indices.exists(index=index_name):
-            client.indices.delete(index=index_name)
+        # one round trip: a missing index comes back as a 404 body instead of an error
+        response = client.indices.delete(index=index_name, ignore=404)
+        if response.get("acknowledged"):
             print_success(f"Index {index_name} deleted")
         else:
             print_warning(f"Index {index_name} does not exist")
@@ -290,6 +389,12 @@ def main():
                         help='Number of rows to ingest (default: 10)')
     args = parser.parse_args()
 
+    with SESSION:
+        return run_smoke_test(args)
+
+
+def run_smoke_test(args):
+    """Run every smoke test step against the API; returns the process exit code"""
     print(f"\n{Colors.BOLD}{'='*60}")
     print(f"  RAG Playground - Smoke Test")
     print(f"{'='*60}{Colors.END}\n")
@@ -369,8 +474,6 @@ def main():
         print_warning("\n\nTest interrupted by user")
         try:
             delete_test_index(base_url, test_index)
-            if test_csv_path and os.path.exists(test_csv_path):
-                os.unlink(test_csv_path)
         except:
             pass
         return 1
@@ -382,20 +485,14 @@ def main():
         # Try to cleanup on error
         try:
             delete_test_index(base_url, test_index)
-            if test_csv_path and os.path.exists(test_csv_path):
-                os.unlink(test_csv_path)
         except:
             pass
 
         return 1
     finally:
         # Always cleanup test CSV
-        if test_csv_path and os.path.exists(test_csv_path):
-            try:
-                os.unlink(test_csv_path)
-                print_success(f"Cleaned up test CSV: {test_csv_path}")
-            except:
-                pass
+        if test_csv_path:
+            cleanup_test_csv(Path(test_csv_path))
 
 
 if __name__ == "__main__":
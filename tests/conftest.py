@@ -1,15 +1,67 @@
 """
 Pytest configuration and shared fixtures
 """
+import copy
 import pytest
 import sys
 import os
 from unittest.mock import Mock, MagicMock
-from fastapi import FastAPI
-from fastapi.testclient import TestClient
+import pytest_asyncio
 
-# Add app to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add app to path (once, however often conftest is collected)
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+
+@pytest.fixture(autouse=True)
+def clear_existence_cache():
+    """Reset cached index existence checks between tests"""
+    from app.core import existence_cache
+    existence_cache.clear()
+    yield
+    existence_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_embedding_cache():
+    """Reset the in-process embedding cache between tests"""
+    from app.embeddings.ollama_api_embedder import embedding_cache
+    embedding_cache.clear()
+    yield
+    embedding_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_service_singletons():
+    """Drop shared embedder/generator instances so each test sees its own patches"""
+    from app.services import deps
+    factories = [deps.embedder, deps.generator]
+    for factory in factories:
+        factory.cache_clear()
+    yield
+    for factory in factories:
+        factory.cache_clear()
+
+
+# Search response every mock client starts with; copied per test
+_DEFAULT_SEARCH_RESPONSE = {
+    "hits": {
+        "hits": [
+            {
+                "_id": "test-id-1",
+                "_score": 0.95,
+                "_source": {
+                    "doc_id": "doc-1",
+                    "chunk_id": "chunk-1",
+                    "title": "Test Title",
+                    "category": "test",
+                    "text_snippet": "This is a test snippet"
+                }
+            }
+        ]
+    }
+}
 
 
 @pytest.fixture
@@ -18,26 +70,21 @@ def mock_opensearch_client():
     client = MagicMock()
     client.indices.exists.return_value = False
     client.indices.create.return_value = {"acknowledged": True}
-    client.search.return_value = {
-        "hits": {
-            "hits": [
-                {
-                    "_id": "test-id-1",
-                    "_score": 0.95,
-                    "_source": {
-                        "doc_id": "doc-1",
-                        "chunk_id": "chunk-1",
-                        "title": "Test Title",
-                        "category": "test",
-                        "text_snippet": "This is a test snippet"
-                    }
-                }
-            ]
-        }
-    }
+    client.search.return_value = copy.deepcopy(_DEFAULT_SEARCH_RESPONSE)
     return client
 
 
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def async_client(app):
+    """
+    httpx client calling the module's FastAPI app in-process over ASGI, shared by the module's tests.
+    Test modules using it define an app fixture and run on the module event loop.
+    """
+    import httpx
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
 @pytest.fixture
 def mock_request(mock_opensearch_client):
     """Mock FastAPI Request object"""
@@ -46,9 +93,9 @@ def mock_request(mock_opensearch_client):
     return request
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_contexts():
-    """Sample context data for testing"""
+    """Sample context data for testing (shared, so tests must not modify it)"""
     return [
         {
             "id": "chunk-1",
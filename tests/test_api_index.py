@@ -2,36 +2,57 @@
 Unit tests for index API endpoints
 """
 import pytest
+import pytest_asyncio
 from fastapi import FastAPI
-from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
+from opensearchpy.exceptions import RequestError
 from app.api.index import router, CreateIndexRequest
 
+# every test runs on the module's event loop, like the shared async_client
+pytestmark = pytest.mark.asyncio(loop_scope="module")
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def app():
-    """Create FastAPI app for testing"""
+    """Create FastAPI app for testing, once per module"""
     app = FastAPI()
     app.include_router(router, prefix="/api/index")
     return app
 
 
 @pytest.fixture
-def client(app, mock_opensearch_client):
+def client(app, async_client, mock_opensearch_client):
     """Create test client with mocked OpenSearch"""
+    app.dependency_overrides.clear()
     app.state.opensearch_client = mock_opensearch_client
-    return TestClient(app)
+    return async_client
+
+
+@pytest_asyncio.fixture(scope="class", loop_scope="module")
+async def created_mapping(app, async_client):
+    """Index body sent to OpenSearch for one 256-dim create request, shared by the mapping tests"""
+    opensearch_client = MagicMock()
+    opensearch_client.indices.exists.return_value = False
+    app.state.opensearch_client = opensearch_client
+
+    await async_client.post(
+        "/api/index/create",
+        json={"index_name": "mapping-index", "embedding_dim": 256}
+    )
+
+    opensearch_client.indices.create.assert_called_once()
+    return opensearch_client.indices.create.call_args[1]['body']
 
 
 class TestCreateIndex:
     """Test cases for create index endpoint"""
 
-    def test_create_index_success(self, client, mock_opensearch_client):
+    async def test_create_index_success(self, client, mock_opensearch_client):
         """Test successful index creation"""
         mock_opensearch_client.indices.exists.return_value = False
         mock_opensearch_client.indices.create.return_value = {"acknowledged": True}
         
-        response = client.post(
+        response = await client.post(
             "/api/index/create",
             json={"index_name": "test-index", "embedding_dim": 256}
         )
@@ -41,11 +62,11 @@ class TestCreateIndex:
         assert data["ok"] is True
         assert data["index"] == "test-index"
 
-    def test_create_index_already_exists(self, client, mock_opensearch_client):
+    async def test_create_index_already_exists(self, client, mock_opensearch_client):
         """Test creating index that already exists"""
         mock_opensearch_client.indices.exists.return_value = True
         
-        response = client.post(
+        response = await client.post(
             "/api/index/create",
             json={"index_name": "existing-index", "embedding_dim": 256}
         )
@@ -53,21 +74,50 @@ class TestCreateIndex:
         assert response.status_code == 400
         assert "already exists" in response.json()["detail"]
 
-    def test_create_index_invalid_request(self, client):
+    async def test_create_index_ignores_cached_existence(self, client, mock_opensearch_client):
+        """Test that an index deleted outside the API can be created again right away"""
+        from app.core import existence_cache
+        mock_opensearch_client.indices.exists.return_value = True
+        assert existence_cache.index_exists(mock_opensearch_client, "test-index")
+        mock_opensearch_client.indices.exists.return_value = False
+
+        response = await client.post(
+            "/api/index/create",
+            json={"index_name": "test-index", "embedding_dim": 256}
+        )
+
+        assert response.status_code == 200
+
+    async def test_create_index_concurrently_created(self, client, mock_opensearch_client):
+        """Test that losing a creation race reports the index as existing"""
+        mock_opensearch_client.indices.exists.return_value = False
+        mock_opensearch_client.indices.create.side_effect = RequestError(
+            400, "resource_already_exists_exception", {}
+        )
+
+        response = await client.post(
+            "/api/index/create",
+            json={"index_name": "test-index", "embedding_dim": 256}
+        )
+
+        assert response.status_code == 400
+        assert "already exists" in response.json()["detail"]
+
+    async def test_create_index_invalid_request(self, client):
         """Test creating index with invalid request"""
-        response = client.post(
+        response = await client.post(
             "/api/index/create",
             json={"index_name": "test"}  # Missing embedding_dim
         )
         
         assert response.status_code == 422  # Validation error
 
-    def test_create_index_opensearch_error(self, client, mock_opensearch_client):
+    async def test_create_index_opensearch_error(self, client, mock_opensearch_client):
         """Test index creation with OpenSearch error"""
         mock_opensearch_client.indices.exists.return_value = False
         mock_opensearch_client.indices.create.side_effect = Exception("OpenSearch error")
         
-        response = client.post(
+        response = await client.post(
             "/api/index/create",
             json={"index_name": "test-index", "embedding_dim": 256}
         )
@@ -75,61 +125,35 @@ class TestCreateIndex:
         assert response.status_code == 500
         assert "OpenSearch error" in response.json()["detail"]
 
-    def test_create_index_mapping_structure(self, client, mock_opensearch_client):
+    async def test_create_index_mapping_structure(self, created_mapping):
         """Test that index mapping is created with correct structure"""
-        mock_opensearch_client.indices.exists.return_value = False
-        
-        client.post(
-            "/api/index/create",
-            json={"index_name": "test-index", "embedding_dim": 256}
-        )
-        
-        # Verify create was called
-        mock_opensearch_client.indices.create.assert_called_once()
-        call_args = mock_opensearch_client.indices.create.call_args
-        
-        # Check mapping structure
-        mapping = call_args[1]['body']
-        assert 'settings' in mapping
-        assert 'mappings' in mapping
-        assert mapping['settings']['index']['knn'] is True
+        assert 'settings' in created_mapping
+        assert 'mappings' in created_mapping
+        assert created_mapping['settings']['index']['knn'] is True
         
         # Check properties
-        props = mapping['mappings']['properties']
+        props = created_mapping['mappings']['properties']
         assert 'embedding' in props
         assert props['embedding']['type'] == 'knn_vector'
         assert props['embedding']['dimension'] == 256
 
-    def test_create_index_knn_configuration(self, client, mock_opensearch_client):
+    async def test_create_index_knn_configuration(self, created_mapping):
         """Test k-NN configuration in index"""
-        mock_opensearch_client.indices.exists.return_value = False
-        
-        client.post(
-            "/api/index/create",
-            json={"index_name": "test-index", "embedding_dim": 512}
-        )
-        
-        call_args = mock_opensearch_client.indices.create.call_args
-        mapping = call_args[1]['body']
-        
         # Check k-NN method configuration
-        embedding_config = mapping['mappings']['properties']['embedding']
+        embedding_config = created_mapping['mappings']['properties']['embedding']
         assert embedding_config['method']['name'] == 'hnsw'
         assert embedding_config['method']['space_type'] == 'cosinesimil'
         assert embedding_config['method']['engine'] == 'faiss'
-        assert embedding_config['dimension'] == 512
 
-    def test_create_index_field_types(self, client, mock_opensearch_client):
+    async def test_create_index_fp16_encoder(self, created_mapping):
+        """Test that vectors are stored with the fp16 scalar quantizer"""
+        encoder = created_mapping['mappings']['properties']['embedding']['method']['parameters']['encoder']
+        assert encoder['name'] == 'sq'
+        assert encoder['parameters']['type'] == 'fp16'
+
+    async def test_create_index_field_types(self, created_mapping):
         """Test that all required fields are in mapping"""
-        mock_opensearch_client.indices.exists.return_value = False
-        
-        client.post(
-            "/api/index/create",
-            json={"index_name": "test-index", "embedding_dim": 256}
-        )
-        
-        call_args = mock_opensearch_client.indices.create.call_args
-        props = call_args[1]['body']['mappings']['properties']
+        props = created_mapping['mappings']['properties']
         
         # Verify all required fields
         assert props['doc_id']['type'] == 'keyword'
@@ -140,16 +164,18 @@ class TestCreateIndex:
         assert props['text_snippet']['type'] == 'text'
         assert props['created_at']['type'] == 'date'
 
-    def test_create_index_different_dimensions(self, client, mock_opensearch_client):
+    @pytest.mark.parametrize("dim", [128, 256, 512, 1024])
+    async def test_create_index_different_dimensions(self, client, mock_opensearch_client, dim):
         """Test creating indices with different embedding dimensions"""
         mock_opensearch_client.indices.exists.return_value = False
         
-        for dim in [128, 256, 512, 1024]:
-            client.post(
-                "/api/index/create",
-                json={"index_name": f"test-index-{dim}", "embedding_dim": dim}
-            )
+        response = await client.post(
+            "/api/index/create",
+            json={"index_name": f"test-index-{dim}", "embedding_dim": dim}
+        )
         
-        # Verify all were created
-        assert mock_opensearch_client.indices.create.call_count == 4
+        assert response.status_code == 200
+        mock_opensearch_client.indices.create.assert_called_once()
+        mapping = mock_opensearch_client.indices.create.call_args[1]['body']
+        assert mapping['mappings']['properties']['embedding']['dimension'] == dim
 
@@ -3,24 +3,27 @@ Unit tests for search API endpoints
 """
 import pytest
 from fastapi import FastAPI
-from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from app.api.search import router
 
+# every test runs on the module's event loop, like the shared async_client
+pytestmark = pytest.mark.asyncio(loop_scope="module")
 
-@pytest.fixture
+
+@pytest.fixture(scope="module")
 def app():
-    """Create FastAPI app for testing"""
+    """Create FastAPI app for testing, once per module"""
     app = FastAPI()
     app.include_router(router, prefix="/api/search")
     return app
 
 
 @pytest.fixture
-def client(app, mock_opensearch_client):
+def client(app, async_client, mock_opensearch_client):
     """Create test client with mocked OpenSearch"""
+    app.dependency_overrides.clear()
     app.state.opensearch_client = mock_opensearch_client
-    return TestClient(app)
+    return async_client
 
 
 class TestSearchQuery:
@@ -46,11 +49,11 @@ class TestSearchQuery:
             }
             yield mock
 
-    def test_query_success(self, client, mock_opensearch_client, mock_rag_answer):
+    async def test_query_success(self, client, mock_opensearch_client, mock_rag_answer):
         """Test successful query"""
         mock_opensearch_client.indices.exists.return_value = True
         
-        response = client.post(
+        response = await client.post(
             "/api/search/query",
             json={
                 "index_name": "test-index",
@@ -65,11 +68,11 @@ class TestSearchQuery:
         assert "answer" in data
         assert "contexts" in data
 
-    def test_query_index_not_found(self, client, mock_opensearch_client):
+    async def test_query_index_not_found(self, client, mock_opensearch_client):
         """Test query with non-existent index"""
         mock_opensearch_client.indices.exists.return_value = False
         
-        response = client.post(
+        response = await client.post(
             "/api/search/query",
             json={
                 "index_name": "nonexistent-index",
@@ -81,11 +84,11 @@ class TestSearchQuery:
         assert response.status_code == 400
         assert "not found" in response.json()["detail"]
 
-    def test_query_with_category_filter(self, client, mock_opensearch_client, mock_rag_answer):
+    async def test_query_with_category_filter(self, client, mock_opensearch_client, mock_rag_answer):
         """Test query with category filter"""
         mock_opensearch_client.indices.exists.return_value = True
         
-        response = client.post(
+        response = await client.post(
             "/api/search/query",
             json={
                 "index_name": "test-index",
@@ -101,43 +104,23 @@ class TestSearchQuery:
         call_args = mock_rag_answer.call_args
         assert call_args[1]['filter_category'] == "technology"
 
-    def test_query_default_top_k(self, client, mock_opensearch_client, mock_rag_answer):
-        """Test query with default top_k"""
+    @pytest.mark.parametrize("top_k, expected", [(None, 5), (10, 10)])
+    async def test_query_top_k(self, client, mock_opensearch_client, mock_rag_answer, top_k, expected):
+        """Test query with default (5) and custom top_k"""
         mock_opensearch_client.indices.exists.return_value = True
+        payload = {"index_name": "test-index", "query": "What is ML?"}
+        if top_k is not None:
+            payload["top_k"] = top_k
         
-        response = client.post(
-            "/api/search/query",
-            json={
-                "index_name": "test-index",
-                "query": "What is ML?"
-            }
-        )
-        
-        assert response.status_code == 200
-        # Verify default top_k is 5
-        call_args = mock_rag_answer.call_args
-        assert call_args[1]['top_k'] == 5
-
-    def test_query_custom_top_k(self, client, mock_opensearch_client, mock_rag_answer):
-        """Test query with custom top_k"""
-        mock_opensearch_client.indices.exists.return_value = True
-        
-        response = client.post(
-            "/api/search/query",
-            json={
-                "index_name": "test-index",
-                "query": "What is ML?",
-                "top_k": 10
-            }
-        )
+        response = await client.post("/api/search/query", json=payload)
         
         assert response.status_code == 200
         call_args = mock_rag_answer.call_args
-        assert call_args[1]['top_k'] == 10
+        assert call_args[1]['top_k'] == expected
 
-    def test_query_missing_required_fields(self, client):
+    async def test_query_missing_required_fields(self, client):
         """Test query with missing required fields"""
-        response = client.post(
+        response = await client.post(
             "/api/search/query",
             json={
                 "index_name": "test-index"
@@ -147,11 +130,11 @@ class TestSearchQuery:
         
         assert response.status_code == 422  # Validation error
 
-    def test_query_empty_query_string(self, client, mock_opensearch_client, mock_rag_answer):
+    async def test_query_empty_query_string(self, client, mock_opensearch_client, mock_rag_answer):
         """Test query with empty query string"""
         mock_opensearch_client.indices.exists.return_value = True
         
-        response = client.post(
+        response = await client.post(
             "/api/search/query",
             json={
                 "index_name": "test-index",
@@ -163,11 +146,11 @@ class TestSearchQuery:
         # Should still process (validation allows empty string)
         assert response.status_code == 200
 
-    def test_query_response_structure(self, client, mock_opensearch_client, mock_rag_answer):
+    async def test_query_response_structure(self, client, mock_opensearch_client, mock_rag_answer):
         """Test that response has correct structure"""
         mock_opensearch_client.indices.exists.return_value = True
         
-        response = client.post(
+        response = await client.post(
             "/api/search/query",
             json={
                 "index_name": "test-index",
@@ -190,11 +173,11 @@ class TestSearchQuery:
             assert "category" in context
             assert "text_snippet" in context
 
-    def test_query_rag_answer_called_correctly(self, client, mock_opensearch_client, mock_rag_answer):
+    async def test_query_rag_answer_called_correctly(self, client, mock_opensearch_client, mock_rag_answer):
         """Test that rag_answer is called with correct parameters"""
         mock_opensearch_client.indices.exists.return_value = True
         
-        client.post(
+        await client.post(
             "/api/search/query",
             json={
                 "index_name": "test-index",
@@ -0,0 +1,171 @@
+"""
+Unit tests for csv_utils module
+"""
+import pytest
+import pandas as pd
+from app.utils import csv_utils
+from app.utils.csv_utils import peek_csv_header, missing_columns, iter_csv_batches, iter_text_rows
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    """Small CSV with a quoted header column"""
+    path = tmp_path / "data.csv"
+    path.write_text('id,title,"category",text\n1,Title,tech,"Some, text"\n', encoding="utf-8")
+    return str(path)
+
+
+class TestPeekCsvHeader:
+    """Test cases for CSV header helpers"""
+
+    def test_peek_header(self, csv_file):
+        """Test that only the header row is returned"""
+        assert peek_csv_header(csv_file) == ["id", "title", "category", "text"]
+
+    def test_peek_header_bom(self, tmp_path):
+        """Test that a UTF-8 BOM does not end up in the first column name"""
+        path = tmp_path / "bom.csv"
+        path.write_bytes("﻿id,text\n1,a\n".encode("utf-8"))
+        assert peek_csv_header(str(path)) == ["id", "text"]
+
+    def test_peek_header_empty_file(self, tmp_path):
+        """Test that an empty file has no columns"""
+        path = tmp_path / "empty.csv"
+        path.write_text("")
+        assert peek_csv_header(str(path)) == []
+
+    def test_peek_header_missing_file(self, tmp_path):
+        """Test that a missing file raises"""
+        with pytest.raises(OSError):
+            peek_csv_header(str(tmp_path / "missing.csv"))
+
+    def test_missing_columns(self, csv_file):
+        """Test that absent columns are reported in request order"""
+        assert missing_columns(csv_file, ["id", "body", "text", "tags"]) == ["body", "tags"]
+        assert missing_columns(csv_file, ["id", "title", "category", "text"]) == []
+
+
+class TestIterTextRows:
+    """Test cases for the vectorized CSV row iterator"""
+
+    def test_skips_empty_text(self):
+        """Test that missing, blank and 'nan' texts are dropped"""
+        df = pd.DataFrame({
+            'id': ['1', '2', '3', '4', '5'],
+            'title': ['T1', 'T2', 'T3', 'T4', 'T5'],
+            'category': ['a', 'b', 'c', 'd', 'e'],
+            'text': ['Valid text', None, '   ', 'NaN', 'More text']
+        })
+
+        rows = list(iter_text_rows(df, 'id', 'title', 'category', 'text'))
+
+        assert rows == [('1', 'T1', 'a', 'Valid text'), ('5', 'T5', 'e', 'More text')]
+
+    def test_missing_doc_id_gets_uuid(self):
+        """Test that rows without an id get a generated one instead of 'nan'"""
+        df = pd.DataFrame({'id': [None, '2'], 'text': ['first', 'second']})
+
+        rows = list(iter_text_rows(df, 'id', 'title', 'category', 'text'))
+
+        assert rows[0][0] != 'nan' and len(rows[0][0]) == 36
+        assert rows[1][0] == '2'
+
+    def test_missing_optional_columns(self):
+        """Test that absent title/category columns default to empty strings"""
+        df = pd.DataFrame({'text': ['only text']})
+
+        rows = list(iter_text_rows(df, 'id', 'title', 'category', 'text'))
+
+        assert len(rows) == 1
+        assert rows[0][1:] == ('', '', 'only text')
+
+    def test_missing_text_column(self):
+        """Test that a frame without the text column yields nothing"""
+        df = pd.DataFrame({'id': ['1']})
+        assert list(iter_text_rows(df, 'id', 'title', 'category', 'text')) == []
+
+
+class TestIterCsvBatches:
+    """Test cases for the streaming CSV reader"""
+
+    @pytest.fixture(autouse=True, params=["pandas", "pyarrow"])
+    def reader(self, request, monkeypatch):
+        """Run each case with pandas and, when installed, with the pyarrow reader"""
+        if request.param == "pandas":
+            monkeypatch.setattr(csv_utils, "pacsv", None)
+        elif csv_utils.pacsv is None:
+            pytest.skip("pyarrow not installed")
+        return request.param
+
+    @pytest.fixture
+    def numbered_csv(self, tmp_path):
+        """CSV with numeric ids and one missing id"""
+        path = tmp_path / "numbered.csv"
+        path.write_text("id,text\n1,a\n,b\n3,c\n4,d\n5,e\n", encoding="utf-8")
+        return str(path)
+
+    def test_batches_bounded(self, numbered_csv):
+        """Test that rows arrive in frames of at most batch_size"""
+        sizes = [len(df) for df in iter_csv_batches(numbered_csv, 2)]
+        assert sizes == [2, 2, 1]
+
+    def test_start_row_skips_data_rows(self, numbered_csv):
+        """Test that resuming skips leading data rows but keeps the header"""
+        frames = list(iter_csv_batches(numbered_csv, 10, start_row=3))
+        assert frames[0]['text'].tolist() == ['d', 'e']
+
+    def test_columns_limit_parsing(self, tmp_path):
+        """Test that only the requested columns are read and missing ones are ignored"""
+        path = tmp_path / "wide.csv"
+        path.write_text("id,extra,text\n1,x,a\n", encoding="utf-8")
+        df = next(iter_csv_batches(str(path), 10, columns=('id', 'title', 'category', 'text')))
+        assert list(df.columns) == ['id', 'text']
+
+    def test_doc_ids_read_as_strings(self, numbered_csv):
+        """Test that numeric ids next to a missing one are not read as floats"""
+        df = next(iter_csv_batches(numbered_csv, 10))
+        rows = list(iter_text_rows(df, 'id', 'title', 'category', 'text'))
+        assert [r[0] for r in rows][2:] == ['3', '4', '5']
+        assert rows[0][0] == '1'
+
+    def test_wide_file_selected_columns(self, tmp_path):
+        """Test that a wide file yields only the requested columns, in every frame"""
+        path = tmp_path / "wide.csv"
+        extra = [f"x{i}" for i in range(50)]
+        lines = [",".join(["id", *extra, "title", "text"])]
+        lines += [",".join([str(i), *["1"] * 50, f"T{i}", f"text {i}"]) for i in range(7)]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+        frames = list(iter_csv_batches(str(path), 3, columns=('id', 'title', 'category', 'text')))
+
+        assert [len(df) for df in frames] == [3, 3, 1]
+        assert all(list(df.columns) == ['id', 'title', 'text'] for df in frames)
+        assert frames[2]['text'].tolist() == ['text 6']
+
+    def test_late_text_in_numeric_looking_column(self, tmp_path, monkeypatch):
+        """Test that a column that looks numeric early and holds text later is read throughout"""
+        monkeypatch.setattr(csv_utils, "ARROW_BLOCK_SIZE", 64)
+        path = tmp_path / "late.csv"
+        rows = [f"{i},{i},body {i}" for i in range(20)] + ["20,Chapter twenty,body 20"]
+        path.write_text("id,title,text\n" + "\n".join(rows) + "\n", encoding="utf-8")
+
+        frames = list(iter_csv_batches(str(path), 8))
+
+        titles = [t for df in frames for t in df['title'].tolist()]
+        assert len(titles) == 21
+        assert titles[-1] == 'Chapter twenty'
+
+    def test_na_text_dropped(self, tmp_path):
+        """Test that NA markers in the text column are missing values, not chunk text"""
+        path = tmp_path / "na.csv"
+        path.write_text("id,text\n1,NA\n2,null\n3,N/A\n4,real text\n", encoding="utf-8")
+
+        df = next(iter_csv_batches(str(path), 10))
+        rows = list(iter_text_rows(df, 'id', 'title', 'category', 'text'))
+
+        assert [r[3] for r in rows] == ['real text']
+
+    def test_batch_size_must_be_positive(self, numbered_csv):
+        """Test that a batch size below 1 is rejected"""
+        with pytest.raises(ValueError, match="batch_size"):
+            next(iter_csv_batches(numbered_csv, 0))
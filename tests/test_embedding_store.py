@@ -0,0 +1,77 @@
+"""
+Unit tests for the persistent embedding stores
+"""
+import numpy as np
+from unittest.mock import MagicMock
+from app.db.embedding_store import MongoEmbeddingStore, SqliteEmbeddingStore
+
+
+class TestMongoEmbeddingStore:
+    """Test cases for the persistent embedding cache"""
+
+    def test_round_trip_float16(self):
+        """Test that vectors are written as float16 bytes and read back as float32"""
+        mongo_client = MagicMock()
+        store = MongoEmbeddingStore(mongo_client)
+        vec = np.array([0.1, 0.2, 0.3], dtype="float32")
+
+        store.put_many({"key-1": vec}, "nomic-embed-text:v1.5", 3)
+
+        op = store.collection.bulk_write.call_args[0][0][0]
+        doc = op._doc["$setOnInsert"]
+        assert len(doc["vec"]) == 3 * 2  # float16
+        store.collection.find.return_value = [{"_id": "key-1", "vec": doc["vec"]}]
+
+        found = store.get_many(["key-1"])
+        assert found["key-1"].dtype == np.float32
+        np.testing.assert_allclose(found["key-1"], vec, atol=1e-3)
+
+    def test_get_many_empty(self):
+        """Test that no query is sent for an empty key list"""
+        store = MongoEmbeddingStore(MagicMock())
+        assert store.get_many([]) == {}
+        store.collection.find.assert_not_called()
+
+    def test_lookup_failure_is_a_miss(self):
+        """Test that a MongoDB error degrades to cache misses"""
+        store = MongoEmbeddingStore(MagicMock())
+        store.collection.find.side_effect = Exception("connection refused")
+        assert store.get_many(["key-1"]) == {}
+
+
+class TestSqliteEmbeddingStore:
+    """Test cases for the local SQLite embedding cache"""
+
+    def test_round_trip_float32(self, tmp_path):
+        """Test that vectors are read back exactly, across store instances"""
+        path = str(tmp_path / "cache.db")
+        vec = np.array([0.1, 0.2, 0.3], dtype="float32")
+
+        SqliteEmbeddingStore(path).put_many({"key-1": vec}, "nomic-embed-text:v1.5", 3)
+        found = SqliteEmbeddingStore(path).get_many(["key-1", "key-2"])
+
+        assert list(found) == ["key-1"]
+        assert found["key-1"].dtype == np.float32
+        np.testing.assert_array_equal(found["key-1"], vec)
+
+    def test_existing_key_not_overwritten(self, tmp_path):
+        """Test that the first stored vector for a key wins"""
+        store = SqliteEmbeddingStore(str(tmp_path / "cache.db"))
+
+        store.put_many({"key-1": np.ones(2, dtype="float32")}, "m", 2)
+        store.put_many({"key-1": np.zeros(2, dtype="float32")}, "m", 2)
+
+        np.testing.assert_array_equal(store.get_many(["key-1"])["key-1"], [1.0, 1.0])
+
+    def test_many_keys(self, tmp_path):
+        """Test that large lookups are split under the SQLite parameter limit"""
+        store = SqliteEmbeddingStore(str(tmp_path / "cache.db"))
+        vectors = {f"key-{i}": np.full(2, i, dtype="float32") for i in range(1200)}
+
+        store.put_many(vectors, "m", 2)
+
+        assert len(store.get_many(list(vectors))) == 1200
+
+    def test_get_many_empty(self, tmp_path):
+        """Test that an empty key list returns nothing"""
+        assert SqliteEmbeddingStore(str(tmp_path / "cache.db")).get_many([]) == {}
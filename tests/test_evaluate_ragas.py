@@ -0,0 +1,55 @@
+"""
+Unit tests for the Ragas evaluation script's judge cache
+"""
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+pytest.importorskip("ragas")
+from scripts import evaluate_ragas
+from scripts.evaluate_ragas import JudgeCache, evaluate_batch
+
+
+@pytest.fixture
+def row():
+    return {"question": "q", "answer": "a", "contexts": ["c"], "ground_truth": "gt"}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return JudgeCache(path=str(tmp_path / "judge.db"))
+
+
+def _key(row):
+    return JudgeCache.key(row["question"], row["answer"], row["contexts"], row["ground_truth"])
+
+
+class TestEvaluateBatchCache:
+    """Test cases for evaluate_batch with a JudgeCache"""
+
+    def test_partially_cached_row_judges_missing_metrics(self, cache, row):
+        """A cached row with a NaN metric only sends that metric to the judge, then is stored complete"""
+        cache.put(_key(row), {"faithfulness": 0.9, "answer_relevancy": 0.8, "context_recall": np.nan})
+        result = MagicMock()
+        result.to_pandas.return_value = pd.DataFrame({"context_recall": [0.7]})
+
+        with patch.object(evaluate_ragas, "evaluate", return_value=result) as evaluate:
+            scores = evaluate_batch([row], llm=None, embeddings=None, cache=cache)
+
+        assert [m.name for m in evaluate.call_args[1]["metrics"]] == ["context_recall"]
+        assert scores[0]["faithfulness"] == 0.9
+        assert scores[0]["context_recall"] == 0.7
+        assert cache.get(_key(row)) == {"faithfulness": 0.9, "answer_relevancy": 0.8, "context_recall": 0.7}
+
+    def test_failed_metrics_not_stored(self, cache, row):
+        """Metrics that stay NaN after the retries are left out of the stored entry"""
+        result = MagicMock()
+        result.to_pandas.return_value = pd.DataFrame(
+            {"faithfulness": [0.9], "answer_relevancy": [0.8], "context_recall": [np.nan]}
+        )
+
+        with patch.object(evaluate_ragas, "evaluate", return_value=result), patch.object(evaluate_ragas.time, "sleep"):
+            evaluate_batch([row], llm=None, embeddings=None, max_retries=1, cache=cache)
+
+        assert cache.get(_key(row)) == {"faithfulness": 0.9, "answer_relevancy": 0.8}
@@ -0,0 +1,69 @@
+"""
+Unit tests for existence_cache module
+"""
+from unittest.mock import MagicMock, patch
+from app.core import existence_cache
+
+
+class TestIndexExists:
+    """Test cases for cached OpenSearch existence checks"""
+
+    def test_positive_result_cached(self, mock_opensearch_client):
+        """Test that a found index is not looked up again within the TTL"""
+        mock_opensearch_client.indices.exists.return_value = True
+
+        assert existence_cache.index_exists(mock_opensearch_client, "test-index") is True
+        assert existence_cache.index_exists(mock_opensearch_client, "test-index") is True
+
+        assert mock_opensearch_client.indices.exists.call_count == 1
+
+    def test_negative_result_not_cached(self, mock_opensearch_client):
+        """Test that a missing index is looked up on every call"""
+        mock_opensearch_client.indices.exists.return_value = False
+
+        assert existence_cache.index_exists(mock_opensearch_client, "test-index") is False
+        mock_opensearch_client.indices.exists.return_value = True
+        assert existence_cache.index_exists(mock_opensearch_client, "test-index") is True
+
+        assert mock_opensearch_client.indices.exists.call_count == 2
+
+    def test_entry_expires(self, mock_opensearch_client):
+        """Test that cached entries expire after the TTL"""
+        mock_opensearch_client.indices.exists.return_value = True
+
+        with patch('app.core.existence_cache.time.monotonic', return_value=0.0):
+            existence_cache.index_exists(mock_opensearch_client, "test-index")
+        with patch('app.core.existence_cache.time.monotonic', return_value=existence_cache._TTL_SECONDS + 1.0):
+            existence_cache.index_exists(mock_opensearch_client, "test-index")
+
+        assert mock_opensearch_client.indices.exists.call_count == 2
+
+    def test_invalidate(self, mock_opensearch_client):
+        """Test that invalidate forces a fresh lookup"""
+        mock_opensearch_client.indices.exists.return_value = True
+
+        existence_cache.index_exists(mock_opensearch_client, "test-index")
+        existence_cache.invalidate("opensearch", "test-index")
+        existence_cache.index_exists(mock_opensearch_client, "test-index")
+
+        assert mock_opensearch_client.indices.exists.call_count == 2
+
+
+class TestMongoExists:
+    """Test cases for cached FAISS / Qdrant metadata existence checks"""
+
+    def test_faiss_index_exists_projects_id_only(self):
+        """Test that the FAISS lookup does not fetch the serialized index"""
+        mongo_client = MagicMock()
+        mongo_client.db["faiss_indices"].find_one.return_value = {"_id": "x"}
+
+        assert existence_cache.faiss_index_exists(mongo_client, "test-index") is True
+
+        mongo_client.db["faiss_indices"].find_one.assert_called_once_with({"index_name": "test-index"}, {"_id": 1})
+
+    def test_qdrant_collection_missing(self):
+        """Test that a missing Qdrant collection returns False"""
+        mongo_client = MagicMock()
+        mongo_client.db["qdrant_collections"].find_one.return_value = None
+
+        assert existence_cache.qdrant_collection_exists(mongo_client, "test-collection") is False
@@ -0,0 +1,448 @@
+"""
+Unit tests for FAISS service index storage
+"""
+import dataclasses
+import faiss
+import mongomock
+import orjson
+import pickle
+import pytest
+from datetime import datetime
+import numpy as np
+from unittest.mock import patch, MagicMock
+from app.core.config import settings
+from app.services import faiss_service
+from app.services.faiss_service import (
+    _build_faiss_index,
+    _deserialize_faiss_index,
+    _get_index_meta,
+    _get_search_index,
+    _get_search_payloads,
+    _ingest_lease,
+    _load_payloads,
+    _normalize_inplace,
+    _reserve_int_ids,
+    _save_faiss_index,
+    _save_payloads,
+    _serialize_faiss_index,
+    _snapshot,
+    _training_size,
+    create_faiss_index,
+    ingest_csv_to_faiss,
+    invalidate_search_index,
+)
+
+
+@pytest.fixture(autouse=True)
+def index_dir(tmp_path, monkeypatch):
+    """Keep local index copies in a temp dir and start with an empty search cache"""
+    monkeypatch.setattr(faiss_service, "settings", dataclasses.replace(settings, FAISS_INDEX_DIR=str(tmp_path)))
+    faiss_service._INDEX_CACHE.clear()
+    faiss_service._INDEX_META.clear()
+    faiss_service._PAYLOAD_CACHE.clear()
+    faiss_service._HOT_INDEXES.clear()
+    yield tmp_path
+    faiss_service._INDEX_CACHE.clear()
+    faiss_service._INDEX_META.clear()
+    faiss_service._PAYLOAD_CACHE.clear()
+
+
+@pytest.fixture
+def grid_fs():
+    """GridFS stand-in holding one index binary per file id"""
+    files = {}
+
+    def put(data, filename):
+        file_id = f"file-{len(files)}"
+        files[file_id] = data.read() if hasattr(data, "read") else data
+        return file_id
+
+    fs = MagicMock()
+    fs.put.side_effect = put
+    fs.get.side_effect = lambda file_id: MagicMock(read=MagicMock(return_value=files[file_id]))
+    fs.files = files
+    with patch("app.services.faiss_service.gridfs.GridFS", return_value=fs):
+        yield fs
+
+
+def _stored_index(n=10, dimension=8):
+    index = _build_faiss_index(dimension, "flat", 1)
+    vectors = np.random.rand(n, dimension).astype("float32")
+    index.add_with_ids(vectors, np.arange(n, dtype="int64"))
+    return _serialize_faiss_index(index)
+
+
+class TestBuildFaissIndex:
+    """Test cases for FAISS index construction"""
+
+    def test_high_dim_ivfpq_projected(self):
+        """High-dimensional ivfpq indexes PCA-project to half the dimension"""
+        index = _build_faiss_index(512, "ivfpq", 4)
+
+        assert index.d == 512
+        assert faiss.extract_index_ivf(index).d == 256
+        assert _training_size(index) == 512
+
+    def test_projected_index_round_trip(self):
+        """The trained projection is kept in the serialized index"""
+        index = _build_faiss_index(512, "ivfpq", 4)
+        vectors = _normalize_inplace(np.random.rand(600, 512).astype("float32"))
+        index.train(vectors)
+        index.add_with_ids(vectors, np.arange(600, dtype="int64"))
+
+        restored = _deserialize_faiss_index(_serialize_faiss_index(index))
+        faiss.extract_index_ivf(restored).nprobe = 4
+        _, ids = restored.search(vectors[:1], 10)
+
+        assert restored.ntotal == 600
+        assert 0 in ids[0]
+
+    def test_low_dim_ivfpq_not_projected(self):
+        """Below the threshold ivfpq works on the full dimension"""
+        index = _build_faiss_index(64, "ivfpq", 4)
+
+        assert faiss.extract_index_ivf(index).d == 64
+        assert _training_size(index) == 256
+
+
+class TestCreateFaissIndex:
+    """Test cases for create_faiss_index"""
+
+    @pytest.fixture
+    def mongo_client(self):
+        """Client wrapper over an in-memory MongoDB"""
+        return MagicMock(db=mongomock.MongoClient().db)
+
+    def test_create_sets_up_chunk_indexes(self, grid_fs, mongo_client):
+        """Creating an index stores its metadata and the faiss_chunks lookup indexes"""
+        create_faiss_index("test-index", 8, mongo_client)
+
+        doc = mongo_client.db["faiss_indices"].find_one({"index_name": "test-index"})
+        assert doc["dimension"] == 8
+        assert doc["next_id"] == 0
+        keys = [spec["key"] for spec in mongo_client.db["faiss_chunks"].index_information().values()]
+        assert [("chunk_id", 1)] in keys
+        assert [("index_name", 1), ("faiss_int_id", 1)] in keys
+
+    def test_create_existing_raises(self, grid_fs, mongo_client):
+        """A second create with the same name is rejected"""
+        create_faiss_index("test-index", 8, mongo_client)
+
+        with pytest.raises(ValueError, match="already exists"):
+            create_faiss_index("test-index", 8, mongo_client)
+
+
+class TestFaissIndexStorage:
+    """Test cases for GridFS storage and the search index cache"""
+
+    def test_create_stores_binary_in_gridfs(self, grid_fs):
+        """Index metadata references a GridFS file instead of embedding the binary"""
+        mongo_client = MagicMock()
+        mongo_client.db["faiss_indices"].find_one.return_value = None
+
+        create_faiss_index("test-index", 8, mongo_client, index_type="hnsw")
+
+        doc = mongo_client.db["faiss_indices"].insert_one.call_args[0][0]
+        assert doc["index_file_id"] == "file-0"
+        assert doc["index_type"] == "hnsw"
+        assert "index_data" not in doc
+        assert orjson.loads(grid_fs.files[doc["payload_file_id"]]) == {}
+        assert grid_fs.put.call_count == 2
+
+    def test_search_index_loaded_once_per_version(self, grid_fs, index_dir):
+        """The same index_file_id is served from the cache without touching GridFS"""
+        file_id = grid_fs.put(_stored_index(), filename="test-index")
+        doc = {"index_name": "test-index", "index_type": "flat", "index_file_id": file_id}
+
+        first = _get_search_index(MagicMock(), doc)
+        second = _get_search_index(MagicMock(), doc)
+
+        assert first is second
+        assert first.ntotal == 10
+        assert grid_fs.get.call_count == 1
+        assert (index_dir / f"{file_id}.faiss").exists()
+
+    def test_search_index_reloaded_on_new_version(self, grid_fs, index_dir):
+        """A new index_file_id replaces the cached index and its local copy"""
+        old_id = grid_fs.put(_stored_index(n=10), filename="test-index")
+        new_id = grid_fs.put(_stored_index(n=20), filename="test-index")
+
+        _get_search_index(MagicMock(), {"index_name": "test-index", "index_file_id": old_id})
+        index = _get_search_index(MagicMock(), {"index_name": "test-index", "index_file_id": new_id})
+
+        assert index.ntotal == 20
+        assert not (index_dir / f"{old_id}.faiss").exists()
+
+    def test_search_index_legacy_inline_binary(self, grid_fs):
+        """Indexes stored before GridFS are still read from index_data"""
+        doc = {"index_name": "old-index", "index_data": _stored_index(n=5)}
+
+        index = _get_search_index(MagicMock(), doc)
+
+        assert index.ntotal == 5
+        grid_fs.get.assert_not_called()
+
+
+class TestSnapshots:
+    """Test cases for saving ingested indexes back to GridFS"""
+
+    def test_saved_file_kept_for_search(self, grid_fs, index_dir):
+        """The written index doubles as the local copy, so search skips the download"""
+        file_id = _save_faiss_index(MagicMock(), "test-index", _build_faiss_index(8, "flat", 1))
+
+        assert (index_dir / f"{file_id}.faiss").exists()
+        assert not list(index_dir.glob("*.tmp"))
+        index = _get_search_index(MagicMock(), {"index_name": "test-index", "index_file_id": file_id})
+        assert index.d == 8
+        grid_fs.get.assert_not_called()
+
+    def test_snapshot_retires_stored_files(self, grid_fs, index_dir):
+        """A snapshot points the metadata at new files and keeps the old ones for searches still on them"""
+        mongo_client = MagicMock(db=mongomock.MongoClient().db)
+        mongo_client.db["faiss_indices"].insert_one({"index_name": "test-index"})
+        old_id = _save_faiss_index(mongo_client, "test-index", _build_faiss_index(8, "flat", 1))
+
+        files = _snapshot(
+            mongo_client, "test-index", _build_faiss_index(8, "flat", 1), {1: {"chunk_id": "c-1"}},
+            {"index_file_id": old_id, "payload_file_id": "old-payloads"}
+        )
+
+        doc = mongo_client.db["faiss_indices"].find_one({"index_name": "test-index"})
+        assert doc["index_file_id"] == files["index_file_id"]
+        assert doc["payload_file_id"] == files["payload_file_id"]
+        assert [r["file_id"] for r in doc["retired_files"]] == [old_id, "old-payloads"]
+        grid_fs.delete.assert_not_called()
+        assert (index_dir / f"{old_id}.faiss").exists()
+        assert (index_dir / f"{files['index_file_id']}.faiss").exists()
+
+    def test_expired_retired_files_deleted(self, grid_fs, index_dir, monkeypatch):
+        """Files retired longer than RETIRED_FILE_TTL ago are deleted by the next snapshot"""
+        monkeypatch.setattr(faiss_service, "RETIRED_FILE_TTL", 0.0)
+        mongo_client = MagicMock(db=mongomock.MongoClient().db)
+        mongo_client.db["faiss_indices"].insert_one({"index_name": "test-index"})
+        old_id = _save_faiss_index(mongo_client, "test-index", _build_faiss_index(8, "flat", 1))
+
+        files = _snapshot(
+            mongo_client, "test-index", _build_faiss_index(8, "flat", 1), {},
+            {"index_file_id": old_id, "payload_file_id": "old-payloads"}
+        )
+
+        deleted = [c[0][0] for c in grid_fs.delete.call_args_list]
+        assert deleted == [old_id, "old-payloads"]
+        assert not (index_dir / f"{old_id}.faiss").exists()
+        assert (index_dir / f"{files['index_file_id']}.faiss").exists()
+        assert mongo_client.db["faiss_indices"].find_one({"index_name": "test-index"})["retired_files"] == []
+
+
+class TestSearchPayloads:
+    """Test cases for hit payloads stored beside the index"""
+
+    def test_payloads_loaded_once_per_version(self, grid_fs):
+        """The same payload_file_id is served from the cache"""
+        payloads = {3: {"chunk_id": "c-3", "doc_id": "d", "title": "t", "category": "c", "text_snippet": "s"}}
+        file_id = _save_payloads(MagicMock(), "test-index", payloads)
+        doc = {"index_name": "test-index", "payload_file_id": file_id}
+
+        first = _get_search_payloads(MagicMock(), doc)
+        second = _get_search_payloads(MagicMock(), doc)
+
+        assert first == payloads
+        assert first is second
+        assert grid_fs.get.call_count == 1
+
+    def test_no_payloads_for_older_indexes(self, grid_fs):
+        """Indexes without stored payloads return None so search reads faiss_chunks"""
+        assert _get_search_payloads(MagicMock(), {"index_name": "old-index"}) is None
+
+    def test_older_index_payloads_rebuilt_from_chunks(self):
+        """Ingest into an older index starts from the faiss_chunks metadata"""
+        mongo_client = MagicMock()
+        mongo_client.db["faiss_chunks"].find.return_value = [
+            {"faiss_int_id": 7, "chunk_id": "c-7", "doc_id": "d", "title": "t", "category": "c", "text_snippet": "s"}
+        ]
+
+        payloads = _load_payloads(mongo_client, {"index_name": "old-index"})
+
+        assert payloads[7]["chunk_id"] == "c-7"
+        assert payloads[7]["text_snippet"] == "s"
+        assert payloads[7]["content_hash"] is None
+
+    def test_pickled_payloads_not_unpickled(self, grid_fs):
+        """Payload files from before the JSON format are rebuilt from faiss_chunks, never unpickled"""
+        mongo_client = MagicMock()
+        mongo_client.db["faiss_chunks"].find.return_value = [
+            {"faiss_int_id": 7, "chunk_id": "c-7", "doc_id": "d", "title": "t", "category": "c", "text_snippet": "s"}
+        ]
+        file_id = grid_fs.put(pickle.dumps({7: {"chunk_id": "stale"}}), filename="old-index.payloads")
+
+        with patch("pickle.loads") as loads:
+            payloads = _load_payloads(mongo_client, {"index_name": "old-index", "payload_file_id": file_id})
+
+        loads.assert_not_called()
+        assert payloads[7]["chunk_id"] == "c-7"
+
+
+class TestIndexMeta:
+    """Test cases for the per-process index metadata cache"""
+
+    def test_meta_read_once(self):
+        """Repeated lookups for an index hit MongoDB only once"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one.return_value = {"index_name": "test-index", "dimension": 8, "index_file_id": "file-0"}
+
+        first = _get_index_meta(faiss_indices, "test-index")
+        second = _get_index_meta(faiss_indices, "test-index")
+
+        assert first is second
+        faiss_indices.find_one.assert_called_once()
+
+    def test_invalidate_refetches(self):
+        """After invalidation the metadata is read again"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one.return_value = {"index_name": "test-index", "dimension": 8, "index_file_id": "file-0"}
+
+        _get_index_meta(faiss_indices, "test-index")
+        invalidate_search_index("test-index")
+        _get_index_meta(faiss_indices, "test-index")
+
+        assert faiss_indices.find_one.call_count == 2
+
+    def test_meta_reread_after_ttl(self, monkeypatch):
+        """An entry older than INDEX_META_TTL is read again, picking up other workers' ingests"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one.side_effect = [
+            {"index_name": "test-index", "dimension": 8, "index_file_id": "file-0"},
+            {"index_name": "test-index", "dimension": 8, "index_file_id": "file-1"},
+        ]
+        clock = [100.0]
+        monkeypatch.setattr(faiss_service.time, "monotonic", lambda: clock[0])
+
+        assert _get_index_meta(faiss_indices, "test-index")["index_file_id"] == "file-0"
+        clock[0] += faiss_service.INDEX_META_TTL
+        assert _get_index_meta(faiss_indices, "test-index")["index_file_id"] == "file-1"
+
+    def test_missing_index(self):
+        """Unknown indexes raise and are not cached"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one.return_value = None
+
+        with pytest.raises(ValueError, match="not found"):
+            _get_index_meta(faiss_indices, "missing")
+        assert "missing" not in faiss_service._INDEX_META
+
+    def test_legacy_doc_not_cached(self):
+        """Docs with an inline binary are fetched in full each time"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one.side_effect = [{"index_name": "old-index"}, {"index_name": "old-index", "index_data": b"x"}]
+
+        doc = _get_index_meta(faiss_indices, "old-index")
+
+        assert doc["index_data"] == b"x"
+        assert "old-index" not in faiss_service._INDEX_META
+
+
+class TestIngestLease:
+    """Test cases for the cross-process ingest lease"""
+
+    @pytest.fixture
+    def faiss_indices(self):
+        faiss_indices = mongomock.MongoClient().db["faiss_indices"]
+        faiss_indices.insert_one({"index_name": "test-index"})
+        return faiss_indices
+
+    def test_held_lease_rejects_second_ingest(self, faiss_indices):
+        """A second holder is refused until the first releases the lease"""
+        with _ingest_lease(faiss_indices, "test-index"):
+            with pytest.raises(ValueError, match="another worker"):
+                with _ingest_lease(faiss_indices, "test-index"):
+                    pass
+
+        assert "ingest_lease" not in faiss_indices.find_one({"index_name": "test-index"})
+        with _ingest_lease(faiss_indices, "test-index"):
+            pass
+
+    def test_expired_lease_taken_over(self, faiss_indices):
+        """A lease left by a dead worker is taken over once expired, and its holder can no longer renew"""
+        with _ingest_lease(faiss_indices, "test-index") as renew:
+            faiss_indices.update_one(
+                {"index_name": "test-index"}, {"$set": {"ingest_lease.expires_at": datetime(2000, 1, 1)}}
+            )
+            with _ingest_lease(faiss_indices, "test-index"):
+                with pytest.raises(ValueError, match="lost its lease"):
+                    renew()
+
+    def test_missing_index(self, faiss_indices):
+        """No lease for an index that does not exist"""
+        with pytest.raises(ValueError, match="not found"):
+            with _ingest_lease(faiss_indices, "other-index"):
+                pass
+
+
+class TestHotIndexes:
+    """Test cases for the mutable indexes kept between ingests"""
+
+    def test_only_recent_indexes_kept(self, grid_fs, tmp_path, monkeypatch):
+        """Ingests keep at most HOT_INDEX_LIMIT mutable indexes in memory, dropping the oldest"""
+        mongo_client = MagicMock(db=mongomock.MongoClient().db)
+        csv_path = tmp_path / "docs.csv"
+        csv_path.write_text("id,title,category,text\n1,t,c,Some text to index.\n")
+        embedder = MagicMock()
+        embedder.embed_batch.side_effect = lambda texts: np.random.rand(len(texts), 8).astype("float32")
+        monkeypatch.setattr(faiss_service.deps, "embedder", lambda mongo_client: embedder)
+        monkeypatch.setattr(faiss_service, "HOT_INDEX_LIMIT", 2)
+        # mongomock cannot apply this pymongo's ReplaceOne bulk ops; chunk metadata is not under test here
+        monkeypatch.setattr(mongomock.collection.Collection, "bulk_write", MagicMock())
+        names = ["index-a", "index-b", "index-c"]
+        for name in names:
+            create_faiss_index(name, 8, mongo_client)
+
+        for name in names:
+            ingest_csv_to_faiss(str(csv_path), name, mongo_client)
+
+        assert list(faiss_service._HOT_INDEXES) == ["index-b", "index-c"]
+        assert mongo_client.db["faiss_indices"].count_documents({"ingest_lease": {"$exists": True}}) == 0
+
+
+class TestReserveIntIds:
+    """Test cases for sequential FAISS id allocation"""
+
+    def test_ids_follow_counter(self):
+        """Ids start at the counter value before the increment"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one_and_update.return_value = {"next_id": 40}
+
+        ids = _reserve_int_ids(faiss_indices, "test-index", 3)
+
+        assert ids.tolist() == [40, 41, 42]
+        assert ids.dtype == np.int64
+        update = faiss_indices.find_one_and_update.call_args[0][1]
+        assert update == {"$inc": {"next_id": 3}}
+
+    def test_missing_counter_starts_at_zero(self):
+        """Indexes created before the counter existed start from 0"""
+        faiss_indices = MagicMock()
+        faiss_indices.find_one_and_update.return_value = {"_id": "x"}
+
+        assert _reserve_int_ids(faiss_indices, "old-index", 2).tolist() == [0, 1]
+
+
+class TestNormalizeInplace:
+    """Test cases for in-place L2 normalization"""
+
+    def test_rows_unit_length_in_place(self):
+        """Rows are scaled to unit length in the same buffer"""
+        x = np.array([[3.0, 4.0], [1.0, 0.0]], dtype="float32")
+
+        result = _normalize_inplace(x)
+
+        assert result is x
+        np.testing.assert_allclose(x, [[0.6, 0.8], [1.0, 0.0]], rtol=1e-6)
+
+    def test_zero_rows_untouched(self):
+        """Zero vectors stay zero instead of becoming NaN"""
+        x = np.zeros((2, 3), dtype="float32")
+
+        _normalize_inplace(x)
+
+        assert not np.isnan(x).any()
+        assert (x == 0).all()
@@ -0,0 +1,156 @@
+"""
+Unit tests for ingest_jobs module
+"""
+import mongomock
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from app.services import ingest_jobs
+
+
+@pytest.fixture
+def mock_mongo_client():
+    """Mock MongoDB client wrapper with a runs collection"""
+    mongo_client = MagicMock()
+    mongo_client.runs.find_one.return_value = {
+        "job_id": "job-1",
+        "type": "ingest",
+        "backend": "faiss",
+        "params": {},
+        "status": "queued",
+        "rows_done": 0
+    }
+    return mongo_client
+
+
+def _status_updates(mongo_client):
+    return [c[0][1]["$set"].get("status") for c in mongo_client.runs.update_one.call_args_list]
+
+
+class TestIngestJobs:
+    """Test cases for ingestion job tracking"""
+
+    def test_create_job(self, mock_mongo_client):
+        """Test that a queued job is recorded with its params"""
+        job_id = ingest_jobs.create_job(mock_mongo_client, "faiss", {"csv_path": "data.csv"})
+
+        doc = mock_mongo_client.runs.insert_one.call_args[0][0]
+        assert doc["job_id"] == job_id
+        assert doc["backend"] == "faiss"
+        assert doc["status"] == "queued"
+        assert doc["rows_done"] == 0
+        assert doc["params"] == {"csv_path": "data.csv"}
+
+    def test_run_job_success(self, mock_mongo_client):
+        """Test that a successful run checkpoints and completes"""
+        def ingest_fn(start_row, on_batch):
+            on_batch(start_row + 10)
+
+        ingest_jobs.run_job(mock_mongo_client, "job-1", ingest_fn)
+
+        statuses = _status_updates(mock_mongo_client)
+        assert statuses[0] == "running"
+        assert statuses[-1] == "completed"
+        checkpoints = [c[0][1]["$set"].get("rows_done") for c in mock_mongo_client.runs.update_one.call_args_list]
+        assert 10 in checkpoints
+
+    def test_run_job_resumes_from_checkpoint(self, mock_mongo_client):
+        """Test that the ingest function starts after the checkpointed row"""
+        mock_mongo_client.runs.find_one.return_value["rows_done"] = 128
+        ingest_fn = MagicMock()
+
+        ingest_jobs.run_job(mock_mongo_client, "job-1", ingest_fn, "arg", key="value")
+
+        call_kwargs = ingest_fn.call_args[1]
+        assert ingest_fn.call_args[0] == ("arg",)
+        assert call_kwargs["start_row"] == 128
+        assert call_kwargs["key"] == "value"
+
+    def test_run_job_failure(self, mock_mongo_client):
+        """Test that a failing ingest marks the job failed with the error"""
+        ingest_fn = MagicMock(side_effect=Exception("Embedding failed"))
+
+        ingest_jobs.run_job(mock_mongo_client, "job-1", ingest_fn)
+
+        last_set = mock_mongo_client.runs.update_one.call_args[0][1]["$set"]
+        assert last_set["status"] == "failed"
+        assert "Embedding failed" in last_set["error"]
+
+    def test_run_job_not_found(self, mock_mongo_client):
+        """Test that running an unknown job raises"""
+        mock_mongo_client.runs.find_one.return_value = None
+
+        with pytest.raises(ValueError, match="not found"):
+            ingest_jobs.run_job(mock_mongo_client, "missing", MagicMock())
+
+    def test_claim_job_only_resumable(self, mock_mongo_client):
+        """Test that claiming is one atomic update limited to failed or interrupted jobs"""
+        mock_mongo_client.runs.find_one_and_update.return_value = {"job_id": "job-1", "status": "queued"}
+
+        job = ingest_jobs.claim_job(mock_mongo_client, "job-1")
+
+        query, update = mock_mongo_client.runs.find_one_and_update.call_args[0]
+        assert query["$or"][0]["status"] == {"$in": ["failed", "interrupted"]}
+        assert query["$or"][1]["status"] == {"$in": ["queued", "running"]}
+        assert update["$set"]["status"] == "queued"
+        assert job["status"] == "queued"
+
+    def test_claim_job_not_resumable(self, mock_mongo_client):
+        """Test that a live running or queued job, or a completed one, is not claimed"""
+        mock_mongo_client.runs.find_one_and_update.return_value = None
+
+        assert ingest_jobs.claim_job(mock_mongo_client, "job-1") is None
+
+
+class TestStaleJobs:
+    """Test cases for jobs left queued or running by a worker that died"""
+
+    @pytest.fixture
+    def mongo_client(self):
+        """Client wrapper over an in-memory MongoDB"""
+        return MagicMock(runs=mongomock.MongoClient().db["runs"])
+
+    def _job(self, mongo_client, status, age_seconds):
+        job_id = ingest_jobs.create_job(mongo_client, "faiss", {})
+        mongo_client.runs.update_one(
+            {"job_id": job_id},
+            {"$set": {"status": status, "rows_done": 64, "updated_at": datetime.utcnow() - timedelta(seconds=age_seconds)}}
+        )
+        return job_id
+
+    def test_resume_job_left_running(self, mongo_client):
+        """A running job whose worker stopped updating it is claimed and resumed from its checkpoint"""
+        job_id = self._job(mongo_client, "running", ingest_jobs.JOB_STALE_SECONDS + 60)
+        assert ingest_jobs.is_resumable(ingest_jobs.get_job(mongo_client, job_id))
+        ingest_fn = MagicMock()
+
+        ingest_jobs.claim_job(mongo_client, job_id)
+        assert ingest_jobs.get_job(mongo_client, job_id)["status"] == "queued"
+        ingest_jobs.run_job(mongo_client, job_id, ingest_fn)
+
+        assert ingest_fn.call_args[1]["start_row"] == 64
+        assert ingest_jobs.get_job(mongo_client, job_id)["status"] == "completed"
+
+    def test_live_running_job_not_claimed(self, mongo_client):
+        """A running job with a recent heartbeat is left to its worker"""
+        job_id = self._job(mongo_client, "running", 1)
+
+        assert not ingest_jobs.is_resumable(ingest_jobs.get_job(mongo_client, job_id))
+        assert ingest_jobs.claim_job(mongo_client, job_id) is None
+
+    def test_heartbeat_while_running(self, mongo_client, monkeypatch):
+        """A running job keeps refreshing updated_at between checkpoints"""
+        monkeypatch.setattr(ingest_jobs, "JOB_HEARTBEAT_SECONDS", 0.01)
+        job_id = self._job(mongo_client, "failed", ingest_jobs.JOB_STALE_SECONDS + 60)
+        seen = []
+
+        def ingest_fn(start_row, on_batch):
+            started = ingest_jobs.get_job(mongo_client, job_id)["updated_at"]
+            deadline = datetime.utcnow() + timedelta(seconds=2)
+            while ingest_jobs.get_job(mongo_client, job_id)["updated_at"] == started and datetime.utcnow() < deadline:
+                pass
+            seen.append(ingest_jobs.get_job(mongo_client, job_id)["updated_at"] > started)
+
+        ingest_jobs.run_job(mongo_client, job_id, ingest_fn)
+
+        assert seen == [True]
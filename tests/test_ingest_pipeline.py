@@ -0,0 +1,220 @@
+"""
+Unit tests for ingestion pipeline helpers
+"""
+import threading
+import pytest
+import mongomock
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from app.services.ingest_pipeline import (
+    ChunkColumns,
+    PersistQueue,
+    content_hash,
+    prefetch_embeddings,
+    ensure_chunk_key_index,
+    stored_chunk_keys,
+)
+
+
+def _chunks(*texts):
+    return ChunkColumns.from_records({"doc_id": f"doc-{t}", "text": t} for t in texts)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+class TestPrefetchEmbeddings:
+    """Test cases for prefetch_embeddings"""
+
+    def test_yields_batches_in_order(self, executor):
+        """Each batch is paired with its own embeddings, in input order"""
+        batches = [_chunks("a", "b"), _chunks("c")]
+        embed = lambda texts: np.array([[ord(t)] for t in texts], dtype="float32")
+
+        result = list(prefetch_embeddings(executor, embed, batches))
+
+        assert [b for b, _ in result] == batches
+        assert result[0][1].tolist() == [[97.0], [98.0]]
+        assert result[1][1].tolist() == [[99.0]]
+
+    def test_next_batch_embedded_ahead(self, executor):
+        """The next batch is submitted before the current one is handed out"""
+        submitted = []
+        embed = lambda texts: submitted.append(texts[0]) or np.zeros((len(texts), 1), dtype="float32")
+        batches = [_chunks("a"), _chunks("b"), _chunks("c")]
+
+        gen = prefetch_embeddings(executor, embed, batches)
+        next(gen)
+        executor.shutdown(wait=True)
+
+        assert submitted[:2] == ["a", "b"]
+
+    def test_depth_bounds_lookahead(self, executor):
+        """At most depth batches beyond the current one are submitted"""
+        submitted = []
+        embed = lambda texts: submitted.append(texts[0]) or np.zeros((len(texts), 1), dtype="float32")
+        batches = [_chunks(t) for t in "abcde"]
+
+        gen = prefetch_embeddings(executor, embed, iter(batches), depth=2)
+        first, _ = next(gen)
+        executor.shutdown(wait=True)
+
+        assert first.texts == ["a"]
+        assert submitted == ["a", "b", "c"]
+
+    def test_empty_batches(self, executor):
+        """No batches yields nothing"""
+        assert list(prefetch_embeddings(executor, lambda texts: None, [])) == []
+
+    def test_embed_error_propagates(self, executor):
+        """An embedding failure surfaces to the caller"""
+        def embed(texts):
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            list(prefetch_embeddings(executor, embed, [_chunks("a")]))
+
+
+class TestChunkColumns:
+    """Test cases for ChunkColumns"""
+
+    def test_from_records(self):
+        """Record dicts become parallel columns; missing fields are None"""
+        columns = ChunkColumns.from_records([
+            {"doc_id": "doc-1", "title": "T", "category": "c", "text": "one", "chunk_id": "id-1"},
+            {"doc_id": "doc-2", "text": "two"},
+        ])
+
+        assert len(columns) == 2
+        assert columns.doc_ids == ["doc-1", "doc-2"]
+        assert columns.titles == ["T", None]
+        assert columns.texts == ["one", "two"]
+        assert columns.chunk_ids[0] == "id-1"
+        assert columns.chunk_ids[1]
+
+    def test_batches_slice_every_column(self):
+        """Batches are aligned slices of all columns"""
+        columns = _chunks("a", "b", "c", "d", "e")
+
+        batches = list(columns.batches(2))
+
+        assert [b.texts for b in batches] == [["a", "b"], ["c", "d"], ["e"]]
+        assert [b.doc_ids for b in batches][2] == ["doc-e"]
+        assert sum((b.chunk_ids for b in batches), []) == columns.chunk_ids
+        assert sum((b.content_hashes for b in batches), []) == columns.content_hashes
+
+    def test_content_hash_per_text(self):
+        """Chunks carry the hash of their text"""
+        columns = _chunks("a", "b")
+
+        assert columns.content_hashes == [content_hash("a"), content_hash("b")]
+        assert len(content_hash("a")) == 32
+
+    def test_drop_known(self):
+        """Known chunks and repeats within a document are dropped; kept keys become known"""
+        columns = ChunkColumns.from_records(
+            {"doc_id": d, "text": t} for d, t in [("doc-0", "a"), ("doc-0", "b"), ("doc-0", "a"), ("doc-1", "c")]
+        )
+        known = {("doc-0", content_hash("b"))}
+
+        kept = columns.drop_known(known)
+
+        assert kept.texts == ["a", "c"]
+        assert kept.doc_ids == ["doc-0", "doc-1"]
+        assert kept.content_hashes == [content_hash("a"), content_hash("c")]
+        assert known == {("doc-0", content_hash("a")), ("doc-0", content_hash("b")), ("doc-1", content_hash("c"))}
+
+    def test_same_text_in_other_documents_kept(self):
+        """Equal texts of different documents are separate chunks"""
+        columns = ChunkColumns.from_records({"doc_id": d, "text": "shared"} for d in ["doc-0", "doc-1"])
+        known = {("doc-0", content_hash("shared"))}
+
+        kept = columns.drop_known(known)
+
+        assert kept.doc_ids == ["doc-1"]
+        assert columns.keys() == [("doc-0", content_hash("shared")), ("doc-1", content_hash("shared"))]
+
+
+class TestStoredChunkKeys:
+    """Test cases for stored_chunk_keys"""
+
+    def test_one_scoped_query(self):
+        """Keys are looked up in one query within the given scope; other documents' chunks don't count"""
+        chunks = MagicMock()
+        chunks.find.return_value = [{"doc_id": "d1", "content_hash": "h1"}, {"doc_id": "d2", "content_hash": "h1"}]
+
+        found = stored_chunk_keys(chunks, {"collection_name": "c"}, [("d1", "h1"), ("d1", "h2")])
+
+        assert found == {("d1", "h1")}
+        query = chunks.find.call_args[0][0]
+        assert query["collection_name"] == "c"
+        assert query["doc_id"] == {"$in": ["d1"]}
+        assert sorted(query["content_hash"]["$in"]) == ["h1", "h2"]
+
+    def test_no_keys_skips_query(self):
+        """Nothing to look up means no query"""
+        chunks = MagicMock()
+
+        assert stored_chunk_keys(chunks, {"collection_name": "c"}, []) == set()
+        chunks.find.assert_not_called()
+
+
+class TestEnsureChunkKeyIndex:
+    """Test cases for ensure_chunk_key_index"""
+
+    def test_replaces_hash_only_index(self):
+        """The older unique (scope, content_hash) index is dropped so shared texts can be stored per document"""
+        chunks = mongomock.MongoClient().db["chunks"]
+        chunks.create_index([("index_name", 1), ("content_hash", 1)], unique=True)
+
+        ensure_chunk_key_index(chunks, "index_name")
+        chunks.insert_one({"index_name": "i", "doc_id": "d1", "content_hash": "h"})
+        chunks.insert_one({"index_name": "i", "doc_id": "d2", "content_hash": "h"})
+
+        assert "index_name_1_content_hash_1" not in chunks.index_information()
+        assert chunks.count_documents({}) == 2
+
+
+class TestPersistQueue:
+    """Test cases for PersistQueue"""
+
+    def test_drain_waits_for_all_writes(self, executor):
+        """drain returns only after every submitted write ran"""
+        done = []
+        writes = PersistQueue(executor)
+        for i in range(5):
+            writes.submit(done.append, i)
+        writes.drain()
+
+        assert sorted(done) == [0, 1, 2, 3, 4]
+
+    def test_bounded_in_flight(self, executor):
+        """At most max_pending writes are outstanding at once"""
+        release = threading.Event()
+        writes = PersistQueue(executor, max_pending=2)
+        writes.submit(release.wait)
+        writes.submit(release.wait)
+
+        blocker = threading.Thread(target=writes.submit, args=(lambda: None,))
+        blocker.start()
+        blocker.join(timeout=0.2)
+        assert blocker.is_alive()
+
+        release.set()
+        blocker.join(timeout=2)
+        writes.drain()
+        assert not blocker.is_alive()
+
+    def test_write_error_raised_on_drain(self, executor):
+        """A failed write is re-raised by drain"""
+        def fail():
+            raise RuntimeError("write failed")
+
+        writes = PersistQueue(executor)
+        writes.submit(fail)
+        with pytest.raises(RuntimeError, match="write failed"):
+            writes.drain()
@@ -4,9 +4,17 @@ Unit tests for ingest service
 import pytest
 import pandas as pd
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock, Mock
-from app.services.ingest_service import _create_actions_from_records, ingest_csv_to_index
+from app.services.ingest_service import _bulk_load_settings, _create_actions_from_records, ingest_csv_to_index
+from app.services.ingest_pipeline import ChunkColumns
+from app.api.ingest import IngestRequest
+from app.api.faiss import IngestFaissRequest
+from app.api.qdrant import IngestQdrantRequest
+from pydantic import ValidationError
+from opensearchpy.helpers import BulkIndexError
 import tempfile
+from datetime import datetime
 import os
 
 
@@ -24,7 +32,7 @@ class TestCreateActionsFromRecords:
     @pytest.fixture
     def sample_records(self):
         """Sample records for testing"""
-        return [
+        return ChunkColumns.from_records([
             {
                 "doc_id": "doc-1",
                 "title": "Test Title 1",
@@ -37,7 +45,7 @@ class TestCreateActionsFromRecords:
                 "category": "science",
                 "text": "This is test text 2"
             }
-        ]
+        ])
 
     def test_create_actions_basic(self, mock_embedder, sample_records):
         """Test basic action creation"""
@@ -83,11 +91,12 @@ class TestCreateActionsFromRecords:
         assert 'text_snippet' in source
         assert 'embedding' in source
         assert 'created_at' in source
+        assert datetime.fromisoformat(source['created_at'])
 
     def test_create_actions_text_snippet_truncation(self, mock_embedder):
         """Test that text snippet is truncated to 400 chars"""
         long_text = "a" * 500
-        records = [{"doc_id": "doc-1", "text": long_text}]
+        records = ChunkColumns.from_records([{"doc_id": "doc-1", "text": long_text}])
         
         actions = list(_create_actions_from_records(
             "test-index",
@@ -101,7 +110,7 @@ class TestCreateActionsFromRecords:
     def test_create_actions_batching(self, mock_embedder):
         """Test that batching works correctly"""
         # Create 10 records
-        records = [{"doc_id": f"doc-{i}", "text": f"text {i}"} for i in range(10)]
+        records = ChunkColumns.from_records({"doc_id": f"doc-{i}", "text": f"text {i}"} for i in range(10))
         mock_embedder.embed_batch.return_value = np.array([[0.1] * 256] * 3, dtype='float32')
         
         actions = list(_create_actions_from_records(
@@ -127,6 +136,37 @@ class TestCreateActionsFromRecords:
         embedding = actions[0]['_source']['embedding']
         assert len(embedding) == 256
 
+    def test_create_actions_embeddings_rounded(self, sample_records):
+        """Embeddings are sent rounded to the compact vector precision"""
+        embedder = MagicMock()
+        embedder.embed_batch.side_effect = lambda texts: np.full((len(texts), 4), 0.123456789, dtype="float32")
+
+        actions = list(_create_actions_from_records("test-index", sample_records, embedder))
+
+        embedding = actions[0]['_source']['embedding']
+        assert embedding.dtype == np.float32
+        np.testing.assert_allclose(embedding, 0.12346, rtol=1e-6)
+
+    def test_create_actions_with_executor(self, mock_embedder):
+        """Test that prefetching embeddings on an executor keeps batches and order"""
+        records = ChunkColumns.from_records({"doc_id": f"doc-{i}", "text": f"text {i}"} for i in range(5))
+        mock_embedder.embed_batch.side_effect = lambda texts: np.array(
+            [[float(t.split()[1])] * 4 for t in texts], dtype='float32'
+        )
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            actions = list(_create_actions_from_records(
+                "test-index",
+                records,
+                mock_embedder,
+                batch_size=2,
+                executor=executor
+            ))
+
+        assert [a['_source']['doc_id'] for a in actions] == records.doc_ids
+        assert [a['_source']['embedding'][0] for a in actions] == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert mock_embedder.embed_batch.call_count == 3
+
 
 class TestIngestCsvToIndex:
     """Test cases for ingest_csv_to_index function"""
@@ -158,16 +198,16 @@ class TestIngestCsvToIndex:
     @pytest.fixture
     def mock_embedder_class(self):
         """Mock OllamaAPIEmbedder class"""
-        with patch('app.services.ingest_service.OllamaAPIEmbedder') as mock:
+        with patch('app.services.deps.OllamaAPIEmbedder') as mock:
             embedder = mock.return_value
             embedder.embed_batch.return_value = np.array([[0.1] * 256] * 10, dtype='float32')
             yield mock
 
     @pytest.fixture
     def mock_bulk(self):
-        """Mock bulk function"""
-        with patch('app.services.ingest_service.bulk') as mock:
-            mock.return_value = (10, [])  # success count, errors
+        """Mock parallel_bulk function"""
+        with patch('app.services.ingest_service.parallel_bulk') as mock:
+            mock.side_effect = lambda client, actions, **kwargs: iter([(True, {})] * 10)  # (ok, item) per action
             yield mock
 
     def test_ingest_csv_success(self, mock_request, temp_csv, mock_embedder_class, mock_bulk):
@@ -224,7 +264,7 @@ class TestIngestCsvToIndex:
             temp_path = f.name
 
         try:
-            with patch('app.services.ingest_service.simple_sentence_split') as mock_split:
+            with patch('app.services.ingest_pipeline.simple_sentence_split') as mock_split:
                 mock_split.return_value = ['chunk1']
 
                 ingest_csv_to_index(mock_request, temp_path, "test-index")
@@ -238,3 +278,107 @@ class TestIngestCsvToIndex:
         finally:
             os.remove(temp_path)
 
+
+    def test_ingest_csv_bulk_load_settings_restored(self, mock_request, temp_csv, mock_embedder_class, mock_bulk):
+        """Test that refresh and translog settings are relaxed during ingest and restored after"""
+        client = mock_request.app.state.opensearch_client
+        client.indices.get_settings.return_value = {
+            "test-index": {"settings": {"index.refresh_interval": "5s"}}
+        }
+
+        ingest_csv_to_index(mock_request, temp_csv, "test-index")
+
+        bodies = [c[1]['body'] for c in client.indices.put_settings.call_args_list]
+        assert bodies[0] == {"index.refresh_interval": "30s", "index.translog.durability": "async"}
+        assert bodies[1] == {"index.refresh_interval": "5s", "index.translog.durability": None}
+
+    def test_ingest_csv_parallel_bulk_options(self, mock_request, temp_csv, mock_embedder_class, mock_bulk):
+        """Test that bulk requests are sent in parallel without raising on item errors"""
+        ingest_csv_to_index(mock_request, temp_csv, "test-index")
+
+        kwargs = mock_bulk.call_args[1]
+        assert kwargs['thread_count'] >= 1
+        assert kwargs['raise_on_error'] is False
+
+    def test_ingest_csv_item_failures_raise_before_checkpoint(self, mock_request, temp_csv, mock_embedder_class, mock_bulk):
+        """Test that documents failing to index fail the ingest without checkpointing their rows"""
+        mock_bulk.side_effect = lambda client, actions, **kwargs: iter(
+            [(True, {})] * 7 + [(False, {"index": {"error": "mapper_parsing_exception"}})] * 3
+        )
+        on_batch = MagicMock()
+
+        with pytest.raises(BulkIndexError, match="3 document"):
+            ingest_csv_to_index(mock_request, temp_csv, "test-index", on_batch=on_batch)
+
+        on_batch.assert_not_called()
+
+    def test_ingest_csv_streams_in_batches(self, mock_request, temp_csv, mock_embedder_class, mock_bulk):
+        """Test that the CSV is read and bulk indexed one batch of rows at a time"""
+        ingest_csv_to_index(mock_request, temp_csv, "test-index", read_batch_size=2)
+
+        # 3 rows with read_batch_size=2 -> 2 batches
+        assert mock_bulk.call_count == 2
+
+    def test_ingest_csv_resume_from_start_row(self, mock_request, temp_csv, mock_embedder_class, mock_bulk):
+        """Test that rows before start_row are skipped and progress is reported"""
+        on_batch = MagicMock()
+
+        with patch('app.services.ingest_pipeline.simple_sentence_split') as mock_split:
+            mock_split.return_value = ['chunk1']
+            ingest_csv_to_index(mock_request, temp_csv, "test-index", start_row=2, on_batch=on_batch)
+
+            # Only the third row is processed
+            assert mock_split.call_count == 1
+            assert mock_split.call_args[0][0] == 'Another technology document.'
+
+        on_batch.assert_called_once_with(3)
+
+
+class TestBulkLoadSettings:
+    """Test cases for _bulk_load_settings"""
+
+    def test_overlapping_loads_restore_once(self):
+        """A second load into the same index keeps the relaxed settings; the last one out restores the originals"""
+        client = MagicMock()
+        client.indices.get_settings.return_value = {"idx": {"settings": {"index.refresh_interval": "5s"}}}
+
+        with _bulk_load_settings(client, "idx"):
+            with _bulk_load_settings(client, "idx"):
+                pass
+            assert client.indices.put_settings.call_count == 1
+        bodies = [c[1]['body'] for c in client.indices.put_settings.call_args_list]
+
+        client.indices.get_settings.assert_called_once()
+        assert bodies == [
+            {"index.refresh_interval": "30s", "index.translog.durability": "async"},
+            {"index.refresh_interval": "5s", "index.translog.durability": None},
+        ]
+
+    def test_relaxed_values_reset_to_defaults(self):
+        """Settings already relaxed by another load are reset afterwards rather than kept"""
+        client = MagicMock()
+        client.indices.get_settings.return_value = {
+            "idx": {"settings": {"index.refresh_interval": "30s", "index.translog.durability": "async"}}
+        }
+
+        with _bulk_load_settings(client, "idx"):
+            pass
+
+        assert client.indices.put_settings.call_args[1]['body'] == {
+            "index.refresh_interval": None, "index.translog.durability": None
+        }
+
+
+class TestIngestRequestModels:
+    """Test cases for ingest request validation"""
+
+    @pytest.mark.parametrize("model, target", [
+        (IngestRequest, "index_name"),
+        (IngestFaissRequest, "index_name"),
+        (IngestQdrantRequest, "collection_name"),
+    ])
+    def test_read_batch_size_must_be_positive(self, model, target):
+        """A read_batch_size below 1 is rejected before any job is started"""
+        with pytest.raises(ValidationError):
+            model(csv_path="data.csv", read_batch_size=0, **{target: "test"})
+        assert model(csv_path="data.csv", read_batch_size=1, **{target: "test"}).read_batch_size == 1
@@ -1,6 +1,7 @@
 """
 Unit tests for OllamaAPIEmbedder
 """
+import json
 import pytest
 import numpy as np
 import responses
@@ -18,6 +19,7 @@ class TestOllamaAPIEmbedder:
             mock_settings.OLLAMA_API_URL = "http://localhost:11434/api/embed"
             mock_settings.OLLAMA_EMBEDDING_MODEL = "nomic-embed-text:v1.5"
             mock_settings.OLLAMA_EMBEDDING_DIMENSION = 256
+            mock_settings.BATCH_SIZE = 2
             return OllamaAPIEmbedder()
 
     def test_initialization(self, embedder):
@@ -75,6 +77,38 @@ class TestOllamaAPIEmbedder:
         assert result.dtype == np.float32
         np.testing.assert_array_almost_equal(result, np.array(mock_vector, dtype="float32"))
 
+    @responses.activate
+    def test_embed_batch_binary_response(self, embedder):
+        """Raw float32 responses are read without JSON decoding"""
+        vectors = np.arange(2 * 256, dtype="<f4").reshape(2, 256)
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            body=vectors.tobytes(),
+            content_type="application/octet-stream",
+            status=200
+        )
+
+        result = embedder.embed_batch(["a", "b"])
+
+        assert result.dtype == np.float32
+        np.testing.assert_array_equal(result, vectors)
+        assert "application/octet-stream" in responses.calls[0].request.headers["Accept"]
+
+    @responses.activate
+    def test_embed_batch_binary_response_truncated(self, embedder):
+        """A binary body that is not whole rows raises"""
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            body=b"\x00" * 100,
+            content_type="application/octet-stream",
+            status=200
+        )
+
+        with pytest.raises(ValueError, match="whole number"):
+            embedder.embed_batch(["a"])
+
     @responses.activate
     def test_embed_http_error(self, embedder):
         """Test embed with HTTP error"""
@@ -92,15 +126,20 @@ class TestOllamaAPIEmbedder:
     def test_embed_batch_success(self, embedder):
         """Test successful batch embedding"""
         mock_vector = [0.1] * 256
-        
-        # Mock multiple API calls
-        for _ in range(3):
-            responses.add(
-                responses.POST,
-                "http://localhost:11434/api/embed",
-                json={"embeddings": [mock_vector]},
-                status=200
-            )
+
+        # One API call per sub-batch of BATCH_SIZE (2) texts
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [mock_vector, mock_vector]},
+            status=200
+        )
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [mock_vector]},
+            status=200
+        )
 
         texts = ["text1", "text2", "text3"]
         result = embedder.embed_batch(texts)
@@ -108,6 +147,36 @@ class TestOllamaAPIEmbedder:
         assert isinstance(result, np.ndarray)
         assert result.shape == (3, 256)
         assert result.dtype == np.float32
+        assert result.flags["C_CONTIGUOUS"]
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_embed_batch_sends_list_input(self, embedder):
+        """Test that batch embedding sends all texts of a sub-batch in one request"""
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [[0.1] * 256, [0.2] * 256]},
+            status=200
+        )
+
+        embedder.embed_batch(["text1", "text2"])
+
+        payload = json.loads(responses.calls[0].request.body)
+        assert payload["input"] == ["text1", "text2"]
+
+    def test_extract_vectors_all_shapes(self, embedder):
+        """Test that every supported response shape yields one vector per input"""
+        v1, v2 = [0.1, 0.2], [0.3, 0.4]
+        assert embedder._extract_vectors({"embeddings": [v1, v2]}) == [v1, v2]
+        assert embedder._extract_vectors({"data": [{"embedding": v1}, {"embedding": v2}]}) == [v1, v2]
+        assert embedder._extract_vectors([{"embedding": v1}, {"embedding": v2}]) == [v1, v2]
+        assert embedder._extract_vectors({"embedding": v1}) == [v1]
+
+    def test_extract_vectors_invalid_format(self, embedder):
+        """Test extracting batch vectors from invalid format raises error"""
+        with pytest.raises(ValueError, match="Unexpected Ollama response"):
+            embedder._extract_vectors({"invalid": "format"})
 
     @responses.activate
     def test_embed_batch_empty_list(self, embedder):
@@ -118,6 +187,9 @@ class TestOllamaAPIEmbedder:
         assert isinstance(result, np.ndarray)
         assert result.shape == (0, 256)
         assert result.dtype == np.float32
+        # the same read-only array is returned for every empty batch
+        assert embedder.embed_batch([]) is result
+        assert not result.flags.writeable
 
     @responses.activate
     def test_embed_request_payload(self, embedder):
@@ -151,3 +223,77 @@ class TestOllamaAPIEmbedder:
         with pytest.raises(Exception):
             embedder.embed("test text")
 
+
+    @responses.activate
+    def test_embed_cached(self, embedder):
+        """Test that embedding the same text twice hits the API once"""
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [[0.1] * 256]},
+            status=200
+        )
+
+        first = embedder.embed("test text")
+        first[0] = 99.0  # callers get their own copy
+        second = embedder.embed("test text")
+
+        assert len(responses.calls) == 1
+        assert second[0] == np.float32(0.1)
+
+    @responses.activate
+    def test_embed_batch_only_embeds_misses(self, embedder):
+        """Test that batch embedding skips cached and duplicate texts and keeps order"""
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [[0.1] * 256]},
+            status=200
+        )
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [[0.2] * 256]},
+            status=200
+        )
+
+        embedder.embed("text1")
+        result = embedder.embed_batch(["text2", "text1", "text2"])
+
+        assert len(responses.calls) == 2
+        assert json.loads(responses.calls[1].request.body)["input"] == ["text2"]
+        assert result.shape == (3, 256)
+        np.testing.assert_array_almost_equal(result[:, 0], [0.2, 0.1, 0.2])
+
+    @responses.activate
+    def test_embed_batch_count_mismatch(self, embedder):
+        """Test that a short batch response raises instead of misaligning vectors"""
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [[0.1] * 256]},
+            status=200
+        )
+
+        with pytest.raises(ValueError, match="returned 1 embeddings for 2 inputs"):
+            embedder.embed_batch(["text1", "text2"])
+
+    @responses.activate
+    def test_embed_batch_uses_persistent_store(self, embedder):
+        """Test that stored vectors are used and only misses are embedded and persisted"""
+        store = MagicMock()
+        store.get_many.return_value = {embedder._key("text1"): np.full(256, 0.5, dtype="float32")}
+        embedder.store = store
+        responses.add(
+            responses.POST,
+            "http://localhost:11434/api/embed",
+            json={"embeddings": [[0.2] * 256]},
+            status=200
+        )
+
+        result = embedder.embed_batch(["text1", "text2"])
+
+        np.testing.assert_array_almost_equal(result[:, 0], [0.5, 0.2])
+        assert json.loads(responses.calls[0].request.body)["input"] == ["text2"]
+        stored = store.put_many.call_args[0][0]
+        assert list(stored) == [embedder._key("text2")]
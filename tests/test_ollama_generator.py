@@ -1,6 +1,7 @@
 """
 Unit tests for OllamaGenerator
 """
+import json
 import pytest
 import responses
 from unittest.mock import patch
@@ -162,20 +163,60 @@ class TestOllamaGenerator:
         request_body = responses.calls[0].request.body
         assert b'"stream": false' in request_body or b'"stream":false' in request_body
 
+    @responses.activate
+    def test_generate_stream_yields_pieces(self, generator, sample_contexts):
+        """Streamed lines are yielded as they come, with stream set to True"""
+        body = b'{"response": "Machine "}\n\n{"response": "learning"}\n{"response": "", "done": true}\n'
+        responses.add(responses.POST, "http://localhost:11434/api/generate", body=body, status=200)
+
+        pieces = list(generator.generate_stream("What is ML?", sample_contexts))
+
+        assert pieces == ["Machine ", "learning"]
+        assert json.loads(responses.calls[0].request.body)["stream"] is True
+
+    @responses.activate
+    def test_generate_stream_http_error(self, generator, sample_contexts):
+        """HTTP errors end the stream with an error message"""
+        responses.add(responses.POST, "http://localhost:11434/api/generate", status=500)
+
+        pieces = list(generator.generate_stream("Test query", sample_contexts))
+
+        assert len(pieces) == 1
+        assert "Generation error" in pieces[0]
+
     def test_generate_context_formatting(self, generator, sample_contexts):
         """Test that contexts are formatted correctly"""
-        with patch('app.embeddings.ollama_generator.requests.post') as mock_post:
-            mock_post.return_value.json.return_value = {"response": "Test"}
+        with patch.object(generator._session, 'post') as mock_post:
+            mock_post.return_value.content = b'{"response": "Test"}'
             mock_post.return_value.raise_for_status.return_value = None
             
             generator.generate("Test query", sample_contexts)
             
-            # Get the prompt from the call
+            # Get the prompt from the call (the body is sent pre-encoded)
             call_args = mock_post.call_args
-            payload = call_args[1]['json']
+            payload = json.loads(call_args[1]['data'])
             prompt = payload['prompt']
             
             # Verify both contexts are in the prompt
             assert "Machine learning is a subset of AI." in prompt
             assert "Deep learning uses neural networks." in prompt
 
+
+    @responses.activate
+    def test_warm_up_once_per_interval(self, generator):
+        """warm_up sends a prompt-less load request, then skips until the interval passes"""
+        responses.add(responses.POST, "http://localhost:11434/api/generate", json={"done": True}, status=200)
+
+        assert generator.warm_up() is True
+        assert generator.warm_up() is False
+
+        assert len(responses.calls) == 1
+        assert json.loads(responses.calls[0].request.body) == {"model": "llama3.2", "stream": False}
+
+    @responses.activate
+    def test_warm_up_failure_retried(self, generator):
+        """A failed warm-up is logged, not raised, and the next call tries again"""
+        responses.add(responses.POST, "http://localhost:11434/api/generate", status=500)
+
+        assert generator.warm_up() is True
+        assert generator.warm_up() is True
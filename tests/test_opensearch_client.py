@@ -0,0 +1,61 @@
+"""
+Unit tests for the OpenSearch client serializer
+"""
+import json
+import numpy as np
+import pytest
+from datetime import datetime
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.serializer import JSONSerializer
+from app.clients.opensearch_client import ORJSONSerializer, compact_query_vector
+
+
+class TestORJSONSerializer:
+    """Test cases for ORJSONSerializer"""
+
+    def test_numpy_embedding_serialized(self):
+        """numpy rows are written as JSON arrays without tolist()"""
+        embs = np.array([[0.5, 0.25], [1.0, 2.0]], dtype="float32")
+
+        body = ORJSONSerializer().dumps({"embedding": embs[1]})
+
+        assert json.loads(body) == {"embedding": [1.0, 2.0]}
+
+    def test_matches_default_serializer(self):
+        """Documents decode to the same values as with the stock serializer"""
+        doc = {
+            "doc_id": "doc-1",
+            "title": "Título",
+            "created_at": datetime(2024, 1, 1, 12, 30),
+            "score": np.float32(0.5),
+        }
+
+        assert json.loads(ORJSONSerializer().dumps(doc)) == json.loads(JSONSerializer().dumps(doc))
+
+    def test_loads_response(self):
+        """Response bodies decode like with the stock serializer; bad JSON raises SerializationError"""
+        body = '{"hits": {"hits": [{"_id": "a", "_score": 1.5, "_source": {"title": "Título"}}]}}'
+
+        assert ORJSONSerializer().loads(body) == JSONSerializer().loads(body)
+        with pytest.raises(SerializationError):
+            ORJSONSerializer().loads("{not json")
+
+    def test_strings_passed_through(self):
+        """Pre-serialized bodies are not encoded again"""
+        assert ORJSONSerializer().dumps('{"a":1}') == '{"a":1}'
+
+
+class TestCompactQueryVector:
+    """Test cases for compact_query_vector"""
+
+    def test_shorter_body_within_fp16_precision(self):
+        """Rounded vectors serialize shorter and stay well inside fp16 error"""
+        vec = np.random.default_rng(0).standard_normal(256).astype("float32")
+        vec /= np.linalg.norm(vec)
+
+        compact = compact_query_vector(vec)
+
+        serializer = ORJSONSerializer()
+        assert len(serializer.dumps({"vector": compact})) < 0.8 * len(serializer.dumps({"vector": vec}))
+        fp16_error = np.abs(vec.astype("float16").astype("float32") - vec).max()
+        assert np.abs(compact - vec).max() < fp16_error
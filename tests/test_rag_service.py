@@ -1,10 +1,11 @@
 """
 Unit tests for RAG service
 """
+import threading
 import pytest
 import numpy as np
 from unittest.mock import patch, MagicMock, Mock
-from app.services.rag_service import search_opensearch, rag_answer
+from app.services.rag_service import search_opensearch, search_opensearch_batch, rag_answer, rag_answer_batch
 
 
 class TestSearchOpenSearch:
@@ -13,7 +14,7 @@ class TestSearchOpenSearch:
     @pytest.fixture
     def mock_embedder(self):
         """Mock embedder"""
-        with patch('app.services.rag_service.OllamaAPIEmbedder') as mock:
+        with patch('app.services.deps.OllamaAPIEmbedder') as mock:
             embedder = mock.return_value
             embedder.embed.return_value = np.array([0.1] * 256, dtype='float32')
             yield embedder
@@ -86,7 +87,9 @@ class TestSearchOpenSearch:
         body = call_args[1]['body']
         
         expected_fields = ["doc_id", "chunk_id", "title", "category", "text_snippet"]
-        assert body['_source'] == expected_fields
+        assert body['_source']['includes'] == expected_fields
+        assert body['_source']['excludes'] == ["embedding"]
+        assert body['track_total_hits'] is False
 
     def test_search_opensearch_empty_results(self, mock_request, mock_embedder):
         """Test search with no results"""
@@ -99,6 +102,57 @@ class TestSearchOpenSearch:
         assert isinstance(result, list)
         assert len(result) == 0
 
+    def test_search_opensearch_reuses_embedder(self, mock_request):
+        """Test that the embedder is built once and shared across searches"""
+        with patch('app.services.deps.OllamaAPIEmbedder') as mock:
+            mock.return_value.embed.return_value = np.array([0.1] * 256, dtype='float32')
+            search_opensearch(mock_request, "first query", "test-index")
+            search_opensearch(mock_request, "second query", "test-index")
+
+        assert mock.call_count == 1
+        assert mock.return_value.embed.call_count == 2
+
+
+class TestSearchOpenSearchBatch:
+    """Test cases for search_opensearch_batch function"""
+
+    @pytest.fixture
+    def mock_embedder(self):
+        """Mock embedder returning one row per query"""
+        with patch('app.services.deps.OllamaAPIEmbedder') as mock:
+            embedder = mock.return_value
+            embedder.embed_batch.side_effect = lambda texts: np.full((len(texts), 256), 0.1, dtype='float32')
+            yield embedder
+
+    def test_one_embed_and_msearch(self, mock_request, mock_embedder):
+        """All queries are embedded together and sent as one msearch, hits kept per query"""
+        client = mock_request.app.state.opensearch_client
+        hit = {"_id": "c-1", "_score": 0.9, "_source": {"doc_id": "d-1", "title": "T", "category": "tech", "text_snippet": "s"}}
+        client.msearch.return_value = {"responses": [{"hits": {"hits": [hit]}}, {"hits": {"hits": []}}]}
+
+        results = search_opensearch_batch(mock_request, ["q1", "q2"], "test-index", top_k=3, filter_category="tech")
+
+        mock_embedder.embed_batch.assert_called_once_with(["q1", "q2"])
+        body = client.msearch.call_args[1]['body']
+        assert body[0] == {"index": "test-index"} and body[2] == {"index": "test-index"}
+        assert body[1]['size'] == 3
+        assert body[3]['query']['bool']['filter'] == [{"term": {"category": "tech"}}]
+        assert [len(r) for r in results] == [1, 0]
+        assert results[0][0]["id"] == "c-1"
+        client.search.assert_not_called()
+
+    def test_query_error_raised(self, mock_request, mock_embedder):
+        """A failed query in the msearch response raises"""
+        mock_request.app.state.opensearch_client.msearch.return_value = {"responses": [{"error": {"type": "index_not_found"}}]}
+
+        with pytest.raises(RuntimeError, match="index_not_found"):
+            search_opensearch_batch(mock_request, ["q1"], "missing")
+
+    def test_no_queries(self, mock_request, mock_embedder):
+        """No queries means no requests"""
+        assert search_opensearch_batch(mock_request, [], "test-index") == []
+        mock_embedder.embed_batch.assert_not_called()
+
 
 class TestRagAnswer:
     """Test cases for rag_answer function"""
@@ -122,7 +176,7 @@ class TestRagAnswer:
     @pytest.fixture
     def mock_generator(self):
         """Mock OllamaGenerator"""
-        with patch('app.services.rag_service.OllamaGenerator') as mock:
+        with patch('app.services.deps.OllamaGenerator') as mock:
             generator = mock.return_value
             generator.generate.return_value = "Machine learning is a subset of AI."
             yield generator
@@ -199,3 +253,45 @@ class TestRagAnswer:
         assert isinstance(result["answer"], str)
         assert isinstance(result["contexts"], list)
 
+    def test_rag_answer_reuses_generator(self, mock_request, mock_search):
+        """Test that the generator is built once and shared across answers"""
+        with patch('app.services.deps.OllamaGenerator') as mock:
+            mock.return_value.generate.return_value = "answer"
+            rag_answer(mock_request, "What is ML?", "test-index")
+            rag_answer(mock_request, "What is AI?", "test-index")
+
+        assert mock.call_count == 1
+
+    def test_rag_answer_warms_generator_during_search(self, mock_request, mock_search, mock_generator):
+        """The generator warm-up runs alongside the search, before generation"""
+        search_started = threading.Event()
+        warm_done = threading.Event()
+        warmed_during_search = []
+
+        def search(*args, **kwargs):
+            search_started.set()
+            warmed_during_search.append(warm_done.wait(timeout=2))
+            return []
+
+        mock_search.side_effect = search
+        mock_generator.warm_up.side_effect = lambda: search_started.wait(timeout=2) and warm_done.set()
+
+        rag_answer(mock_request, "What is ML?", "test-index")
+
+        assert warmed_during_search == [True]
+        mock_generator.warm_up.assert_called_once()
+        mock_generator.generate.assert_called_once()
+
+    def test_rag_answer_batch(self, mock_request):
+        """Each query is answered from its own hits, in input order"""
+        with patch('app.services.rag_service.search_opensearch_batch') as mock_batch, \
+                patch('app.services.deps.OllamaGenerator') as mock:
+            mock_batch.return_value = [[{"text_snippet": "a"}], [{"text_snippet": "b"}]]
+            mock.return_value.generate.side_effect = lambda query, contexts: f"{query}:{contexts[0]['text_snippet']}"
+
+            results = rag_answer_batch(mock_request, ["q1", "q2"], "test-index", top_k=3)
+
+        assert [r["answer"] for r in results] == ["q1:a", "q2:b"]
+        assert results[1]["contexts"] == [{"text_snippet": "b"}]
+        assert mock_batch.call_args[1]['top_k'] == 3
+        mock.return_value.warm_up.assert_called_once()
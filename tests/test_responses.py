@@ -0,0 +1,35 @@
+"""
+Unit tests for ORJSONResponse
+"""
+import json
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.responses import ORJSONResponse
+
+
+class TestORJSONResponse:
+    """Test cases for the orjson response class"""
+
+    def test_render_plain_dict(self):
+        """Test that plain dicts render to the same JSON as the stdlib"""
+        content = {"query": "What is ML?", "contexts": [{"score": 0.95}], "top_k": 5}
+        assert json.loads(ORJSONResponse(content).body) == content
+
+    def test_render_numpy(self):
+        """Test that numpy arrays and scalars serialize without conversion"""
+        body = ORJSONResponse({"vector": np.array([0.5, 0.25], dtype="float32"), "score": np.float32(0.5)}).body
+        assert json.loads(body) == {"vector": [0.5, 0.25], "score": 0.5}
+
+    def test_default_response_class(self):
+        """Test that endpoints return orjson-rendered JSON when set as default"""
+        app = FastAPI(default_response_class=ORJSONResponse)
+
+        @app.get("/health")
+        def health():
+            return {"status": "ok"}
+
+        response = TestClient(app).get("/health")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"status": "ok"}
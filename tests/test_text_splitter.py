@@ -2,7 +2,32 @@
 Unit tests for text_splitter module
 """
 import pytest
-from app.utils.text_splitter import simple_sentence_split
+import numpy as np
+from unittest.mock import patch
+from app.utils.text_splitter import (
+    _SENTENCE_END_RE,
+    _ascii_sentence_spans,
+    _split_sentences,
+    simple_sentence_split,
+    simple_sentence_split_batch,
+)
+
+
+@pytest.fixture(scope="module")
+def long_sentence():
+    """One 200-word sentence"""
+    return " ".join(["word"] * 200) + "."
+
+
+@pytest.fixture(scope="module")
+def realistic_text():
+    """Indented multi-line paragraph of four sentences"""
+    return """
+        Machine learning is a subset of artificial intelligence. 
+        It focuses on building systems that learn from data. 
+        These systems improve their performance over time without being explicitly programmed.
+        Deep learning is a specialized form of machine learning.
+        """
 
 
 class TestSimpleSentenceSplit:
@@ -72,10 +97,9 @@ class TestSimpleSentenceSplit:
         assert "Statement two." in result[0]
         assert "Exclamation three!" in result[0]
 
-    def test_long_single_sentence(self):
+    def test_long_single_sentence(self, long_sentence):
         """Test a very long single sentence"""
-        text = " ".join(["word"] * 200) + "."
-        result = simple_sentence_split(text, max_words=50, overlap=10)
+        result = simple_sentence_split(long_sentence, max_words=50, overlap=10)
         # Should create at least one chunk
         assert len(result) >= 1
 
@@ -87,6 +111,20 @@ class TestSimpleSentenceSplit:
         # Should not have leading/trailing whitespace issues
         assert result[0].strip() == result[0] or "First sentence" in result[0]
 
+    def test_short_text_single_chunk(self):
+        """Texts too short to exceed max_words come back as one chunk, sentences joined by one space"""
+        assert simple_sentence_split("One.\n\n Two!  Three", max_words=10, overlap=2) == ["One. Two! Three"]
+
+    def test_invalid_max_words(self):
+        """max_words below 1 is rejected"""
+        with pytest.raises(ValueError, match="max_words"):
+            simple_sentence_split("One. Two.", max_words=0)
+
+    def test_overlap_ge_max_words(self):
+        """An overlap of max_words or more behaves like max_words - 1"""
+        text = "One two three. Four five six. Seven eight nine."
+        assert simple_sentence_split(text, max_words=3, overlap=5) == simple_sentence_split(text, max_words=3, overlap=2)
+
     def test_max_words_boundary(self):
         """Test behavior at max_words boundary"""
         # Create text with exactly max_words
@@ -95,18 +133,57 @@ class TestSimpleSentenceSplit:
         result = simple_sentence_split(text, max_words=10, overlap=2)
         assert len(result) == 1
 
-    def test_realistic_text(self):
+    def test_realistic_text(self, realistic_text):
         """Test with realistic paragraph"""
-        text = """
-        Machine learning is a subset of artificial intelligence. 
-        It focuses on building systems that learn from data. 
-        These systems improve their performance over time without being explicitly programmed.
-        Deep learning is a specialized form of machine learning.
-        """
-        result = simple_sentence_split(text, max_words=20, overlap=5)
+        result = simple_sentence_split(realistic_text, max_words=20, overlap=5)
         assert len(result) >= 1
         # Verify all chunks are strings
         assert all(isinstance(chunk, str) for chunk in result)
         # Verify chunks are not empty
         assert all(len(chunk.strip()) > 0 for chunk in result)
 
+
+
+class TestSimpleSentenceSplitBatch:
+    """Test cases for simple_sentence_split_batch"""
+
+    def test_batch_matches_serial(self, realistic_text):
+        """Worker processes return the same chunks as serial calls, in input order"""
+        texts = [f"Document {i}. " + realistic_text * (i % 3 + 1) for i in range(150)] + [None, ""]
+
+        result = simple_sentence_split_batch(texts, max_words=20, overlap=5, workers=2)
+
+        assert result == [simple_sentence_split(t, max_words=20, overlap=5) for t in texts]
+
+    def test_small_batch_in_process(self):
+        """Small inputs are split without starting workers"""
+        with patch("app.utils.text_splitter.ProcessPoolExecutor") as pool:
+            result = simple_sentence_split_batch(["One. Two.", "Three."], max_words=10, overlap=0)
+
+        assert result == [["One. Two."], ["Three."]]
+        pool.assert_not_called()
+
+
+class TestSentenceBoundaries:
+    """Test cases for the compiled ASCII sentence scanner"""
+
+    @pytest.mark.parametrize("text", [
+        "",
+        "a",
+        "One. Two! Three? Four",
+        "Hello.  World!   Foo?bar.\n\nBaz.",
+        "Multi\nline. text\there!  ok",
+        "a. . b",
+        "x. " * 5,
+        "Dots...  and\x1cseparators.\x1fnext",
+    ])
+    def test_ascii_matches_regex(self, text):
+        """The scanner splits ASCII text exactly where the regex does"""
+        text = text.strip()
+        spans = _ascii_sentence_spans(np.frombuffer(text.encode("ascii"), dtype=np.uint8))
+        assert [text[s:e] for s, e in spans.tolist()] == _SENTENCE_END_RE.split(text)
+
+    def test_non_ascii_uses_regex(self):
+        """Non-ASCII text is split by the regex path"""
+        text = "Ünïcödé. Wörds hère! Ok?"
+        assert _split_sentences(text) == ["Ünïcödé.", "Wörds hère!", "Ok?"]